@@ -1,5 +1,9 @@
 import os
+import time
+import atexit
+import threading
 import psycopg2
+from psycopg2 import pool
 from contextlib import contextmanager
 from dotenv import load_dotenv
 
@@ -15,17 +19,92 @@ DB_CONFIG = {
     "port": os.getenv("DB_PORT"),
 }
 
+# Configuração do Pool de Conexões (também pelo .env, com valores padrão)
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+# Conexões paradas há mais tempo que isso são testadas com um SELECT 1 antes de voltar ao uso
+POOL_PING_APOS_SEG = int(os.getenv("DB_POOL_PING_SEG", "60"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_ultimo_uso = {}  # id(conn) -> momento em que a conexão voltou para o pool
+
+
+def _obter_pool():
+    """Cria o pool na primeira utilização (um único pool para o processo inteiro)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pool.ThreadedConnectionPool(POOL_MIN, POOL_MAX, **DB_CONFIG)
+    return _pool
+
+
+def _conexao_saudavel(conn):
+    """Health check: descarta conexões fechadas ou que o servidor/rede derrubou enquanto estavam paradas."""
+    if conn.closed:
+        return False
+    parada_desde = _ultimo_uso.get(id(conn))
+    if parada_desde is not None and time.monotonic() - parada_desde < POOL_PING_APOS_SEG:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()  # Não deixa a transação do teste aberta
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _pegar_conexao():
+    p = _obter_pool()
+    # Tenta algumas vezes: se o servidor reiniciou, várias conexões paradas estarão mortas
+    for _ in range(POOL_MAX + 1):
+        conn = p.getconn()
+        if _conexao_saudavel(conn):
+            return conn
+        _ultimo_uso.pop(id(conn), None)
+        p.putconn(conn, close=True)
+    raise psycopg2.OperationalError("Não foi possível obter uma conexão válida com o banco de dados.")
+
+
+def _devolver_conexao(conn):
+    p = _obter_pool()
+    if conn.closed:
+        _ultimo_uso.pop(id(conn), None)
+        p.putconn(conn, close=True)
+        return
+    _ultimo_uso[id(conn)] = time.monotonic()
+    p.putconn(conn)
+
+
 @contextmanager
 def get_db_connection():
     conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = _pegar_conexao()
         yield conn
         conn.commit()  # Confirma transação se não houver erro
     except Exception as e:
-        if conn:
-            conn.rollback()  # Desfaz se der erro
+        if conn and not conn.closed:
+            try:
+                conn.rollback()  # Desfaz se der erro
+            except psycopg2.Error:
+                pass  # Conexão quebrada: será descartada ao devolver
         raise e  # Relança o erro para a tela tratar
     finally:
         if conn:
-            conn.close() # Garante fechamento
\ No newline at end of file
+            _devolver_conexao(conn)  # Devolve ao pool em vez de fechar
+
+
+def fechar_pool():
+    """Fecha todas as conexões do pool (chamado automaticamente ao encerrar o programa)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _ultimo_uso.clear()
+
+
+atexit.register(fechar_pool)
@@ -0,0 +1,270 @@
+import threading
+from collections import namedtuple
+import psycopg2
+from config.database import get_db_connection
+
+# Índice criado com CREATE INDEX CONCURRENTLY (sem travar as gravações da tabela enquanto é montado).
+# Uma migração com algum Indice roda fora de transação, um comando por vez, e só é registrada no fim.
+Indice = namedtuple("Indice", "nome tabela definicao")
+
+# =========================================================
+# MIGRAÇÕES DO BANCO (VERSIONADAS)
+# =========================================================
+# Cada item: (versão, descrição, [comandos SQL ou Indice]). Nunca altere uma migração já publicada:
+# acrescente uma nova com a próxima versão. Os comandos devem ser idempotentes (IF NOT EXISTS),
+# porque bancos antigos podem já ter parte das estruturas criadas à mão.
+MIGRACOES = [
+    (1, "Contadores de numeração de documentos (OS e Pareceres)", [
+        """
+        CREATE TABLE IF NOT EXISTS common.numeracao_documentos (
+            sistema        TEXT    NOT NULL,
+            modelo         TEXT    NOT NULL,
+            ano            INTEGER NOT NULL,
+            ultimo_numero  INTEGER NOT NULL,
+            PRIMARY KEY (sistema, modelo, ano)
+        )
+        """,
+    ]),
+    (2, "Extensões pg_trgm/unaccent e função sigp.f_unaccent (busca sem acento)", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        # unaccent() sozinha não é IMMUTABLE (depende do search_path), por isso não entra em índice.
+        # Esta versão fixa o dicionário e o schema, e pode ser usada em índices de expressão.
+        """
+        CREATE OR REPLACE FUNCTION sigp.f_unaccent(TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """,
+    ]),
+    (3, "Índices trigram (GIN) para os filtros de texto dos Relatórios e do Histórico", [
+        Indice(nome, tabela, f"USING gin (sigp.f_unaccent({coluna}) gin_trgm_ops)")
+        for nome, tabela, coluna in [
+            ("ix_os_ponto_principal_trgm", "sigp.ordens_servico", "ponto_principal_id"),
+            ("ix_os_pontos_adicionais_trgm", "sigp.ordens_servico", "pontos_adicionais"),
+            ("ix_os_bairro_trgm", "sigp.ordens_servico", "bairro"),
+            ("ix_os_logradouro_trgm", "sigp.ordens_servico", "logradouro_completo"),
+            ("ix_os_responsavel_trgm", "sigp.ordens_servico", "responsavel"),
+            ("ix_pareceres_ids_pontos_trgm", "sigp.pareceres", "ids_pontos"),
+            ("ix_pareceres_processo_trgm", "sigp.pareceres", "processo"),
+            ("ix_pareceres_endereco_trgm", "sigp.pareceres", "endereco_vistoria"),
+            ("ix_lixeira_excluido_por_trgm", "common.lixeira", "excluido_por"),
+        ]
+    ]),
+    (4, "Tabela de vínculos ponto -> documento (OS e Pareceres) com carga inicial", [
+        """
+        CREATE TABLE IF NOT EXISTS sigp.pontos_documentos (
+            modulo        TEXT    NOT NULL,
+            documento_id  INTEGER NOT NULL,
+            id_ponto      TEXT    NOT NULL,
+            PRIMARY KEY (modulo, documento_id, id_ponto)
+        )
+        """,
+        # A chave primária atende "pontos do documento"; este índice atende "documentos do ponto"
+        "CREATE INDEX IF NOT EXISTS ix_pontos_documentos_ponto ON sigp.pontos_documentos (id_ponto, modulo, documento_id)",
+        # Carga inicial: quebra os textos já gravados (OS separa por '-', Parecer por ',')
+        """
+        INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+        SELECT DISTINCT 'OS', o.id, btrim(t.id_ponto)
+        FROM sigp.ordens_servico o
+        CROSS JOIN LATERAL unnest(array_append(string_to_array(COALESCE(o.pontos_adicionais, ''), '-'), o.ponto_principal_id)) AS t(id_ponto)
+        WHERE btrim(t.id_ponto) <> ''
+        ON CONFLICT DO NOTHING
+        """,
+        """
+        INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+        SELECT DISTINCT 'PARECER', p.id, btrim(t.id_ponto)
+        FROM sigp.pareceres p
+        CROSS JOIN LATERAL unnest(string_to_array(COALESCE(p.ids_pontos, ''), ',')) AS t(id_ponto)
+        WHERE btrim(t.id_ponto) <> ''
+        ON CONFLICT DO NOTHING
+        """,
+    ]),
+    (5, "Índice da listagem do Histórico (data de exclusão, id)", [
+        # Atende o filtro por período e a paginação por chave (ORDER BY data_exclusao DESC, id DESC)
+        Indice("ix_lixeira_data_exclusao", "common.lixeira", "(data_exclusao DESC NULLS LAST, id DESC)"),
+    ]),
+    (6, "Vínculos ponto -> documento mantidos por triggers (OS e Pareceres) e recarga completa", [
+        # O próprio banco mantém os vínculos a partir do texto gravado: vale para qualquer versão do
+        # programa (inclusive as que não conhecem a tabela), sem depender de quem grava lembrar dela
+        """
+        CREATE OR REPLACE FUNCTION sigp.f_vinculos_os() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM sigp.pontos_documentos WHERE modulo = 'OS' AND documento_id = OLD.id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+                SELECT DISTINCT 'OS', NEW.id, btrim(t.id_ponto)
+                FROM unnest(array_append(string_to_array(COALESCE(NEW.pontos_adicionais, ''), '-'), NEW.ponto_principal_id)) AS t(id_ponto)
+                WHERE btrim(t.id_ponto) <> ''
+                ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        """
+        CREATE OR REPLACE FUNCTION sigp.f_vinculos_parecer() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM sigp.pontos_documentos WHERE modulo = 'PARECER' AND documento_id = OLD.id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+                SELECT DISTINCT 'PARECER', NEW.id, btrim(t.id_ponto)
+                FROM unnest(string_to_array(COALESCE(NEW.ids_pontos, ''), ',')) AS t(id_ponto)
+                WHERE btrim(t.id_ponto) <> ''
+                ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS tg_vinculos_os ON sigp.ordens_servico",
+        """
+        CREATE TRIGGER tg_vinculos_os
+        AFTER INSERT OR UPDATE OF ponto_principal_id, pontos_adicionais OR DELETE ON sigp.ordens_servico
+        FOR EACH ROW EXECUTE PROCEDURE sigp.f_vinculos_os()
+        """,
+        "DROP TRIGGER IF EXISTS tg_vinculos_parecer ON sigp.pareceres",
+        """
+        CREATE TRIGGER tg_vinculos_parecer
+        AFTER INSERT OR UPDATE OF ids_pontos OR DELETE ON sigp.pareceres
+        FOR EACH ROW EXECUTE PROCEDURE sigp.f_vinculos_parecer()
+        """,
+        # Recarga: documentos gravados sem vínculo (ou com vínculo velho) antes dos triggers
+        "DELETE FROM sigp.pontos_documentos",
+        """
+        INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+        SELECT DISTINCT 'OS', o.id, btrim(t.id_ponto)
+        FROM sigp.ordens_servico o
+        CROSS JOIN LATERAL unnest(array_append(string_to_array(COALESCE(o.pontos_adicionais, ''), '-'), o.ponto_principal_id)) AS t(id_ponto)
+        WHERE btrim(t.id_ponto) <> ''
+        """,
+        """
+        INSERT INTO sigp.pontos_documentos (modulo, documento_id, id_ponto)
+        SELECT DISTINCT 'PARECER', p.id, btrim(t.id_ponto)
+        FROM sigp.pareceres p
+        CROSS JOIN LATERAL unnest(string_to_array(COALESCE(p.ids_pontos, ''), ',')) AS t(id_ponto)
+        WHERE btrim(t.id_ponto) <> ''
+        """,
+    ]),
+]
+
+# Versão que habilita a busca por trecho sem acento (ver src/shared/filtros_sql.py)
+MIGRACAO_BUSCA_TRIGRAM = 3
+# Versão a partir da qual os vínculos ponto -> documento estão completos (mantidos por trigger);
+# habilita a busca exata por ID do ponto (ver src/shared/pontos_documentos.py)
+MIGRACAO_PONTOS_DOCUMENTOS = 6
+
+# Chave do pg_advisory_lock: dois computadores abrindo o programa ao mesmo tempo não aplicam a mesma migração
+_CHAVE_LOCK_MIGRACAO = 74_510_001
+
+_lock = threading.Lock()
+_verificado = False
+_versoes_aplicadas = set()
+
+
+def garantir_schema():
+    """
+    Aplica as migrações que faltam. Chamada uma vez, em segundo plano, logo depois do login
+    (main.iniciar_sistema), numa conexão própria e fora de qualquer transação de tela: um
+    CREATE INDEX nunca fica esperando uma gravação que, por sua vez, espera a migração.
+
+    Cada migração é confirmada na sua própria transação (a numeração da migração 1 já vale
+    enquanto os índices das seguintes são criados). Uma migração que falhar (ex.: usuário sem
+    permissão para CREATE EXTENSION) é registrada no log e pulada: o resto do sistema continua
+    funcionando sem ela e a função levanta erro no fim, para quem chama tentar de novo mais tarde.
+    Cada nova tentativa relê common.schema_versoes (outro computador pode ter aplicado a migração).
+    """
+    global _verificado
+    with _lock:
+        if _verificado:
+            return
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS common.schema_versoes (
+                            versao      INTEGER PRIMARY KEY,
+                            descricao   TEXT,
+                            aplicada_em TIMESTAMP DEFAULT now()
+                        )
+                    """)
+                    conn.commit()
+                    # Banco já em dia (o caso comum): só lê as versões, sem esperar o lock de outro computador
+                    _ler_versoes(cursor)
+                    conn.commit()
+                    if _pendentes():
+                        _aplicar_pendentes(conn, cursor)
+        except Exception as e:
+            print(f"[LOG DB] Erro ao verificar o schema do banco: {e}")
+            raise Exception("Falha ao preparar as estruturas do banco de dados.")
+        pendentes = _pendentes()
+        if pendentes:
+            raise Exception(f"Migrações do banco ainda não aplicadas: {', '.join(map(str, pendentes))}.")
+        _verificado = True
+
+
+def _pendentes():
+    return [versao for versao, _, _ in MIGRACOES if versao not in _versoes_aplicadas]
+
+
+def _ler_versoes(cursor):
+    cursor.execute("SELECT versao FROM common.schema_versoes")
+    _versoes_aplicadas.update(linha[0] for linha in cursor.fetchall())
+
+
+def _aplicar_pendentes(conn, cursor):
+    # Lock de sessão (e não de transação): vale para todas as transações abaixo, uma por migração
+    cursor.execute("SELECT pg_advisory_lock(%s)", (_CHAVE_LOCK_MIGRACAO,))
+    try:
+        _ler_versoes(cursor)  # Outro computador pode ter aplicado enquanto esperávamos o lock
+        conn.commit()
+        for versao, descricao, comandos in MIGRACOES:
+            if versao in _versoes_aplicadas:
+                continue
+            # CREATE INDEX CONCURRENTLY não roda dentro de transação
+            conn.autocommit = any(isinstance(comando, Indice) for comando in comandos)
+            try:
+                for comando in comandos:
+                    if isinstance(comando, Indice):
+                        _criar_indice(cursor, comando)
+                    else:
+                        cursor.execute(comando)
+                conn.autocommit = False
+                cursor.execute("INSERT INTO common.schema_versoes (versao, descricao) VALUES (%s, %s)", (versao, descricao))
+                conn.commit()
+                _versoes_aplicadas.add(versao)
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"[LOG DB] Migração {versao} ({descricao}) não aplicada: {e}")
+            finally:
+                conn.autocommit = False
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (_CHAVE_LOCK_MIGRACAO,))
+        conn.commit()
+
+
+def _criar_indice(cursor, indice):
+    # Um CONCURRENTLY interrompido (programa fechado, conexão caída) deixa o índice INVALID:
+    # o IF NOT EXISTS o daria por criado, então ele é apagado e montado de novo
+    schema = indice.tabela.split(".")[0]
+    cursor.execute("""
+        SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)
+    """, (f"{schema}.{indice.nome}",))
+    invalido = cursor.fetchone()
+    if invalido and invalido[0]:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema}.{indice.nome}")
+    cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {indice.nome} ON {indice.tabela} {indice.definicao}")
+
+
+def migracao_aplicada(versao):
+    """
+    Diz se a migração está ativa no banco (para as consultas escolherem o caminho com ou sem ela).
+    Só consulta as versões já lidas por garantir_schema: não vai ao banco, então pode ser chamada
+    de dentro da transação de quem grava. Antes da verificação terminar, responde False.
+    """
+    return versao in _versoes_aplicadas
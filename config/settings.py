@@ -4,4 +4,57 @@ import os
 # CONFIGURAÇÕES DE REDE / DIRETÓRIOS
 # =========================================================
 # Se o IP do servidor mudar um dia, você só altera esta linha abaixo!
-RAIZ_REDE = r"\\172.20.0.57\dados\DIPLA\ARQUIVOS SIGP - SIGA - SPR"
\ No newline at end of file
+RAIZ_REDE = r"\\172.20.0.57\dados\DIPLA\ARQUIVOS SIGP - SIGA - SPR"
+# Pasta deste computador para os dados que o programa guarda localmente (fila de envio, índice de arquivos)
+PASTA_DADOS_LOCAIS = os.path.join(os.getenv("LOCALAPPDATA") or os.path.expanduser("~"), "SIGP")
+
+# =========================================================
+# CACHE DO DASHBOARD
+# =========================================================
+# A cada troca de aba o Dashboard só busca o que mudou desde a última vez.
+# De tempos em tempos (em minutos) ele recarrega tudo, para pegar edições feitas nos Relatórios.
+DASHBOARD_RECARGA_TOTAL_MIN = 30
+# Gráficos já desenhados (imagens) guardados em memória por ano/mês/gráfico, até este limite
+DASHBOARD_GRAFICOS_EM_CACHE = 120
+
+# =========================================================
+# CACHE DE ENDEREÇOS (CONSULTA POR ID DO PONTO)
+# =========================================================
+# Endereços consultados ficam em memória por esse tempo (minutos), até o limite de itens.
+# Qualquer gravação feita por este programa já invalida o ID alterado na hora.
+CACHE_ENDERECOS_TTL_MIN = 10
+CACHE_ENDERECOS_MAX_ITENS = 20000
+# Carrega todos os endereços em segundo plano logo após o login
+CACHE_ENDERECOS_AQUECER_NO_LOGIN = True
+
+# =========================================================
+# GERAÇÃO DE PARECERES EM LOTE (PLANILHA)
+# =========================================================
+# Quantos processos geram os documentos Word ao mesmo tempo
+LOTE_PARECER_PROCESSOS = 4
+# Abaixo dessa quantidade de linhas os documentos são gerados sem abrir processos auxiliares
+LOTE_PARECER_MINIMO_PROCESSOS = 20
+
+# =========================================================
+# EXPORTAÇÕES (EXCEL)
+# =========================================================
+# As exportações leem o banco em lotes deste tamanho (linhas) e gravam a planilha direto no disco,
+# então a memória usada não cresce com o tamanho da base
+EXPORTACAO_LOTE_LINHAS = 5000
+
+# =========================================================
+# FILA DE ENVIO DE DOCUMENTOS PARA A REDE
+# =========================================================
+# Os Word são gravados primeiro nesta pasta do computador e copiados para a RAIZ_REDE em segundo plano
+PASTA_FILA_ENVIO = os.path.join(PASTA_DADOS_LOCAIS, "fila_envio")
+# Espera (segundos) entre verificações da fila; a cada falha seguida a espera dobra, até o máximo
+FILA_ENVIO_INTERVALO_SEG = 5
+FILA_ENVIO_ESPERA_MAX_SEG = 300
+
+# =========================================================
+# ÍNDICE DOS DOCUMENTOS NA REDE (RELATÓRIOS)
+# =========================================================
+# Uma thread percorre RAIZ_REDE\SIGP de tempos em tempos (minutos) e guarda a lista de .docx em memória,
+# relendo só as pastas cuja data de modificação mudou. A lista também fica salva neste arquivo local.
+INDICE_ARQUIVOS_INTERVALO_MIN = 5
+ARQUIVO_INDICE_REDE = os.path.join(PASTA_DADOS_LOCAIS, "indice_arquivos.json")
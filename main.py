@@ -3,12 +3,12 @@ from PIL import Image
 
 from src.auth.view import LoginView
 from src.auth.service import AuthService
-from src.ordem_servico.view import renderizar as renderizar_os
-from src.parecer.view import renderizar as renderizar_parecer
-from src.relatorios.view import renderizar as renderizar_relatorios
-from src.historico.view import renderizar as renderizar_historico
-from src.dashboard.view import renderizar as renderizar_dashboard
-from src.enderecos.view import renderizar as renderizar_enderecos
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import AvisoFilaEnvio
+from src.shared.fila_envio import fila_envio
+from src.shared.indice_arquivos import indice_arquivos
+from config.settings import CACHE_ENDERECOS_AQUECER_NO_LOGIN
+from config.schema import garantir_schema
 
 try:
     from src.shared.utils import resource_path
@@ -19,6 +19,32 @@ COLOR_PRIMARY = "#0F8C75"
 COLOR_PRIMARY_HOVER = "#0B6B59"
 COLOR_BG = "#F2F2F2"
 
+def renderizar_aba(nome_aba, frame_destino, usuario_dados):
+    """
+    Monta o painel de uma aba. Os imports ficam aqui dentro de propósito: cada módulo
+    (com pandas/matplotlib/docx) só é carregado na primeira vez que a aba é aberta.
+    Imports explícitos (e não por nome em string) para o empacotador continuar enxergando.
+    """
+    if nome_aba == "Gráficos":
+        from src.dashboard.view import renderizar
+        return renderizar(frame_destino, usuario_dados)
+    if nome_aba == "Ordem de Serviço":
+        from src.ordem_servico.view import renderizar
+        return renderizar(frame_destino, usuario_dados)
+    if nome_aba in ("Relatórios OS", "Relatórios Parecer"):
+        from src.relatorios.view import renderizar
+        return renderizar(frame_destino, usuario_dados, tipo="OS" if nome_aba == "Relatórios OS" else "PARECER")
+    if nome_aba == "Parecer Técnico":
+        from src.parecer.view import renderizar
+        return renderizar(frame_destino, usuario_dados)
+    if nome_aba == "Histórico":
+        from src.historico.view import renderizar
+        return renderizar(frame_destino, usuario_dados)
+    if nome_aba == "Cadastro de Endereço":
+        from src.enderecos.view import renderizar
+        return renderizar(frame_destino, usuario_dados)
+    raise ValueError(f"Aba desconhecida: {nome_aba}")
+
 def iniciar_sistema(usuario_dados):
     nome_usuario = usuario_dados.get("nome", "Usuário")
     is_admin = usuario_dados.get("is_admin", False)
@@ -72,6 +98,16 @@ def iniciar_sistema(usuario_dados):
     perfil_texto = f"👤 Olá, {nome_usuario} ({'Admin' if is_admin else 'Comum'})"
     ctk.CTkLabel(frame_topo, text=perfil_texto, font=("Arial", 14), text_color="gray").pack(side="right", padx=20)
 
+    # Documentos ainda não copiados para a rede (a fila continua o que ficou da última vez que o programa fechou)
+    fila_envio.iniciar()
+    # Migrações do banco numa conexão própria, antes de qualquer gravação das telas
+    # (se o banco não responder ou alguma migração falhar, tenta de novo em 30 s)
+    def preparar_schema():
+        obter_executor(app).executar("preparar-schema", garantir_schema, ao_falhar=lambda e: app.after(30000, preparar_schema))
+    preparar_schema()
+    indice_arquivos.iniciar()  # Lista dos documentos da rede para os Relatórios (varredura em segundo plano)
+    AvisoFilaEnvio(frame_topo, fila_envio).pack(side="right", padx=10)
+
     # MENU
     menu_container = ctk.CTkFrame(frame_principal, fg_color="transparent")
     menu_container.pack(fill="x", padx=10, pady=(15, 0))
@@ -96,27 +132,27 @@ def iniciar_sistema(usuario_dados):
         aba = ctk.CTkFrame(frame_conteudo, fg_color="transparent")
         abas[nome] = aba
 
-    # Renderiza os painéis dentro de cada aba, passando os dados do usuário para personalizar o conteúdo
-    view_os = renderizar_os(abas["Ordem de Serviço"], usuario_dados)
-    view_dash = renderizar_dashboard(abas["Gráficos"], usuario_dados)
-    view_rel_os = renderizar_relatorios(abas["Relatórios OS"], usuario_dados, tipo="OS")
-    view_par = renderizar_parecer(abas["Parecer Técnico"], usuario_dados)
-    view_rel_par = renderizar_relatorios(abas["Relatórios Parecer"], usuario_dados, tipo="PARECER")
-    view_hist = renderizar_historico(abas["Histórico"], usuario_dados)
-    if is_admin: 
-        view_end = renderizar_enderecos(abas["Cadastro de Endereço"], usuario_dados)
+    views = {}
+
+    def obter_view(nome_aba):
+        """Renderiza o painel da aba na primeira abertura. Retorna (view, recém-criada)."""
+        if nome_aba in views:
+            return views[nome_aba], False
+        views[nome_aba] = renderizar_aba(nome_aba, abas[nome_aba], usuario_dados)
+        return views[nome_aba], True
 
     def selecionar_aba(nome_aba):
         for aba in abas.values(): aba.pack_forget()
         abas[nome_aba].pack(fill="both", expand=True)
 
+        view, recem_criada = obter_view(nome_aba)
+        if recem_criada: return  # O construtor da view já faz a primeira busca
+
         # AUTO-ATUALIZAÇÃO
         if nome_aba == "Gráficos":
-            view_dash.atualizar_completo()
-        elif nome_aba == "Relatórios OS":
-            view_rel_os.acao_buscar()
-        elif nome_aba == "Relatórios Parecer":
-            view_rel_par.acao_buscar()
+            view.atualizar_completo()
+        elif nome_aba in ("Relatórios OS", "Relatórios Parecer"):
+            view.acao_buscar()
 
     for texto, cor in menu_botoes:
         btn = ctk.CTkButton(menu_container, text=texto, fg_color=cor, font=("Arial Bold", 13), corner_radius=8, height=35, hover_color=COLOR_PRIMARY_HOVER, command=lambda t=texto: selecionar_aba(t))
@@ -124,6 +160,11 @@ def iniciar_sistema(usuario_dados):
 
     selecionar_aba("Ordem de Serviço")
 
+    # Carrega os endereços em segundo plano: a consulta por ID na tela de OS já sai do cache
+    if CACHE_ENDERECOS_AQUECER_NO_LOGIN:
+        from src.ordem_servico.repository import OSRepository
+        obter_executor(app).executar("aquecer-cache-enderecos", OSRepository().aquecer_cache_enderecos)
+
     # Apaga a tela de carregamento e mostra o sistema completo que montamos escondido
     tela_carregamento.destroy()
     frame_principal.pack(fill="both", expand=True)
@@ -154,4 +195,7 @@ def bootstrap():
         app_login.mainloop()
 
 if __name__ == "__main__":
+    # Necessário no executável do Windows: a geração de pareceres em lote abre processos auxiliares
+    import multiprocessing
+    multiprocessing.freeze_support()
     bootstrap()
\ No newline at end of file
@@ -0,0 +1,272 @@
+# dashboard/graficos.py
+import io
+import math
+import textwrap
+import threading
+from collections import OrderedDict
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+from config.settings import DASHBOARD_GRAFICOS_EM_CACHE
+
+COR_TEXTO = "#333333"
+COR_FUNDO = "#FFFFFF"
+COR_LEGENDA = "#F4F6F9"
+COR_NEUTRA = "#777777"
+
+# Cada gráfico da tela (polegadas): metade da largura e 1/7 da altura da figura 14x40 do painel completo
+TAMANHO_GRAFICO = (7, 5.7)
+DPI_BASE = 100
+
+# Tipos que aceitam troca dos valores no lugar (mesmos rótulos = mesmas barras/fatias)
+_ATUALIZAVEIS = ("barras", "barras_h", "pizza")
+
+
+def configurar_eixo(ax, titulo, grid_axis='y'):
+    ax.set_title(titulo, fontsize=13, fontweight='bold', color=COR_TEXTO, pad=15)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_color('#DDDDDD')
+    ax.spines['bottom'].set_color('#DDDDDD')
+    ax.tick_params(colors='#555555')
+    ax.grid(axis=grid_axis, linestyle='--', alpha=0.3, color='#DDDDDD')
+    ax.set_facecolor(COR_FUNDO)
+
+
+def _estrutura(serie):
+    # Tudo o que, se mudar, obriga a refazer o eixo (valores e título são trocados no lugar)
+    return {k: v for k, v in serie.items() if k not in ("valores", "titulo")}
+
+
+class GraficoEixo:
+    """
+    Um gráfico do painel preso a um eixo. Guarda as barras/fatias/textos desenhados para que a
+    próxima série com os mesmos rótulos só troque alturas, textos e ângulos (sem recriar nada).
+
+    A série é um dict simples montado pela tela, ex.:
+        {"tipo": "barras", "titulo", "rotulos": (...), "valores": (...), "cor", "largura", "margem", "quebra", "rotacao"}
+        {"tipo": "barras_h", "titulo", "rotulos", "valores", "cor", "quebra", "margem"}
+        {"tipo": "pizza", "titulo", "rotulos", "valores", "cores": (...)}
+        {"tipo": "produtividade", "titulo", "rotulos", "valores" (%), "media_docs", "media_pct", "cor", "cor_acima", "cor_abaixo"}
+        {"tipo": "vazio", "titulo", "grade": "x"|"y", "texto", "tamanho"}
+    """
+    def __init__(self, ax):
+        self.ax = ax
+        self.serie = None
+        self._barras = []
+        self._textos = []
+        self._fatias = []
+        self._rotulos_fatias = []
+
+    def atualizar(self, serie):
+        """Desenha a série. Devolve None (nada mudou), "valores" (trocados no lugar) ou "layout" (eixo refeito)."""
+        if serie == self.serie:
+            return None
+        anterior, self.serie = self.serie, serie
+        if anterior is not None and serie["tipo"] in _ATUALIZAVEIS and _estrutura(anterior) == _estrutura(serie):
+            getattr(self, f"_atualizar_{serie['tipo']}")(serie)
+            return "valores"
+
+        self.ax.cla()
+        self.ax.set_aspect('auto')  # A pizza deixa o eixo quadrado; o cla() não desfaz
+        self._barras, self._textos, self._fatias, self._rotulos_fatias = [], [], [], []
+        getattr(self, f"_desenhar_{serie['tipo']}")(serie)
+        return "layout"
+
+    # ===== BARRAS VERTICAIS =====
+    def _desenhar_barras(self, s):
+        ax = self.ax
+        posicoes = range(len(s["rotulos"]))
+        self._barras = list(ax.bar(posicoes, s["valores"], color=s["cor"], width=s["largura"]))
+        self._textos = [ax.text(0, 0, "", ha='center', va='bottom', fontweight='bold', color=s["cor"]) for _ in self._barras]
+        ax.set_xticks(posicoes)
+        rotulos = [textwrap.fill(r, width=s["quebra"]) for r in s["rotulos"]] if s["quebra"] else s["rotulos"]
+        if s["rotacao"]:
+            ax.set_xticklabels(rotulos, rotation=s["rotacao"], ha='right', fontsize=9)
+        else:
+            ax.set_xticklabels(rotulos)
+        configurar_eixo(ax, s["titulo"], grid_axis='y')
+        self._atualizar_barras(s)
+
+    def _atualizar_barras(self, s):
+        max_val = max(s["valores"], default=0) or 1
+        for barra, texto, valor in zip(self._barras, self._textos, s["valores"]):
+            barra.set_height(valor)
+            texto.set_position((barra.get_x() + barra.get_width() / 2, valor + max_val * 0.02))
+            texto.set_text(f'{int(valor)}')
+            texto.set_visible(valor > 0)
+        self.ax.set_ylim(0, max_val * s["margem"])
+        self.ax.title.set_text(s["titulo"])  # set_title() voltaria a fonte ao padrão
+
+    # ===== BARRAS HORIZONTAIS =====
+    def _desenhar_barras_h(self, s):
+        ax = self.ax
+        posicoes = range(len(s["rotulos"]))
+        self._barras = list(ax.barh(posicoes, s["valores"], color=s["cor"]))
+        self._textos = [ax.text(0, 0, "", va='center', ha='left', fontweight='bold', color=s["cor"]) for _ in self._barras]
+        ax.set_yticks(posicoes)
+        ax.set_yticklabels([textwrap.fill(r, width=s["quebra"]) for r in s["rotulos"]])
+        ax.invert_yaxis()
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+        configurar_eixo(ax, s["titulo"], grid_axis='x')
+        self._atualizar_barras_h(s)
+
+    def _atualizar_barras_h(self, s):
+        max_val = max(s["valores"], default=0) or 1
+        for barra, texto, valor in zip(self._barras, self._textos, s["valores"]):
+            barra.set_width(valor)
+            texto.set_position((valor + max_val * 0.02, barra.get_y() + barra.get_height() / 2))
+            texto.set_text(f'{int(valor)}')
+            texto.set_visible(valor > 0)
+        self.ax.set_xlim(0, max_val * s["margem"])
+        self.ax.title.set_text(s["titulo"])  # set_title() voltaria a fonte ao padrão
+
+    # ===== PIZZA (ROSCA) =====
+    def _desenhar_pizza(self, s):
+        self._fatias, self._rotulos_fatias, self._textos = self.ax.pie(
+            s["valores"], labels=s["rotulos"], autopct=lambda p: "", startangle=90, colors=s["cores"],
+            textprops={'fontsize': 10, 'fontweight': 'bold'}, wedgeprops=dict(width=0.4, edgecolor='w'))
+        self.ax.set_title(s["titulo"], fontsize=12, fontweight='bold', color=COR_TEXTO, pad=15)
+        self._atualizar_pizza(s)
+
+    def _atualizar_pizza(self, s):
+        # Mesma geometria do ax.pie (início em 90°, sentido anti-horário, rótulo a 1.1 e número a 0.6 do raio)
+        total = sum(s["valores"])
+        acumulado = 0
+        for fatia, rotulo, texto, valor in zip(self._fatias, self._rotulos_fatias, self._textos, s["valores"]):
+            fracao = valor / total
+            theta1 = 90 + 360 * acumulado
+            theta2 = theta1 + 360 * fracao
+            fatia.set_theta1(theta1)
+            fatia.set_theta2(theta2)
+            meio = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(meio), math.sin(meio)
+            rotulo.set_position((1.1 * x, 1.1 * y))
+            rotulo.set_horizontalalignment('left' if x > 0 else 'right')
+            texto.set_position((0.6 * x, 0.6 * y))
+            texto.set_text(f'{int(valor)}\n({fracao * 100:.1f}%)')
+            acumulado += fracao
+        self.ax.title.set_text(s["titulo"])  # set_title() voltaria a fonte ao padrão
+
+    # ===== PRODUTIVIDADE x MÉDIA DA EQUIPE =====
+    def _desenhar_produtividade(self, s):
+        ax = self.ax
+        posicoes = range(len(s["rotulos"]))
+        bars = ax.barh(posicoes, s["valores"], color=s["cor"])
+        ax.set_yticks(posicoes)
+        ax.set_yticklabels([textwrap.fill(r, width=20) for r in s["rotulos"]])
+        ax.invert_yaxis()
+
+        max_val = max(s["valores"], default=0) or 1
+        ax.set_xlim(0, max_val * 1.90)
+
+        texto_legenda = f"Média Ideal da Equipe:\n{s['media_docs']} Docs/Téc\n({s['media_pct']:.1f}%)"
+        ax.text(1.2, 0.03, texto_legenda, transform=ax.transAxes, ha='right', va='bottom',
+                fontsize=9, fontweight='bold', color=COR_TEXTO,
+                bbox=dict(facecolor=COR_LEGENDA, alpha=0.9, edgecolor=s["cor_acima"], boxstyle='round,pad=0.4'))
+
+        for bar in bars:
+            pct = bar.get_width()
+            if pct <= 0: continue
+            diff = pct - s["media_pct"]
+            if diff > 0.1:
+                status, color_status = f"Acima (+{diff:.1f}%)", s["cor_acima"]
+            elif diff < -0.1:
+                status, color_status = f"Abaixo ({diff:.1f}%)", s["cor_abaixo"]
+            else:
+                status, color_status = "Na Média", COR_NEUTRA
+            ax.text(pct + (max_val * 0.03), bar.get_y() + bar.get_height() / 2, f"{pct:.1f}%  |  {status}",
+                    va='center', ha='left', fontweight='bold', color=color_status, fontsize=11)
+
+        configurar_eixo(ax, s["titulo"], grid_axis='x')
+
+    # ===== SEM DADOS =====
+    def _desenhar_vazio(self, s):
+        configurar_eixo(self.ax, s["titulo"], grid_axis=s["grade"])
+        if s["texto"]:
+            self.ax.text(0.5, 0.5, s["texto"], ha='center', fontsize=s["tamanho"])
+
+
+class PainelGraficos:
+    """
+    Figura com todos os gráficos numa grade (usada nas exportações). Cada atualização entrega as séries
+    e só mexe nos gráficos cuja série mudou; o tight_layout (caro) só roda se algum eixo foi refeito.
+    A figura não passa pelo pyplot, então não fica presa na lista global de figuras abertas.
+    """
+    def __init__(self, linhas, colunas, figsize):
+        self.fig = Figure(figsize=figsize, facecolor=COR_FUNDO)
+        FigureCanvasAgg(self.fig)
+        self.graficos = [GraficoEixo(ax) for ax in self.fig.subplots(linhas, colunas).flat]
+
+    def atualizar(self, series):
+        """Aplica as séries (na ordem da grade). Devolve True se algo mudou e a tela precisa redesenhar."""
+        mudancas = [grafico.atualizar(serie) for grafico, serie in zip(self.graficos, series)]
+        if "layout" in mudancas:
+            self.fig.tight_layout(pad=4.0, h_pad=5.0)
+        return any(mudancas)
+
+
+class RenderizadorGraficos:
+    """
+    Desenha um gráfico por vez numa figura própria (Agg, sem Tk) e devolve o PNG: roda nas threads de
+    trabalho. Cada posição do painel mantém sua figura e seu GraficoEixo, então um novo filtro com os
+    mesmos rótulos só troca os valores no lugar.
+    """
+    def __init__(self, tamanho=TAMANHO_GRAFICO):
+        self.tamanho = tamanho
+        self._figuras = {}  # posição -> (figura, canvas, GraficoEixo)
+        self._lock = threading.Lock()  # O matplotlib não é thread-safe: um desenho por vez
+
+    def renderizar(self, posicao, serie, dpi=DPI_BASE):
+        from PIL import Image
+
+        with self._lock:
+            if posicao not in self._figuras:
+                fig = Figure(figsize=self.tamanho, facecolor=COR_FUNDO)
+                self._figuras[posicao] = (fig, FigureCanvasAgg(fig), GraficoEixo(fig.subplots()))
+            fig, canvas, grafico = self._figuras[posicao]
+            fig.set_dpi(dpi)
+            if grafico.atualizar(serie) == "layout":
+                fig.tight_layout(pad=2.0)
+            canvas.draw()
+            imagem = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+        buffer = io.BytesIO()
+        imagem.save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
+
+
+class CacheGraficos:
+    """PNGs já desenhados por (ano, mês, posição) e DPI. Só valem se a série (os dados) for a mesma."""
+    def __init__(self, limite):
+        self.limite = limite
+        self._itens = OrderedDict()  # (chave, dpi) -> (serie, png)
+        self._lock = threading.Lock()
+
+    def obter(self, chave, serie, dpi):
+        with self._lock:
+            item = self._itens.get((chave, dpi))
+            if item is None or item[0] != serie:
+                return None
+            self._itens.move_to_end((chave, dpi))
+            return item[1]
+
+    def guardar(self, chave, serie, dpi, png):
+        with self._lock:
+            self._itens[(chave, dpi)] = (serie, png)
+            self._itens.move_to_end((chave, dpi))
+            while len(self._itens) > self.limite:
+                self._itens.popitem(last=False)
+
+
+# Únicos do programa: voltar ao Dashboard reaproveita as figuras e as imagens já prontas
+renderizador_graficos = RenderizadorGraficos()
+cache_graficos = CacheGraficos(DASHBOARD_GRAFICOS_EM_CACHE)
+
+
+def obter_png(chave, serie, dpi=DPI_BASE):
+    """PNG do gráfico, do cache ou desenhado agora (chave = (ano, mês, posição)). Para rodar fora da thread do Tk."""
+    png = cache_graficos.obter(chave, serie, dpi)
+    if png is None:
+        png = renderizador_graficos.renderizar(chave[-1], serie, dpi)
+        cache_graficos.guardar(chave, serie, dpi, png)
+    return png
@@ -1,15 +1,30 @@
 import pandas as pd
 import warnings
+from datetime import date
 from config.database import get_db_connection
+from src.shared.exportacao import ler_em_lotes
 
 # Ignora avisos internos do Pandas
 warnings.filterwarnings('ignore', category=UserWarning)
 
 class DashboardRepository:
-    def buscar_dados_os(self):
-        # Consulta SQL para buscar os dados de Ordens de Serviço, já com os campos necessários para o Dashboard
+    def horario_servidor(self):
+        # Relógio do banco: marca d'água das sincronizações (não depende do relógio de cada máquina)
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT now()")
+                    return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Erro ao consultar horário do servidor: {e}")
+            return None
+
+    def buscar_dados_os(self, desde_criacao=None, alteradas_desde=None):
+        # Consulta SQL para buscar os dados de Ordens de Serviço, já com os campos necessários para o Dashboard.
+        # Com 'desde_criacao' traz só as OS novas (e as concluídas depois de 'alteradas_desde').
         query = """
-            SELECT acao_realizada AS tipo_os, 
+            SELECT id,
+                   acao_realizada AS tipo_os, 
                    tipo_item, 
                    status_conclusao, 
                    bairro, 
@@ -19,18 +34,23 @@ class DashboardRepository:
             FROM sigp.ordens_servico
             WHERE data_criacao IS NOT NULL
         """
+        params = []
+        if desde_criacao is not None:
+            query += " AND (data_criacao >= %s OR data_conclusao >= %s)"
+            params.extend([desde_criacao, alteradas_desde or desde_criacao])
         try:
             with get_db_connection() as conn:
-                df = pd.read_sql(query, conn)
+                df = pd.read_sql(query, conn, params=params or None)
             return df
         except Exception as e:
             print(f"Erro ao buscar OS pro Dashboard: {e}")
             return pd.DataFrame()
 
-    def buscar_dados_pareceres(self):
+    def buscar_dados_pareceres(self, desde_criacao=None):
         # Consulta SQL para buscar os dados de Pareceres, já com os campos necessários para o Dashboard
         query = """
-            SELECT p.tipo_parecer AS tipo, 
+            SELECT p.id,
+                   p.tipo_parecer AS tipo, 
                    u.nome_completo AS criado_por, 
                    b.created_at AS data_dt, 
                    p.solicitante,
@@ -40,10 +60,165 @@ class DashboardRepository:
             LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
             WHERE b.created_at IS NOT NULL
         """
+        params = []
+        if desde_criacao is not None:
+            query += " AND b.created_at >= %s"
+            params.append(desde_criacao)
         try:
             with get_db_connection() as conn:
-                df = pd.read_sql(query, conn)
+                df = pd.read_sql(query, conn, params=params or None)
             return df
         except Exception as e:
             print(f"Erro ao buscar Pareceres pro Dashboard: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def contar_exclusoes_desde(self, momento):
+        # Quantas OS/Pareceres foram para a lixeira depois do momento informado, por módulo
+        query = """
+            SELECT modulo, COUNT(*)
+            FROM common.lixeira
+            WHERE data_exclusao >= %s
+            GROUP BY modulo
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (momento,))
+                    return dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Erro ao consultar exclusões pro Dashboard: {e}")
+            return None
+
+    def listar_ids(self, modulo):
+        # Só os IDs que ainda existem (para tirar do cache o que foi excluído)
+        tabela = "sigp.ordens_servico" if modulo == "OS_SIGP" else "sigp.pareceres"
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT id FROM {tabela}")
+                    return {linha[0] for linha in cursor.fetchall()}
+        except Exception as e:
+            print(f"Erro ao listar IDs pro Dashboard: {e}")
+            return None
+
+    # AGREGAÇÕES NO BANCO (GROUP BY NO POSTGRESQL, SÓ AS CONTAGENS VOLTAM PARA O PROGRAMA)
+    def _intervalo_periodo(self, ano, mes=None):
+        # Intervalo [inicio, fim) do período, comparável direto com a coluna (usa índice, sem EXTRACT)
+        if mes:
+            inicio = date(ano, mes, 1)
+            fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+        else:
+            inicio, fim = date(ano, 1, 1), date(ano + 1, 1, 1)
+        return inicio, fim
+
+    def _executar_contagens(self, query, params):
+        # Devolve {dimensao: [(valor, quantidade), ...]} já em ordem decrescente de quantidade
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                contagens = {}
+                for dimensao, valor, quantidade in cursor.fetchall():
+                    contagens.setdefault(dimensao, []).append((valor, quantidade))
+                return contagens
+
+    def buscar_contagens_os(self, ano, mes=None):
+        # Todas as contagens dos gráficos de OS numa única consulta (GROUPING SETS)
+        query = """
+            WITH base AS (
+                SELECT EXTRACT(MONTH FROM data_criacao)::int AS mes,
+                       UPPER(acao_realizada) AS tipo_os,
+                       UPPER(tipo_item) AS tipo_item,
+                       COALESCE(NULLIF(bairro, ''), 'Não Informado') AS bairro,
+                       responsavel AS criado_por,
+                       UPPER(TRIM(COALESCE(origem_demanda, 'SPU'))) AS origem,
+                       COALESCE(status_conclusao, 'NÃO') AS status
+                FROM sigp.ordens_servico
+                WHERE data_criacao >= %s AND data_criacao < %s
+            )
+            SELECT CASE
+                       WHEN GROUPING(mes) = 0 THEN 'mes'
+                       WHEN GROUPING(tipo_os) = 0 THEN 'tipo_os'
+                       WHEN GROUPING(tipo_item) = 0 THEN 'tipo_item'
+                       WHEN GROUPING(bairro) = 0 THEN 'bairro'
+                       WHEN GROUPING(criado_por) = 0 THEN 'criado_por'
+                       WHEN GROUPING(origem) = 0 THEN 'origem'
+                       WHEN GROUPING(status) = 0 THEN 'status'
+                       ELSE 'total'
+                   END AS dimensao,
+                   COALESCE(mes::text, tipo_os, tipo_item, bairro, criado_por, origem, status) AS valor,
+                   COUNT(*) AS quantidade
+            FROM base
+            GROUP BY GROUPING SETS ((mes), (tipo_os), (tipo_item), (bairro), (criado_por), (origem), (status), ())
+            ORDER BY dimensao, quantidade DESC, valor
+        """
+        try:
+            return self._executar_contagens(query, self._intervalo_periodo(ano, mes))
+        except Exception as e:
+            print(f"Erro ao agregar OS pro Dashboard: {e}")
+            return {}
+
+    def buscar_contagens_pareceres(self, ano, mes=None):
+        # Todas as contagens dos gráficos de Pareceres numa única consulta (GROUPING SETS)
+        query = """
+            WITH base AS (
+                SELECT EXTRACT(MONTH FROM b.created_at)::int AS mes,
+                       UPPER(TRIM(p.tipo_parecer)) AS tipo,
+                       COALESCE(NULLIF(p.solicitante, ''), 'Não Informado') AS solicitante,
+                       u.nome_completo AS criado_por,
+                       UPPER(TRIM(COALESCE(p.origem_demanda, 'SPU'))) AS origem
+                FROM sigp.pareceres p
+                JOIN common.pareceres_base b ON p.id = b.id
+                LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
+                WHERE b.created_at >= %s AND b.created_at < %s
+            )
+            SELECT CASE
+                       WHEN GROUPING(mes) = 0 THEN 'mes'
+                       WHEN GROUPING(tipo) = 0 THEN 'tipo'
+                       WHEN GROUPING(solicitante) = 0 THEN 'solicitante'
+                       WHEN GROUPING(criado_por) = 0 THEN 'criado_por'
+                       WHEN GROUPING(origem) = 0 THEN 'origem'
+                       ELSE 'total'
+                   END AS dimensao,
+                   COALESCE(mes::text, tipo, solicitante, criado_por, origem) AS valor,
+                   COUNT(*) AS quantidade
+            FROM base
+            GROUP BY GROUPING SETS ((mes), (tipo), (solicitante), (criado_por), (origem), ())
+            ORDER BY dimensao, quantidade DESC, valor
+        """
+        try:
+            return self._executar_contagens(query, self._intervalo_periodo(ano, mes))
+        except Exception as e:
+            print(f"Erro ao agregar Pareceres pro Dashboard: {e}")
+            return {}
+
+    # DADOS BRUTOS PARA EXPORTAÇÃO (LIDOS EM LOTES, SEM PASSAR POR DATAFRAME)
+    def iterar_dados_os(self, ano, mes=None):
+        # Mesmas colunas e mesma limpeza da origem que as abas de dados brutos tinham (sem o id)
+        query = """
+            SELECT acao_realizada AS tipo_os, 
+                   tipo_item, 
+                   status_conclusao, 
+                   bairro, 
+                   to_char(data_criacao, 'DD/MM/YYYY') AS data_dt, 
+                   responsavel AS criado_por,
+                   UPPER(TRIM(COALESCE(origem_demanda, 'SPU'))) AS origem
+            FROM sigp.ordens_servico
+            WHERE data_criacao >= %s AND data_criacao < %s
+            ORDER BY data_criacao, id
+        """
+        return ler_em_lotes(query, self._intervalo_periodo(ano, mes))
+
+    def iterar_dados_pareceres(self, ano, mes=None):
+        query = """
+            SELECT p.tipo_parecer AS tipo, 
+                   u.nome_completo AS criado_por, 
+                   to_char(b.created_at, 'DD/MM/YYYY') AS data_dt, 
+                   p.solicitante,
+                   UPPER(TRIM(COALESCE(p.origem_demanda, 'SPU'))) AS origem
+            FROM sigp.pareceres p
+            JOIN common.pareceres_base b ON p.id = b.id
+            LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
+            WHERE b.created_at >= %s AND b.created_at < %s
+            ORDER BY b.created_at, p.id
+        """
+        return ler_em_lotes(query, self._intervalo_periodo(ano, mes))
@@ -1,64 +1,137 @@
+import time
+import threading
 import pandas as pd
 import unicodedata
 from datetime import datetime
 from src.dashboard.repository import DashboardRepository
+from config.settings import DASHBOARD_RECARGA_TOTAL_MIN
 
 class DashboardService:
     def __init__(self):
         self.repo = DashboardRepository()
 
+        # Cache local dos dados brutos (atualizado de forma incremental)
+        self._cache_os = pd.DataFrame()
+        self._cache_par = pd.DataFrame()
+        self._ultima_sincronizacao = None  # Horário do servidor na última sincronização
+        self._ultima_carga_total = None    # time.monotonic() da última carga completa
+        self._lock_cache = threading.Lock()
+
     def normalizar(self, texto: str) -> str:
         """Remove acentos e deixa caixa alta para agrupamento na tabela."""
         if not texto or not isinstance(texto, str): return ""
         nfkd = unicodedata.normalize("NFKD", texto)
         return "".join(c for c in nfkd if not unicodedata.combining(c)).upper().strip()
 
-    def carregar_dados_brutos(self):
-        df_os = self.repo.buscar_dados_os()
-        df_par = self.repo.buscar_dados_pareceres()
-
+    def _preparar(self, df):
         # Força conversão para o tipo Data e Limpa a Origem
-        if not df_os.empty:
-            df_os['data_dt'] = pd.to_datetime(df_os['data_dt'], errors='coerce')
-            if 'origem' in df_os.columns:
-                df_os['origem'] = df_os['origem'].fillna('SPU').astype(str).str.upper().str.strip()
-                
-        if not df_par.empty:
-            df_par['data_dt'] = pd.to_datetime(df_par['data_dt'], errors='coerce')
-            if 'origem' in df_par.columns:
-                df_par['origem'] = df_par['origem'].fillna('SPU').astype(str).str.upper().str.strip()
-
-        return df_os, df_par
+        if not df.empty:
+            df['data_dt'] = pd.to_datetime(df['data_dt'], errors='coerce')
+            if 'origem' in df.columns:
+                df['origem'] = df['origem'].fillna('SPU').astype(str).str.upper().str.strip()
+        return df
+
+    def _mesclar(self, df_cache, df_novos):
+        # Linhas que vieram de novo substituem a versão antiga do cache (mesmo id)
+        if df_novos.empty: return df_cache
+        if df_cache.empty: return df_novos
+        mantidas = df_cache[~df_cache['id'].isin(df_novos['id'])]
+        return pd.concat([mantidas, df_novos], ignore_index=True)
+
+    def _marca_dagua(self, df):
+        # Maior data de criação já presente no cache (a busca seguinte começa por ela)
+        if df.empty: return None
+        maior = df['data_dt'].max()
+        return None if pd.isna(maior) else maior.to_pydatetime()
+
+    def carregar_dados_brutos(self, forcar_recarga=False):
+        """
+        Devolve (df_os, df_par) a partir do cache local. Só busca no banco as linhas criadas
+        (ou concluídas) desde a última sincronização e tira do cache o que foi para a lixeira.
+        A cada DASHBOARD_RECARGA_TOTAL_MIN minutos recarrega tudo para pegar edições avulsas.
+        """
+        with self._lock_cache:
+            inicio_sinc = self.repo.horario_servidor()
+            recarga_total = (
+                forcar_recarga
+                or inicio_sinc is None
+                or self._ultima_sincronizacao is None
+                or time.monotonic() - self._ultima_carga_total > DASHBOARD_RECARGA_TOTAL_MIN * 60
+            )
+
+            if recarga_total:
+                df_os = self._preparar(self.repo.buscar_dados_os())
+                df_par = self._preparar(self.repo.buscar_dados_pareceres())
+                self._ultima_carga_total = time.monotonic()
+            else:
+                marca_os = self._marca_dagua(self._cache_os)
+                marca_par = self._marca_dagua(self._cache_par)
+
+                # Sem marca d'água (cache vazio) a busca já vem completa
+                novos_os = self._preparar(self.repo.buscar_dados_os(marca_os.date() if marca_os else None, self._ultima_sincronizacao))
+                novos_par = self._preparar(self.repo.buscar_dados_pareceres(marca_par))
+                df_os = self._mesclar(self._cache_os, novos_os) if marca_os else novos_os
+                df_par = self._mesclar(self._cache_par, novos_par) if marca_par else novos_par
+
+                # Exclusões: a lixeira diz SE houve, a lista de IDs diz QUAIS
+                exclusoes = self.repo.contar_exclusoes_desde(self._ultima_sincronizacao)
+                if exclusoes is None:
+                    exclusoes = {"OS_SIGP": 1, "PARECER_SIGP": 1}
+                if exclusoes.get("OS_SIGP") and not df_os.empty:
+                    ids_vivos = self.repo.listar_ids("OS_SIGP")
+                    if ids_vivos is not None: df_os = df_os[df_os['id'].isin(ids_vivos)]
+                if exclusoes.get("PARECER_SIGP") and not df_par.empty:
+                    ids_vivos = self.repo.listar_ids("PARECER_SIGP")
+                    if ids_vivos is not None: df_par = df_par[df_par['id'].isin(ids_vivos)]
+
+            self._cache_os, self._cache_par = df_os, df_par
+            self._ultima_sincronizacao = inicio_sinc
+            return df_os, df_par
 
     def filtrar_dados(self, df_os, df_par, ano_sel, mes_sel=None):
-        df_os_f = df_os.copy()
-        df_par_f = df_par.copy()
-
-        # Filtro Ano
-        if not df_os_f.empty:
-            df_os_f = df_os_f[df_os_f['data_dt'].dt.year == ano_sel]
-        if not df_par_f.empty:
-            df_par_f = df_par_f[df_par_f['data_dt'].dt.year == ano_sel]
-
-        # Filtro Mês
-        if mes_sel:
-            if not df_os_f.empty:
-                df_os_f = df_os_f[df_os_f['data_dt'].dt.month == mes_sel]
-            if not df_par_f.empty:
-                df_par_f = df_par_f[df_par_f['data_dt'].dt.month == mes_sel]
-
-        return df_os_f, df_par_f
-
-    def calcular_kpis(self, df_os_f, df_par_f):
-        # Quantidade de OS e Pareceres no período
-        count_os = len(df_os_f)
-        count_par = len(df_par_f)
-        
-        if not df_par_f.empty:
-            count_def = len(df_par_f[df_par_f['tipo'].astype(str).str.strip().str.upper() == 'DEFERIDO'])
-            count_indef = len(df_par_f[df_par_f['tipo'].astype(str).str.strip().str.upper() == 'INDEFERIDO'])
-        else:
-            count_def = 0
-            count_indef = 0
+        # Uma única máscara por tabela (sem copiar o DataFrame inteiro antes de filtrar)
+        def filtrar(df):
+            if df.empty: return df
+            mascara = df['data_dt'].dt.year == ano_sel
+            if mes_sel:
+                mascara &= df['data_dt'].dt.month == mes_sel
+            return df[mascara]
+
+        return filtrar(df_os), filtrar(df_par)
+
+    def carregar_agregados(self, ano_sel, mes_sel=None):
+        """
+        Contagens prontas dos gráficos, calculadas no PostgreSQL (GROUP BY) para o período.
+        Devolve (agregados_os, agregados_par): dicionários {dimensao: pd.Series} em ordem
+        decrescente (como o value_counts), mais a chave 'total' com a quantidade de linhas.
+        """
+        def montar(contagens, dimensoes):
+            agregados = {}
+            for dimensao in dimensoes:
+                pares = [(valor, qtd) for valor, qtd in contagens.get(dimensao, []) if valor is not None]
+                indice = [int(v) if dimensao == 'mes' else v for v, _ in pares]
+                agregados[dimensao] = pd.Series([q for _, q in pares], index=indice, dtype=int)
+            total = contagens.get('total', [])
+            agregados['total'] = int(total[0][1]) if total else 0
+            return agregados
+
+        ag_os = montar(self.repo.buscar_contagens_os(ano_sel, mes_sel), ['mes', 'tipo_os', 'tipo_item', 'bairro', 'criado_por', 'origem', 'status'])
+        ag_par = montar(self.repo.buscar_contagens_pareceres(ano_sel, mes_sel), ['mes', 'tipo', 'solicitante', 'criado_por', 'origem'])
+        return ag_os, ag_par
+
+    # Colunas das abas de dados brutos da exportação (na ordem do SELECT de cada consulta)
+    COLUNAS_BRUTAS_OS = ['tipo_os', 'tipo_item', 'status_conclusao', 'bairro', 'data_dt', 'criado_por', 'origem']
+    COLUNAS_BRUTAS_PAR = ['tipo', 'criado_por', 'data_dt', 'solicitante', 'origem']
+
+    def iterar_dados_brutos(self, ano_sel, mes_sel=None):
+        """(linhas de OS, linhas de Pareceres) do período, lidas do banco em lotes (para exportações grandes)."""
+        return self.repo.iterar_dados_os(ano_sel, mes_sel), self.repo.iterar_dados_pareceres(ano_sel, mes_sel)
+
+    def calcular_kpis(self, ag_os, ag_par):
+        # Quantidade de OS e Pareceres no período (a partir das contagens do banco)
+        count_os = ag_os['total']
+        count_par = ag_par['total']
+        count_def = int(ag_par['tipo'].get('DEFERIDO', 0))
+        count_indef = int(ag_par['tipo'].get('INDEFERIDO', 0))
             
         return count_os, count_par, count_def, count_indef
\ No newline at end of file
@@ -1,14 +1,14 @@
 import customtkinter as ctk
 import pandas as pd
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.backends.backend_pdf import PdfPages
-from matplotlib.ticker import MaxNLocator
-import textwrap
 import io
+from PIL import Image
 from datetime import datetime
 from tkinter import filedialog, messagebox
 from src.dashboard.service import DashboardService
+from src.dashboard.graficos import PainelGraficos, cache_graficos, obter_png, TAMANHO_GRAFICO, DPI_BASE
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import IndicadorCarregamento
 
 # --- Paleta de Cores Institucional ---
 COLOR_BG = "#F4F6F9"          
@@ -18,6 +18,16 @@ COLOR_SECONDARY = "#F24822"   # Laranja/Vermelho
 COLOR_TEXT = "#333333"
 COLOR_WARNING = "#F29C1F"     # Amarelo (Apenas para exceções)
 
+# --- Linhas e Colunas da Tabela Resumo ---
+ITENS_PAINEL = [
+    "IMPLANTAÇÃO PLACA/POSTE", "IMPLANTAÇÃO PLACA/BARROTE", "IMPLANTAÇÃO ABRIGO METÁLICO", "IMPLANTAÇÃO PARADA SEGURA",
+    "TRANSFERÊNCIA PLACA/POSTE", "TRANSFERÊNCIA PLACA/BARROTE", "TRANSFERÊNCIA ABRIGO METÁLICO", "TRANSFERÊNCIA PARADA SEGURA",
+    "REMOÇÃO PLACA/POSTE", "REMOÇÃO PLACA/BARROTE", "REMOÇÃO ABRIGO CONCRETO", "REMOÇÃO ABRIGO METÁLICO", "REMOÇÃO PARADA SEGURA",
+    "SUBSTITUIÇÃO PLACA/POSTE", "SUBSTITUIÇÃO PLACA/BARROTE", "SUBSTITUIÇÃO ABRIGO CONCRETO", "SUBSTITUIÇÃO ABRIGO METÁLICO",
+    "MANUTENÇÃO PLACA/POSTE", "MANUTENÇÃO PLACA/BARROTE", "MANUTENÇÃO ABRIGO METÁLICO", "MANUTENÇÃO PARADA SEGURA",
+]
+MESES_RESUMO = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
 
 class DashboardView(ctk.CTkFrame):
     def __init__(self, master, usuario_logado):
@@ -25,12 +35,18 @@ class DashboardView(ctk.CTkFrame):
         self.pack(fill="both", expand=True)
 
         self.service = DashboardService()
+        self.executor = obter_executor(self)
         self.df_os_raw = pd.DataFrame()
         self.df_par_raw = pd.DataFrame()
         
         self.df_os_f = pd.DataFrame()
         self.df_par_f = pd.DataFrame()
-        self.fig = None 
+        self.df_resumo = None        # Tabela Resumo do filtro atual (tela, PDF e Excel usam a mesma)
+        self.periodo_atual = None    # (ano, mês) do filtro aplicado na tela (as exportações usam o mesmo)
+        self._pesos_resumo = None
+        self.series_graficos = None  # Séries dos 14 gráficos do filtro atual (ver _series_graficos)
+        self.blocos_graficos = []    # Um por gráfico: {"cartao", "imagem", "chave", "serie", "pedido", "pronto"}
+        self._verificacao_agendada = False
 
         self._construir_interface()
         self.atualizar_completo()
@@ -41,6 +57,8 @@ class DashboardView(ctk.CTkFrame):
         frame_filtros.pack_propagate(False)
 
         ctk.CTkLabel(frame_filtros, text="Painel Analítico Gerencial", font=("Arial Black", 22), text_color=COLOR_PRIMARY).pack(side="left", padx=20, pady=20)
+        self.indicador = IndicadorCarregamento(frame_filtros, texto="⏳ Atualizando...")
+        self.indicador.pack(side="left", padx=10)
         
         # Botões de Ação (Exportar PDF, Exportar Excel, Atualizar)
         self.btn_pdf = ctk.CTkButton(frame_filtros, text="📄 PDF", font=("Arial Bold", 13), fg_color=COLOR_SECONDARY, hover_color="#D33F1D", width=70, height=35, command=self.exportar_pdf)
@@ -75,164 +93,204 @@ class DashboardView(ctk.CTkFrame):
         self.frame_graficos = ctk.CTkFrame(self.scroll_area, fg_color="transparent")
         self.frame_graficos.pack(fill="both", expand=True, pady=10)
 
+        # Um cartão por gráfico, já no tamanho final (a rolagem não pula quando a imagem chega)
+        self.frame_graficos.columnconfigure((0, 1), weight=1)
+        self._tamanho_grafico = tuple(int(t * DPI_BASE) for t in TAMANHO_GRAFICO)
+        # Fundo branco enquanto o gráfico não chega (o CTkLabel não limpa a imagem com image=None)
+        self._imagem_vazia = ctk.CTkImage(light_image=Image.new("RGB", (1, 1), COLOR_WHITE), size=self._tamanho_grafico)
+        for posicao in range(14):
+            cartao = ctk.CTkFrame(self.frame_graficos, fg_color=COLOR_WHITE, corner_radius=8, border_width=1, border_color="#E0E0E0")
+            cartao.grid(row=posicao // 2, column=posicao % 2, padx=8, pady=8, sticky="n")
+            imagem = ctk.CTkLabel(cartao, text="", image=self._imagem_vazia, compound="center", font=("Arial", 14), text_color="#999999")
+            imagem.pack(padx=4, pady=4)
+            self.blocos_graficos.append({"cartao": cartao, "imagem": imagem, "chave": None, "serie": None, "pedido": False, "pronto": False})
+
+        # Toda mudança na rolagem passa pelo yscrollcommand do canvas interno: é a deixa para desenhar o que apareceu
+        canvas_rolagem, barra = self.scroll_area._parent_canvas, self.scroll_area._scrollbar
+        canvas_rolagem.configure(yscrollcommand=lambda inicio, fim: (barra.set(inicio, fim), self._agendar_graficos_visiveis()))
+
     # INTELIGÊNCIA DE EXPORTAÇÃO
-    def _gerar_dataframe_resumo(self):
-        itens_painel = [
-            "IMPLANTAÇÃO PLACA/POSTE", "IMPLANTAÇÃO PLACA/BARROTE", "IMPLANTAÇÃO ABRIGO METÁLICO", "IMPLANTAÇÃO PARADA SEGURA",
-            "TRANSFERÊNCIA PLACA/POSTE", "TRANSFERÊNCIA PLACA/BARROTE", "TRANSFERÊNCIA ABRIGO METÁLICO", "TRANSFERÊNCIA PARADA SEGURA",
-            "REMOÇÃO PLACA/POSTE", "REMOÇÃO PLACA/BARROTE", "REMOÇÃO ABRIGO CONCRETO", "REMOÇÃO ABRIGO METÁLICO", "REMOÇÃO PARADA SEGURA",
-            "SUBSTITUIÇÃO PLACA/POSTE", "SUBSTITUIÇÃO PLACA/BARROTE", "SUBSTITUIÇÃO ABRIGO CONCRETO", "SUBSTITUIÇÃO ABRIGO METÁLICO",
-            "MANUTENÇÃO PLACA/POSTE", "MANUTENÇÃO PLACA/BARROTE", "MANUTENÇÃO ABRIGO METÁLICO", "MANUTENÇÃO PARADA SEGURA",
-        ]
-        meses_pt = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
-        
-        dados_tabela = []
-        for item in itens_painel:
-            linha = {"OPERAÇÃO / PONTO DE PARADA": item}
-            for mes in meses_pt: linha[mes] = 0
-            linha["TOTAL"] = 0
-            dados_tabela.append(linha)
-            
-        df_resumo = pd.DataFrame(dados_tabela)
-
-        if not self.df_os_f.empty:
-            for _, row in self.df_os_f.iterrows():
-                try: 
-                    mes_idx = row['data_dt'].month - 1
-                    mes_nome = meses_pt[mes_idx]
-                    chave_raw = f"{self.service.normalizar(row['tipo_os'])} {self.service.normalizar(row['tipo_item'])}"
-                    
-                    idx_list = []
-                    if chave_raw == "REMOCAO ABRIGO CONCRETO/METALICO":
-                        idx_list = [df_resumo[df_resumo['OPERAÇÃO / PONTO DE PARADA'] == "REMOÇÃO ABRIGO CONCRETO"].index[0], df_resumo[df_resumo['OPERAÇÃO / PONTO DE PARADA'] == "REMOÇÃO ABRIGO METÁLICO"].index[0]]
-                    elif chave_raw == "SUBSTITUICAO ABRIGO CONCRETO/METALICO":
-                        idx_list = [df_resumo[df_resumo['OPERAÇÃO / PONTO DE PARADA'] == "SUBSTITUIÇÃO ABRIGO CONCRETO"].index[0], df_resumo[df_resumo['OPERAÇÃO / PONTO DE PARADA'] == "SUBSTITUIÇÃO ABRIGO METÁLICO"].index[0]]
-                    else:
-                        match = df_resumo[df_resumo['OPERAÇÃO / PONTO DE PARADA'].apply(self.service.normalizar) == chave_raw]
-                        if not match.empty: idx_list = [match.index[0]]
-
-                    for i in idx_list:
-                        df_resumo.at[i, mes_nome] += 1 if len(idx_list)==1 else 0.5
-                        df_resumo.at[i, "TOTAL"] += 1 if len(idx_list)==1 else 0.5
-                except: pass
-        
+    def _gerar_dataframe_resumo(self, df_os_f=None):
+        """
+        Tabela Resumo (Operação x Mês). Feita de uma vez com um crosstab ponderado: cada OS
+        vira uma chave normalizada, a chave aponta para a(s) linha(s) do painel e o peso
+        (1 ou 0.5 para CONCRETO/METALICO, que conta meio para cada abrigo) é somado por mês.
+        """
+        if df_os_f is None:
+            df_os_f = self.df_os_f
+        df_resumo = pd.DataFrame(0, index=range(len(ITENS_PAINEL)), columns=MESES_RESUMO + ["TOTAL"])
+
+        if not df_os_f.empty:
+            normalizar = self.service.normalizar
+            # Normaliza só os valores distintos (poucos) e espalha pelo resto com map
+            tipo_os = df_os_f['tipo_os'].map({v: normalizar(v) for v in df_os_f['tipo_os'].unique()})
+            tipo_item = df_os_f['tipo_item'].map({v: normalizar(v) for v in df_os_f['tipo_item'].unique()})
+            base = pd.DataFrame({"chave": tipo_os + " " + tipo_item, "mes": df_os_f['data_dt'].dt.month}).dropna()
+
+            cruzado = base.merge(self._tabela_pesos_resumo(), on="chave")
+            if not cruzado.empty:
+                contagem = pd.crosstab(cruzado['linha'], cruzado['mes'], values=cruzado['peso'], aggfunc='sum')
+                contagem = contagem.reindex(index=df_resumo.index, columns=range(1, 13)).fillna(0)
+                contagem.columns = MESES_RESUMO
+                df_resumo[MESES_RESUMO] = contagem
+                df_resumo["TOTAL"] = contagem.sum(axis=1)
+
+        # Sem nenhum meio ponto, mostra inteiros (como antes)
+        if (df_resumo % 1 == 0).all().all():
+            df_resumo = df_resumo.astype(int)
+
+        df_resumo.insert(0, "OPERAÇÃO / PONTO DE PARADA", ITENS_PAINEL)
         total_row = {"OPERAÇÃO / PONTO DE PARADA": "TOTAL GERAL"}
-        for col in meses_pt + ["TOTAL"]:
+        for col in MESES_RESUMO + ["TOTAL"]:
             total_row[col] = df_resumo[col].sum()
         df_resumo.loc[len(df_resumo)] = total_row
 
         return df_resumo
 
+    def _tabela_pesos_resumo(self):
+        # Chave normalizada (AÇÃO ITEM) -> linha do painel e peso. Montada uma vez só.
+        if self._pesos_resumo is None:
+            linha_por_chave = {self.service.normalizar(item): i for i, item in enumerate(ITENS_PAINEL)}
+            pesos = [(chave, linha, 1.0) for chave, linha in linha_por_chave.items()]
+            for acao in ("REMOCAO", "SUBSTITUICAO"):
+                chave_dupla = f"{acao} ABRIGO CONCRETO/METALICO"
+                pesos.append((chave_dupla, linha_por_chave[f"{acao} ABRIGO CONCRETO"], 0.5))
+                pesos.append((chave_dupla, linha_por_chave[f"{acao} ABRIGO METALICO"], 0.5))
+            self._pesos_resumo = pd.DataFrame(pesos, columns=["chave", "linha", "peso"])
+        return self._pesos_resumo
+
+    def _obter_resumo(self):
+        if self.df_resumo is None:
+            self.df_resumo = self._gerar_dataframe_resumo()
+        return self.df_resumo
+
+    def _figura_completa(self):
+        # Exportações: os 14 gráficos na figura 14x40 (7x2), montada só na hora de exportar
+        painel = PainelGraficos(7, 2, figsize=(14, 40))
+        painel.atualizar(self.series_graficos)
+        return painel.fig
+
     def exportar_pdf(self):
-        if self.fig is None:
+        if self.series_graficos is None:
             messagebox.showwarning("Aviso", "Não há gráficos para exportar.")
             return
 
         filepath = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("Arquivo PDF", "*.pdf")], title="Salvar Relatório em PDF")
         if filepath:
             try:
-                df_resumo = self._gerar_dataframe_resumo()
+                from matplotlib.backends.backend_pdf import PdfPages  # Import adiado (só na exportação)
+
+                df_resumo = self._obter_resumo()
                 
                 fig_table, ax_table = plt.subplots(figsize=(16, 9), facecolor='#FFFFFF')
-                fig_table.patch.set_facecolor('#FFFFFF')
-                ax_table.axis('off')
+                try:
+                    fig_table.patch.set_facecolor('#FFFFFF')
+                    ax_table.axis('off')
                 
-                fig_table.suptitle("Resumo Consolidado de Intervenções (OS)", fontsize=22, fontweight='bold', color="#333333", y=0.92)
+                    fig_table.suptitle("Resumo Consolidado de Intervenções (OS)", fontsize=22, fontweight='bold', color="#333333", y=0.92)
                 
-                cell_text = []
-                for row in df_resumo.values:
-                    formatted_row = [row[0]] + [str(int(x)) if x == int(x) else str(x) for x in row[1:]]
-                    cell_text.append(formatted_row)
-
-                table = ax_table.table(cellText=cell_text, colLabels=df_resumo.columns, cellLoc='center', loc='center')
-                table.auto_set_font_size(False)
-                table.set_fontsize(11) 
-                table.scale(1, 1.8) 
+                    cell_text = []
+                    for row in df_resumo.values:
+                        formatted_row = [row[0]] + [str(int(x)) if x == int(x) else str(x) for x in row[1:]]
+                        cell_text.append(formatted_row)
+
+                    table = ax_table.table(cellText=cell_text, colLabels=df_resumo.columns, cellLoc='center', loc='center')
+                    table.auto_set_font_size(False)
+                    table.set_fontsize(11) 
+                    table.scale(1, 1.8) 
                 
-                for (row, col), cell in table.get_celld().items():
-                    if row == 0: 
-                        cell.set_text_props(weight='bold', color='white')
-                        cell.set_facecolor(COLOR_PRIMARY) 
-                    elif row == len(df_resumo): 
-                        cell.set_text_props(weight='bold')
-                        cell.set_facecolor('#E0E4E8')
+                    for (row, col), cell in table.get_celld().items():
+                        if row == 0: 
+                            cell.set_text_props(weight='bold', color='white')
+                            cell.set_facecolor(COLOR_PRIMARY) 
+                        elif row == len(df_resumo): 
+                            cell.set_text_props(weight='bold')
+                            cell.set_facecolor('#E0E4E8')
                     
-                    if col == 0: 
-                        cell._loc = 'left' 
-                        cell.set_width(0.38) 
-                    else:
-                        cell.set_width(0.045) 
+                        if col == 0: 
+                            cell._loc = 'left' 
+                            cell.set_width(0.38) 
+                        else:
+                            cell.set_width(0.045) 
 
-                fig_table.tight_layout(rect=[0.05, 0.05, 0.98, 0.88])
+                    fig_table.tight_layout(rect=[0.05, 0.05, 0.98, 0.88])
 
-                with PdfPages(filepath) as pdf:
-                    pdf.savefig(fig_table, bbox_inches='tight', pad_inches=0.3) 
-                    pdf.savefig(self.fig, bbox_inches='tight', pad_inches=0.3)  
+                    with PdfPages(filepath) as pdf:
+                        pdf.savefig(fig_table, bbox_inches='tight', pad_inches=0.3) 
+                        pdf.savefig(self._figura_completa(), bbox_inches='tight', pad_inches=0.3)
                     
-                plt.close(fig_table)
+                finally:
+                    plt.close(fig_table)  # Figura temporária: fechada mesmo se a gravação falhar
                 messagebox.showinfo("Sucesso", "Relatório Executivo PDF gerado com sucesso!\n\nPágina 1: Tabela Resumo\nPágina 2: Gráficos Analíticos")
             except Exception as e:
                 messagebox.showerror("Erro", f"Falha ao salvar PDF:\n{e}")
 
     def exportar_excel(self):
+        if self.periodo_atual is None:
+            messagebox.showwarning("Aviso", "Carregue o painel primeiro: ainda não há dados para exportar.")
+            return
+
         filepath = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Planilha Excel", "*.xlsx")], title="Salvar Relatório em Excel")
         if not filepath: return
 
+        # A planilha é montada fora da thread do Tk; a tela recebe só o aviso de fim
+        graficos = [(bloco["chave"], bloco["serie"]) for bloco in self.blocos_graficos] if self.series_graficos is not None else []
+        self.btn_excel.configure(state="disabled")
+        self.executor.executar("dashboard-excel", self._gerar_excel, filepath, self._obter_resumo(), self.periodo_atual, graficos, self._dpi_graficos(),
+                               ao_concluir=self._ao_concluir_excel, ao_falhar=self._ao_falhar_excel, indicador=self.indicador)
+
+    def _ao_concluir_excel(self, _):
+        self.btn_excel.configure(state="normal")
+        messagebox.showinfo("Sucesso", "Planilha Excel Gerada e Formatada com Sucesso!")
+
+    def _ao_falhar_excel(self, erro):
+        self.btn_excel.configure(state="normal")
+        messagebox.showerror("Erro de Exportação", f"Erro ao gerar o arquivo Excel:\n{erro}")
+
+    def _gerar_excel(self, filepath, df_resumo, periodo, graficos, dpi):
+        # Roda na thread de trabalho: não toca em widgets nem em atributos que a tela troca.
+        # Planilha em constant_memory: cada aba é escrita linha a linha, em ordem, direto para o disco
+        from src.shared.exportacao import abrir_planilha, escrever_aba
+
+        workbook = abrir_planilha(filepath)
         try:
-            df_resumo = self._gerar_dataframe_resumo()
+            worksheet = workbook.add_worksheet('Resumo_Produção')
             
-            with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
-                workbook = writer.book
-                
-                df_resumo.to_excel(writer, sheet_name='Resumo_Produção', index=False)
-                worksheet = writer.sheets['Resumo_Produção']
-                
-                header_format = workbook.add_format({'bold': True, 'bg_color': COLOR_PRIMARY, 'font_color': 'white', 'border': 1, 'align': 'center', 'valign': 'vcenter'})
-                cell_format = workbook.add_format({'border': 1, 'align': 'center'})
-                first_col_format = workbook.add_format({'border': 1, 'align': 'left'})
-                total_format = workbook.add_format({'bold': True, 'bg_color': '#E0E4E8', 'border': 1, 'align': 'center'})
-                total_first_col = workbook.add_format({'bold': True, 'bg_color': '#E0E4E8', 'border': 1, 'align': 'left'})
-                
-                for col_num, value in enumerate(df_resumo.columns.values):
-                    worksheet.write(0, col_num, value, header_format)
-                
-                worksheet.set_column('A:A', 38, first_col_format) 
-                worksheet.set_column('B:N', 9, cell_format)       
-                
-                last_row_idx = len(df_resumo)
-                worksheet.write(last_row_idx, 0, df_resumo.iloc[-1, 0], total_first_col)
-                for col_num in range(1, len(df_resumo.columns)):
-                    worksheet.write(last_row_idx, col_num, df_resumo.iloc[-1, col_num], total_format)
-                
-                if not self.df_os_f.empty:
-                    df_os_export = self.df_os_f.copy()
-                    df_os_export['data_dt'] = df_os_export['data_dt'].dt.strftime('%d/%m/%Y')
-                    df_os_export.to_excel(writer, sheet_name='Dados_Brutos_OS', index=False)
-                
-                if not self.df_par_f.empty:
-                    df_par_export = self.df_par_f.copy()
-                    df_par_export['data_dt'] = df_par_export['data_dt'].dt.strftime('%d/%m/%Y')
-                    df_par_export.to_excel(writer, sheet_name='Dados_Brutos_Parecer', index=False)
-                
-                if self.fig is not None:
-                    ws_graficos = workbook.add_worksheet('Gráficos_Individuais')
-                    renderer = self.fig.canvas.get_renderer()
-                    linha_atual = 1
-                    
-                    for i, ax in enumerate(self.fig.axes):
-                        if ax.has_data() or len(ax.patches) > 0 or len(ax.lines) > 0:
-                            bbox = ax.get_tightbbox(renderer).transformed(self.fig.dpi_scale_trans.inverted())
-                            img_io = io.BytesIO()
-                            self.fig.savefig(img_io, format='png', bbox_inches=bbox, dpi=120) 
-                            img_io.seek(0)
-                            
-                            coluna = 'A' if i % 2 == 0 else 'I'
-                            ws_graficos.insert_image(f'{coluna}{linha_atual}', 'grafico.png', {'image_data': img_io})
-                            if i % 2 != 0: linha_atual += 22 
-
-            messagebox.showinfo("Sucesso", "Planilha Excel Gerada e Formatada com Sucesso!")
-        except Exception as e:
-            messagebox.showerror("Erro de Exportação", f"Erro ao gerar o arquivo Excel:\n{e}")
+            header_format = workbook.add_format({'bold': True, 'bg_color': COLOR_PRIMARY, 'font_color': 'white', 'border': 1, 'align': 'center', 'valign': 'vcenter'})
+            cell_format = workbook.add_format({'border': 1, 'align': 'center'})
+            first_col_format = workbook.add_format({'border': 1, 'align': 'left'})
+            total_format = workbook.add_format({'bold': True, 'bg_color': '#E0E4E8', 'border': 1, 'align': 'center'})
+            total_first_col = workbook.add_format({'bold': True, 'bg_color': '#E0E4E8', 'border': 1, 'align': 'left'})
+            
+            worksheet.set_column('A:A', 38, first_col_format) 
+            worksheet.set_column('B:N', 9, cell_format)       
+            worksheet.write_row(0, 0, list(df_resumo.columns), header_format)
+            
+            linhas_resumo = df_resumo.values.tolist()
+            for row_idx, linha in enumerate(linhas_resumo[:-1], start=1):
+                worksheet.write_row(row_idx, 0, linha)
+            last_row_idx = len(linhas_resumo)
+            worksheet.write(last_row_idx, 0, linhas_resumo[-1][0], total_first_col)
+            worksheet.write_row(last_row_idx, 1, linhas_resumo[-1][1:], total_format)
+            
+            # Dados brutos direto do banco, em lotes (qualquer período, sem copiar DataFrames)
+            linhas_os, linhas_par = self.service.iterar_dados_brutos(*periodo)
+            escrever_aba(workbook, 'Dados_Brutos_OS', [(c, None) for c in self.service.COLUNAS_BRUTAS_OS], linhas_os, criar_vazia=False)
+            escrever_aba(workbook, 'Dados_Brutos_Parecer', [(c, None) for c in self.service.COLUNAS_BRUTAS_PAR], linhas_par, criar_vazia=False)
+            
+            if graficos:
+                # Cada gráfico é a mesma imagem da tela (do cache, ou desenhada sozinha): nada de renderizar a figura inteira por gráfico
+                ws_graficos = workbook.add_worksheet('Gráficos_Individuais')
+                escala = DPI_BASE / dpi  # Mesmo tamanho na planilha em qualquer escala do Windows
+                linha_atual = 0
+                for posicao, (chave, serie) in enumerate(graficos):
+                    if serie["tipo"] != "vazio":
+                        png = io.BytesIO(obter_png(chave, serie, dpi))
+                        coluna = 0 if posicao % 2 == 0 else 11
+                        ws_graficos.insert_image(linha_atual, coluna, 'grafico.png', {'image_data': png, 'x_scale': escala, 'y_scale': escala})
+                    if posicao % 2 != 0: linha_atual += 30
+        finally:
+            workbook.close()
 
     # RENDERIZAÇÃO DE COMPONENTES UI
     def criar_card(self, parent, titulo, valor, cor_destaque, icone):
@@ -248,11 +306,10 @@ class DashboardView(ctk.CTkFrame):
         ctk.CTkLabel(linha_valor, text=icone, font=("Arial", 28)).pack(side="right", pady=(5,0))
         return card
 
-    def _desenhar_tabela(self, df_os):
+    def _desenhar_tabela(self, df_resumo):
         for w in self.frame_tabela.winfo_children(): w.destroy()
-        if df_os.empty: return
+        if self.df_os_f.empty: return
 
-        df_resumo = self._gerar_dataframe_resumo()
         df_corpo = df_resumo.iloc[:-1]
         linha_total = df_resumo.iloc[-1]
 
@@ -294,32 +351,38 @@ class DashboardView(ctk.CTkFrame):
                 
             ctk.CTkLabel(total_frame, text=texto_val, font=("Arial Black", 12), text_color=COLOR_PRIMARY, anchor="w" if i==0 else "center", width=largura).pack(side="left", fill="x", expand=True, padx=(10 if i==0 else 1))
 
-    def _configurar_eixo(self, ax, titulo, grid_axis='y'):
-        ax.set_title(titulo, fontsize=13, fontweight='bold', color=COLOR_TEXT, pad=15)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_color('#DDDDDD')
-        ax.spines['bottom'].set_color('#DDDDDD')
-        ax.tick_params(colors='#555555')
-        ax.grid(axis=grid_axis, linestyle='--', alpha=0.3, color='#DDDDDD') 
-        ax.set_facecolor(COLOR_WHITE)
-
     def atualizar_completo(self):
-        self.df_os_raw, self.df_par_raw = self.service.carregar_dados_brutos()
-        self.atualizar_dashboard()
-
-    def atualizar_dashboard(self):
         try: ano_sel = int(self.cb_ano.get())
         except: ano_sel = datetime.now().year
-        
         mes_str = self.cb_mes.get()
         mes_sel = int(mes_str.split(" - ")[0]) if mes_str != "Todos" else None
 
-        self.df_os_f, self.df_par_f = self.service.filtrar_dados(self.df_os_raw, self.df_par_raw, ano_sel, mes_sel)
-
+        # Banco e pandas rodam fora da thread do Tk; só o desenho volta para ela
+        self.btn_filtrar.configure(state="disabled")
+        self.executor.executar("dashboard", self._buscar_dados_painel, ano_sel, mes_sel,
+                               ao_concluir=self._aplicar_dados_painel, ao_falhar=self._ao_falhar_atualizacao, indicador=self.indicador)
+
+    def _buscar_dados_painel(self, ano_sel, mes_sel):
+        df_os_raw, df_par_raw = self.service.carregar_dados_brutos()
+        df_os_f, df_par_f = self.service.filtrar_dados(df_os_raw, df_par_raw, ano_sel, mes_sel)
+        ag_os, ag_par = self.service.carregar_agregados(ano_sel, mes_sel)
+        df_resumo = self._gerar_dataframe_resumo(df_os_f)
+        return ano_sel, mes_sel, df_os_raw, df_par_raw, df_os_f, df_par_f, ag_os, ag_par, df_resumo
+
+    def _aplicar_dados_painel(self, dados):
+        ano_sel, mes_sel, self.df_os_raw, self.df_par_raw, self.df_os_f, self.df_par_f, ag_os, ag_par, self.df_resumo = dados
+        self.periodo_atual = (ano_sel, mes_sel)
+        self.btn_filtrar.configure(state="normal")
+        self.atualizar_dashboard(ano_sel, mes_sel, ag_os, ag_par)
+
+    def _ao_falhar_atualizacao(self, erro):
+        self.btn_filtrar.configure(state="normal")
+        messagebox.showerror("Erro", f"Falha ao carregar os dados do painel:\n{erro}")
+
+    def atualizar_dashboard(self, ano_sel, mes_sel, ag_os, ag_par):
         # CARDS
         for w in self.frame_kpis.winfo_children(): w.destroy()
-        c_os, c_par, c_def, c_indef = self.service.calcular_kpis(self.df_os_f, self.df_par_f)
+        c_os, c_par, c_def, c_indef = self.service.calcular_kpis(ag_os, ag_par)
         
         self.frame_kpis.columnconfigure((0,1,2,3), weight=1)
         self.criar_card(self.frame_kpis, "TOTAL DE ORDENS (OS)", f"{c_os}", COLOR_PRIMARY, "📋").grid(row=0, column=0, padx=8, sticky="ew")
@@ -327,256 +390,140 @@ class DashboardView(ctk.CTkFrame):
         self.criar_card(self.frame_kpis, "PARECERES DEFERIDOS", f"{c_def}", COLOR_PRIMARY, "✅").grid(row=0, column=2, padx=8, sticky="ew")
         self.criar_card(self.frame_kpis, "PARECERES INDEFERIDOS", f"{c_indef}", COLOR_SECONDARY, "❌").grid(row=0, column=3, padx=8, sticky="ew")
 
-        # TABELA
-        self._desenhar_tabela(self.df_os_f)
-
-        # GRÁFICOS
-        for w in self.frame_graficos.winfo_children(): w.destroy()
-        
-        self.fig, axs = plt.subplots(7, 2, figsize=(14, 40), facecolor=COLOR_WHITE)
-        self.fig.patch.set_facecolor(COLOR_WHITE)
-
-        if self.df_os_f.empty and self.df_par_f.empty:
-            axs[0,0].text(0.5, 0.5, "Sem dados para o filtro selecionado", ha='center', fontsize=14)
-        else:
-            meses_pt = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-            meses_en = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-
+        # TABELA (calculada uma vez por filtro e reaproveitada nas exportações)
+        self._desenhar_tabela(self.df_resumo)
+
+        # GRÁFICOS (cada um é desenhado fora da thread do Tk quando chega perto da tela)
+        self.series_graficos = self._series_graficos(ano_sel, ag_os, ag_par, c_os, c_par)
+        dpi = self._dpi_graficos()
+        for posicao, (bloco, serie) in enumerate(zip(self.blocos_graficos, self.series_graficos)):
+            chave = (ano_sel, mes_sel, posicao)
+            if bloco["chave"] == chave and bloco["serie"] == serie:
+                continue  # Mesmo gráfico: fica a imagem (ou o desenho em andamento)
+            bloco.update(chave=chave, serie=serie, pedido=False, pronto=False)
+            png = cache_graficos.obter(chave, serie, dpi)
+            if png is not None:
+                self._mostrar_grafico(posicao, chave, serie, png)
+            else:
+                bloco["imagem"].configure(image=self._imagem_vazia, text="⏳ Carregando gráfico...")
+
+        # A primeira linha sai junto com os cards e a tabela; as demais conforme a rolagem
+        for posicao in (0, 1):
+            self._pedir_grafico(posicao)
+        self._agendar_graficos_visiveis()
+
+    # GRÁFICOS SOB DEMANDA (SÓ OS QUE ESTÃO NA TELA)
+    def _dpi_graficos(self):
+        # Desenha já na escala do Windows (125%, 150%...): a imagem não é esticada pelo customtkinter
+        return DPI_BASE * ctk.ScalingTracker.get_widget_scaling(self)
+
+    def _agendar_graficos_visiveis(self):
+        # Várias rolagens seguidas viram uma verificação só
+        if not self._verificacao_agendada:
+            self._verificacao_agendada = True
+            self.after(60, self._desenhar_graficos_visiveis)
+
+    def _desenhar_graficos_visiveis(self):
+        self._verificacao_agendada = False
+        if self.series_graficos is None: return
+        canvas_rolagem = self.scroll_area._parent_canvas
+        topo = canvas_rolagem.canvasy(0)
+        altura = canvas_rolagem.winfo_height()
+        # Meia tela de folga para baixo: o próximo gráfico já vem pronto na rolagem
+        inicio, fim = topo, topo + altura * 1.5
+        origem = self.scroll_area.winfo_rooty()
+        for posicao, bloco in enumerate(self.blocos_graficos):
+            y = bloco["cartao"].winfo_rooty() - origem
+            if y < fim and y + bloco["cartao"].winfo_height() > inicio:
+                self._pedir_grafico(posicao)
+
+    def _pedir_grafico(self, posicao):
+        bloco = self.blocos_graficos[posicao]
+        if bloco["pronto"] or bloco["pedido"] or bloco["serie"] is None: return
+        bloco["pedido"] = True
+        chave, serie = bloco["chave"], bloco["serie"]
+        self.executor.executar(f"dashboard-grafico-{posicao}", obter_png, chave, serie, self._dpi_graficos(),
+                               ao_concluir=lambda png: self._mostrar_grafico(posicao, chave, serie, png))
+
+    def _mostrar_grafico(self, posicao, chave, serie, png):
+        bloco = self.blocos_graficos[posicao]
+        if bloco["chave"] != chave or bloco["serie"] != serie: return  # O filtro mudou enquanto desenhava
+        imagem = ctk.CTkImage(light_image=Image.open(io.BytesIO(png)), size=self._tamanho_grafico)
+        bloco["imagem"].configure(image=imagem, text="")
+        bloco["pronto"] = True
+
+    def _series_graficos(self, ano_sel, ag_os, ag_par, c_os, c_par):
+        """As 14 séries do painel, na ordem da grade 7x2: só dados, títulos e cores (o desenho fica em graficos.py)."""
+        vazia = pd.Series(dtype=int)
+
+        def vazio(titulo, grade='y', texto="", tamanho=None):
+            return {"tipo": "vazio", "titulo": titulo, "grade": grade, "texto": texto, "tamanho": tamanho}
+
+        def barras(titulo, counts, cor, largura, margem, quebra=None, rotacao=0):
+            if counts.empty: return vazio(titulo, 'y')
+            return {"tipo": "barras", "titulo": titulo, "rotulos": tuple(str(r) for r in counts.index), "valores": tuple(int(v) for v in counts.values),
+                    "cor": cor, "largura": largura, "margem": margem, "quebra": quebra, "rotacao": rotacao}
+
+        def barras_h(titulo, counts, cor, quebra, margem):
+            if counts.empty: return vazio(titulo, 'x')
+            return {"tipo": "barras_h", "titulo": titulo, "rotulos": tuple(str(r) for r in counts.index), "valores": tuple(int(v) for v in counts.values),
+                    "cor": cor, "quebra": quebra, "margem": margem}
+
+        def pizza(titulo, counts, cor_de):
+            if counts.empty: return vazio(titulo, texto="Sem dados")
+            return {"tipo": "pizza", "titulo": titulo, "rotulos": tuple(str(r) for r in counts.index), "valores": tuple(int(v) for v in counts.values),
+                    "cores": tuple(cor_de(str(r)) for r in counts.index)}
+
+        meses_pt = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+        def por_mes(ag, total):
+            if not total: return vazia
+            counts = ag['mes'].reindex(range(1, 13), fill_value=0)
+            counts.index = meses_pt
+            return counts
+
+        cores_status = {"SIM": COLOR_PRIMARY, "NÃO": COLOR_SECONDARY, "NÃO AUTORIZADA": COLOR_WARNING}
+        cores_tipo = {"DEFERIDO": COLOR_PRIMARY, "INDEFERIDO": COLOR_SECONDARY}
+        cores_origem = {"SPU": COLOR_PRIMARY, "SISGEP": COLOR_SECONDARY}
+
+        series = [
             # Evolução Mensal
-            ax = axs[0, 0]
-            if not self.df_os_f.empty:
-                counts = self.df_os_f['data_dt'].dt.month_name().value_counts().reindex(meses_en, fill_value=0)
-                counts.index = meses_pt
-                bars = ax.bar(counts.index, counts.values, color=COLOR_PRIMARY, width=0.6)
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_ylim(0, max_val * 1.15)
-                for bar in bars:
-                    h = bar.get_height()
-                    if h > 0: ax.text(bar.get_x() + bar.get_width()/2, h + (max_val*0.02), f'{int(h)}', ha='center', va='bottom', fontweight='bold', color=COLOR_PRIMARY)
-            self._configurar_eixo(ax, f"Evolução de OS ({ano_sel})", grid_axis='y')
-
-            ax = axs[0, 1]
-            if not self.df_par_f.empty:
-                counts = self.df_par_f['data_dt'].dt.month_name().value_counts().reindex(meses_en, fill_value=0)
-                counts.index = meses_pt
-                bars = ax.bar(counts.index, counts.values, color=COLOR_SECONDARY, width=0.6)
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_ylim(0, max_val * 1.15)
-                for bar in bars:
-                    h = bar.get_height()
-                    if h > 0: ax.text(bar.get_x() + bar.get_width()/2, h + (max_val*0.02), f'{int(h)}', ha='center', va='bottom', fontweight='bold', color=COLOR_SECONDARY)
-            self._configurar_eixo(ax, f"Evolução de Pareceres  ({ano_sel})", grid_axis='y')
-
+            barras(f"Evolução de OS ({ano_sel})", por_mes(ag_os, c_os), COLOR_PRIMARY, 0.6, 1.15),
+            barras(f"Evolução de Pareceres  ({ano_sel})", por_mes(ag_par, c_par), COLOR_SECONDARY, 0.6, 1.15),
             # Bairros e Solicitantes
-            ax = axs[1, 0]
-            if not self.df_os_f.empty and 'bairro' in self.df_os_f.columns:
-                counts = self.df_os_f['bairro'].replace("", "Não Informado").fillna("Não Informado").value_counts().head(8)
-                labels = [textwrap.fill(str(nome), width=25) for nome in counts.index]
-                bars = ax.barh(labels, counts.values, color=COLOR_PRIMARY)
-                ax.invert_yaxis()
-                ax.xaxis.set_major_locator(MaxNLocator(integer=True)) 
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_xlim(0, max_val * 1.2)
-                for bar in bars:
-                    w = bar.get_width()
-                    if w > 0: ax.text(w + (max_val*0.02), bar.get_y() + bar.get_height()/2, f'{int(w)}', va='center', ha='left', fontweight='bold', color=COLOR_PRIMARY)
-            self._configurar_eixo(ax, "Top 8 Bairros com Mais OS", grid_axis='x')
-
-            ax = axs[1, 1]
-            if not self.df_par_f.empty and 'solicitante' in self.df_par_f.columns:
-                counts = self.df_par_f['solicitante'].replace("", "Não Informado").fillna("Não Informado").value_counts().head(8)
-                labels = [textwrap.fill(str(nome), width=25) for nome in counts.index]
-                bars = ax.barh(labels, counts.values, color=COLOR_SECONDARY)
-                ax.invert_yaxis()
-                ax.xaxis.set_major_locator(MaxNLocator(integer=True)) 
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_xlim(0, max_val * 1.25) 
-                for bar in bars:
-                    w = bar.get_width()
-                    if w > 0: ax.text(w + (max_val*0.02), bar.get_y() + bar.get_height()/2, f'{int(w)}', va='center', ha='left', fontweight='bold', color=COLOR_SECONDARY)
-            self._configurar_eixo(ax, "Top 8 Solicitantes (Pareceres)", grid_axis='x')
-
-            # Status (ATUALIZADO COM NÚMERO E PORCENTAGEM)
-            ax = axs[2, 0]
-            if not self.df_os_f.empty and 'status_conclusao' in self.df_os_f.columns:
-                status_counts = self.df_os_f['status_conclusao'].fillna("NÃO").value_counts()
-                if not status_counts.empty:
-                    cores_map = {"SIM": COLOR_PRIMARY, "NÃO": COLOR_SECONDARY, "NÃO AUTORIZADA": COLOR_WARNING}
-                    cores_grafico = [cores_map.get(str(x).upper(), "#999999") for x in status_counts.index]
-                    
-                    formato_rotulo = lambda p: f'{int(round(p * sum(status_counts.values) / 100))}\n({p:.1f}%)'
-                    ax.pie(status_counts.values, labels=status_counts.index, autopct=formato_rotulo, startangle=90, colors=cores_grafico, textprops={'fontsize': 10, 'fontweight': 'bold'}, wedgeprops=dict(width=0.4, edgecolor='w'))
-                    ax.set_title("Status das Ordens de Serviço", fontsize=12, fontweight='bold', color=COLOR_TEXT, pad=15)
-            else:
-                self._configurar_eixo(ax, "Status das Ordens de Serviço")
-                ax.text(0.5, 0.5, "Sem dados", ha='center')
-
-            ax = axs[2, 1]
-            if not self.df_par_f.empty and 'tipo' in self.df_par_f.columns:
-                taxa_counts = self.df_par_f['tipo'].str.upper().value_counts()
-                if not taxa_counts.empty:
-                    cores_map = {"DEFERIDO": COLOR_PRIMARY, "INDEFERIDO": COLOR_SECONDARY}
-                    cores_grafico = [cores_map.get(str(x), "#999999") for x in taxa_counts.index]
-                    
-                    formato_rotulo = lambda p: f'{int(round(p * sum(taxa_counts.values) / 100))}\n({p:.1f}%)'
-                    ax.pie(taxa_counts.values, labels=taxa_counts.index, autopct=formato_rotulo, startangle=90, colors=cores_grafico, textprops={'fontsize': 10, 'fontweight': 'bold'}, wedgeprops=dict(width=0.4, edgecolor='w'))
-                    ax.set_title("Taxa de Aprovação (Pareceres)", fontsize=12, fontweight='bold', color=COLOR_TEXT, pad=15)
-            else:
-                self._configurar_eixo(ax, "Taxa de Aprovação (Pareceres)")
-                ax.text(0.5, 0.5, "Sem dados", ha='center')
-
+            barras_h("Top 8 Bairros com Mais OS", ag_os['bairro'].head(8), COLOR_PRIMARY, 25, 1.2),
+            barras_h("Top 8 Solicitantes (Pareceres)", ag_par['solicitante'].head(8), COLOR_SECONDARY, 25, 1.25),
+            # Status e Aprovação
+            pizza("Status das Ordens de Serviço", ag_os['status'] if c_os else vazia, lambda x: cores_status.get(x.upper(), "#999999")),
+            pizza("Taxa de Aprovação (Pareceres)", ag_par['tipo'] if c_par else vazia, lambda x: cores_tipo.get(x, "#999999")),
             # Natureza e Tipo
-            ax = axs[3, 0]
-            if not self.df_os_f.empty and 'tipo_os' in self.df_os_f.columns:
-                counts = self.df_os_f['tipo_os'].str.upper().value_counts().head(5)
-                labels = [textwrap.fill(str(nome), width=12) for nome in counts.index]
-                bars = ax.bar(labels, counts.values, color=COLOR_PRIMARY, width=0.5)
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_ylim(0, max_val * 1.2)
-                ax.set_xticks(range(len(labels)))
-                ax.set_xticklabels(labels, rotation=20, ha='right', fontsize=9)
-                for bar in bars:
-                    h = bar.get_height()
-                    if h > 0: ax.text(bar.get_x() + bar.get_width()/2, h + (max_val*0.02), f'{int(h)}', ha='center', va='bottom', fontweight='bold', color=COLOR_PRIMARY)
-            self._configurar_eixo(ax, "Natureza da Ação (OS)", grid_axis='y')
-
-            ax = axs[3, 1]
-            if not self.df_os_f.empty and 'tipo_item' in self.df_os_f.columns:
-                counts = self.df_os_f['tipo_item'].str.upper().value_counts().head(5)
-                labels = [textwrap.fill(str(nome), width=15) for nome in counts.index] 
-                bars = ax.bar(labels, counts.values, color=COLOR_SECONDARY, width=0.5)
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_ylim(0, max_val * 1.2)
-                ax.set_xticks(range(len(labels)))
-                ax.set_xticklabels(labels, rotation=20, ha='right', fontsize=9)
-                for bar in bars:
-                    h = bar.get_height()
-                    if h > 0: ax.text(bar.get_x() + bar.get_width()/2, h + (max_val*0.02), f'{int(h)}', ha='center', va='bottom', fontweight='bold', color=COLOR_SECONDARY)
-            self._configurar_eixo(ax, "Tipos de Itens Mais Demandados (OS)", grid_axis='y')
-
+            barras("Natureza da Ação (OS)", ag_os['tipo_os'].head(5), COLOR_PRIMARY, 0.5, 1.2, quebra=12, rotacao=20),
+            barras("Tipos de Itens Mais Demandados (OS)", ag_os['tipo_item'].head(5), COLOR_SECONDARY, 0.5, 1.2, quebra=15, rotacao=20),
             # Produção Individual
-            ax = axs[4, 0]
-            if not self.df_os_f.empty and 'criado_por' in self.df_os_f.columns:
-                counts = self.df_os_f['criado_por'].value_counts().head(8)
-                labels = [textwrap.fill(str(nome), width=20) for nome in counts.index]
-                bars = ax.barh(labels, counts.values, color=COLOR_PRIMARY)
-                ax.invert_yaxis()
-                ax.xaxis.set_major_locator(MaxNLocator(integer=True)) 
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_xlim(0, max_val * 1.25)
-                for bar in bars:
-                    w = bar.get_width()
-                    if w > 0: ax.text(w + (max_val*0.02), bar.get_y() + bar.get_height()/2, f'{int(w)}', va='center', ha='left', fontweight='bold', color=COLOR_PRIMARY)
-            self._configurar_eixo(ax, "Quantidade de OS por Técnico", grid_axis='x')
-
-            ax = axs[4, 1]
-            if not self.df_par_f.empty and 'criado_por' in self.df_par_f.columns:
-                counts = self.df_par_f['criado_por'].value_counts().head(8)
-                labels = [textwrap.fill(str(nome), width=20) for nome in counts.index]
-                bars = ax.barh(labels, counts.values, color=COLOR_SECONDARY)
-                ax.invert_yaxis()
-                ax.xaxis.set_major_locator(MaxNLocator(integer=True)) 
-                max_val = max(counts.values) if len(counts)>0 else 1
-                ax.set_xlim(0, max_val * 1.25)
-                for bar in bars:
-                    w = bar.get_width()
-                    if w > 0: ax.text(w + (max_val*0.02), bar.get_y() + bar.get_height()/2, f'{int(w)}', va='center', ha='left', fontweight='bold', color=COLOR_SECONDARY)
-            self._configurar_eixo(ax, "Quantidade de Pareceres por Técnico", grid_axis='x')
-
-            # Produtividade
-            ax = axs[5, 0]
-            s1 = self.df_os_f['criado_por'].value_counts() if not self.df_os_f.empty else pd.Series(dtype=int)
-            s2 = self.df_par_f['criado_por'].value_counts() if not self.df_par_f.empty else pd.Series(dtype=int)
-            prod_total = s1.add(s2, fill_value=0).sort_values(ascending=False).head(8)
-            total_geral_sistema = len(self.df_os_f) + len(self.df_par_f)
-            
-            if not prod_total.empty:
-                labels = [textwrap.fill(str(nome), width=20) for nome in prod_total.index]
-                bars = ax.barh(labels, prod_total.values, color=COLOR_PRIMARY)
-                ax.invert_yaxis()
-                ax.xaxis.set_major_locator(MaxNLocator(integer=True)) 
-                max_val = max(prod_total.values) if len(prod_total)>0 else 1
-                ax.set_xlim(0, max_val * 1.25)
-                for bar in bars:
-                    w = bar.get_width()
-                    if w > 0: ax.text(w + (max_val*0.02), bar.get_y() + bar.get_height()/2, f'{int(w)}', va='center', ha='left', fontweight='bold', color=COLOR_PRIMARY)
-            self._configurar_eixo(ax, "Total por Técnico (OS + Parecer)", grid_axis='x')
-
-            ax = axs[5, 1]
-            if not prod_total.empty and total_geral_sistema > 0:
-                labels = [textwrap.fill(str(nome), width=20) for nome in prod_total.index]
-                prod_pct = (prod_total / total_geral_sistema) * 100
-                bars = ax.barh(labels, prod_pct.values, color=COLOR_SECONDARY)
-                ax.invert_yaxis()
-                
-                max_val = max(prod_pct.values) if len(prod_pct)>0 else 1
-                ax.set_xlim(0, max_val * 1.90) 
-                
-                num_tecnicos = len(prod_total)
-                media_docs = int(round(total_geral_sistema / num_tecnicos))
-                media_pct = (media_docs / total_geral_sistema) * 100
-
-                texto_legenda = f"Média Ideal da Equipe:\n{media_docs} Docs/Téc\n({media_pct:.1f}%)"
-                ax.text(1.2, 0.03, texto_legenda, transform=ax.transAxes, ha='right', va='bottom',
-                        fontsize=9, fontweight='bold', color='#333333',
-                        bbox=dict(facecolor='#F4F6F9', alpha=0.9, edgecolor=COLOR_PRIMARY, boxstyle='round,pad=0.4'))
-
-                for bar in bars:
-                    w = bar.get_width() 
-                    if w > 0: 
-                        pct = w
-                        diff = pct - media_pct
-                        
-                        if diff > 0.1:
-                            status = f"Acima (+{diff:.1f}%)"
-                            color_status = COLOR_PRIMARY 
-                        elif diff < -0.1:
-                            status = f"Abaixo ({diff:.1f}%)"
-                            color_status = COLOR_SECONDARY 
-                        else:
-                            status = "Na Média"
-                            color_status = "#777777" 
-                            
-                        texto_final = f"{pct:.1f}%  |  {status}"
-                        ax.text(w + (max_val*0.03), bar.get_y() + bar.get_height()/2, texto_final, 
-                                va='center', ha='left', fontweight='bold', color=color_status, fontsize=11)
-            
-            self._configurar_eixo(ax, "Produtividade Relativa vs Média da Equipe (%)", grid_axis='x')
-
-            # ORIGEM DA DEMANDA
-            ax = axs[6, 0]
-            if not self.df_os_f.empty and 'origem' in self.df_os_f.columns:
-                counts = self.df_os_f['origem'].value_counts()
-                if not counts.empty:
-                    cores_map = {"SPU": COLOR_PRIMARY, "SISGEP": COLOR_SECONDARY}
-                    cores_grafico = [cores_map.get(str(x), COLOR_TEXT) for x in counts.index]
-                    
-                    formato_rotulo = lambda p: f'{int(round(p * sum(counts.values) / 100))}\n({p:.1f}%)'
-                    ax.pie(counts.values, labels=counts.index, autopct=formato_rotulo, startangle=90, colors=cores_grafico, textprops={'fontsize': 10, 'fontweight': 'bold'}, wedgeprops=dict(width=0.4, edgecolor='w'))
-                    ax.set_title("Origem da Demanda (OS)", fontsize=12, fontweight='bold', color=COLOR_TEXT, pad=15)
-            else:
-                self._configurar_eixo(ax, "Origem da Demanda (OS)")
-                ax.text(0.5, 0.5, "Sem dados", ha='center')
-
-            ax = axs[6, 1]
-            if not self.df_par_f.empty and 'origem' in self.df_par_f.columns:
-                counts = self.df_par_f['origem'].value_counts()
-                if not counts.empty:
-                    cores_map = {"SPU": COLOR_PRIMARY, "SISGEP": COLOR_SECONDARY}
-                    cores_grafico = [cores_map.get(str(x), COLOR_TEXT) for x in counts.index]
-                    
-                    formato_rotulo = lambda p: f'{int(round(p * sum(counts.values) / 100))}\n({p:.1f}%)'
-                    ax.pie(counts.values, labels=counts.index, autopct=formato_rotulo, startangle=90, colors=cores_grafico, textprops={'fontsize': 10, 'fontweight': 'bold'}, wedgeprops=dict(width=0.4, edgecolor='w'))
-                    ax.set_title("Origem da Demanda (Pareceres)", fontsize=12, fontweight='bold', color=COLOR_TEXT, pad=15)
-            else:
-                self._configurar_eixo(ax, "Origem da Demanda (Pareceres)")
-                ax.text(0.5, 0.5, "Sem dados", ha='center')
-
-        self.fig.tight_layout(pad=4.0, h_pad=5.0)
+            barras_h("Quantidade de OS por Técnico", ag_os['criado_por'].head(8), COLOR_PRIMARY, 20, 1.25),
+            barras_h("Quantidade de Pareceres por Técnico", ag_par['criado_por'].head(8), COLOR_SECONDARY, 20, 1.25),
+        ]
 
-        canvas = FigureCanvasTkAgg(self.fig, master=self.frame_graficos)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        # Produtividade
+        prod_total = ag_os['criado_por'].add(ag_par['criado_por'], fill_value=0).sort_values(ascending=False).head(8)
+        total_geral_sistema = c_os + c_par
+        series.append(barras_h("Total por Técnico (OS + Parecer)", prod_total, COLOR_PRIMARY, 20, 1.25))
+        titulo_prod = "Produtividade Relativa vs Média da Equipe (%)"
+        if prod_total.empty or total_geral_sistema <= 0:
+            series.append(vazio(titulo_prod, 'x'))
+        else:
+            media_docs = int(round(total_geral_sistema / len(prod_total)))
+            series.append({"tipo": "produtividade", "titulo": titulo_prod, "rotulos": tuple(str(r) for r in prod_total.index),
+                           "valores": tuple(float(v) for v in prod_total / total_geral_sistema * 100),
+                           "media_docs": media_docs, "media_pct": media_docs / total_geral_sistema * 100,
+                           "cor": COLOR_SECONDARY, "cor_acima": COLOR_PRIMARY, "cor_abaixo": COLOR_SECONDARY})
+
+        # Origem da Demanda
+        series.append(pizza("Origem da Demanda (OS)", ag_os['origem'] if c_os else vazia, lambda x: cores_origem.get(x, COLOR_TEXT)))
+        series.append(pizza("Origem da Demanda (Pareceres)", ag_par['origem'] if c_par else vazia, lambda x: cores_origem.get(x, COLOR_TEXT)))
+
+        if c_os == 0 and c_par == 0:
+            series[0] = vazio(series[0]["titulo"], texto="Sem dados para o filtro selecionado", tamanho=14)
+        return series
 
 def renderizar(frame_destino, usuario_logado):
     return DashboardView(master=frame_destino, usuario_logado=usuario_logado)
\ No newline at end of file
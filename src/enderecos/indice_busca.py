@@ -0,0 +1,67 @@
+# enderecos/indice_busca.py
+import re
+from bisect import bisect_left
+from src.shared.utils import normalizar_texto
+
+_SEPARADORES = re.compile(r"[^0-9A-Z]+")
+
+
+def _palavras(texto):
+    """Palavras do texto sem acento e em caixa alta ("Av. Dom Luís, 12" -> ["AV", "DOM", "LUIS", "12"])."""
+    return [p for p in _SEPARADORES.split(normalizar_texto(texto)) if p]
+
+
+class IndiceBuscaEnderecos:
+    """
+    Índice da busca da aba de Endereços, montado uma vez por carga (na thread de trabalho).
+
+    Cada palavra do ID, do endereço e do bairro aponta para as linhas onde aparece. As palavras
+    ficam ordenadas, então "todas as que começam com X" é um intervalo achado por busca binária.
+    A busca quebra o termo em palavras (sem acento) e devolve as linhas que têm, para cada uma,
+    alguma palavra começando por ela: "luis 12" acha "RUA DOM LUÍS, 1250".
+    """
+    CAMPOS = ("id_ponto", "endereco", "bairro")
+
+    def __init__(self, df):
+        colunas = ["id_ponto", "endereco", "numero", "bairro", "status"]
+        # Valores prontos para a tabela, na ordem do DataFrame (a posição é a chave de cada linha)
+        self.linhas = [tuple("" if v is None else v for v in linha)
+                       for linha in df[colunas].itertuples(index=False, name=None)] if not df.empty else []
+
+        ocorrencias = {}
+        campos = [df[c].tolist() for c in self.CAMPOS] if not df.empty else []
+        for posicao, valores in enumerate(zip(*campos)):
+            for valor in valores:
+                for palavra in _palavras(valor):
+                    ocorrencias.setdefault(palavra, set()).add(posicao)
+        self._palavras = sorted(ocorrencias)
+        self._posicoes = [ocorrencias[p] for p in self._palavras]
+        self._cache = {}  # prefixo -> frozenset de posições (os prefixos se repetem a cada letra digitada)
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def buscar(self, termo):
+        """Posições (em ordem) das linhas que casam com o termo. Termo vazio devolve todas."""
+        prefixos = _palavras(termo)
+        if not prefixos:
+            return list(range(len(self.linhas)))
+        # Começa pelo prefixo mais raro: a interseção fica pequena logo de início
+        conjuntos = sorted((self._com_prefixo(p) for p in prefixos), key=len)
+        resultado = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            if not resultado: break
+            resultado &= conjunto
+        return sorted(resultado)
+
+    def _com_prefixo(self, prefixo):
+        encontrado = self._cache.get(prefixo)
+        if encontrado is None:
+            inicio = bisect_left(self._palavras, prefixo)
+            # Fim do intervalo: primeira palavra que já não começa com o prefixo
+            fim = bisect_left(self._palavras, prefixo + "\uffff", inicio)
+            encontrado = frozenset().union(*self._posicoes[inicio:fim])
+            if len(self._cache) > 512:
+                self._cache.clear()
+            self._cache[prefixo] = encontrado
+        return encontrado
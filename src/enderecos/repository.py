@@ -1,5 +1,7 @@
-import pandas as pd
+import psycopg2
 from config.database import get_db_connection
+from src.shared.cache_enderecos import cache_enderecos
+from src.shared.exportacao import ler_em_lotes
 
 class EnderecoRepository:
     def salvar_ou_atualizar(self, id_ponto, endereco, numero, bairro, complemento, status, criado_por):
@@ -30,8 +32,12 @@ class EnderecoRepository:
             return True, "Endereço salvo/atualizado com sucesso!"
         except Exception as e:
             return False, f"Erro no banco de dados: {e}"
+        finally:
+            cache_enderecos.invalidar(id_ponto)
 
     def listar_todos(self):
+        import pandas as pd  # Import adiado: o pandas só é carregado quando a aba de endereços é aberta
+
         # O AS (Alias) garante que o Pandas DataFrame continue entregando os nomes 
         # antigos para a View, sem precisar refazer a tela de Endereços!
         query = """
@@ -53,4 +59,100 @@ class EnderecoRepository:
             return df
         except Exception as e:
             print(f"Erro ao listar endereços: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def iterar_para_exportacao(self):
+        # Mesmas colunas da listagem, já com a data formatada no banco (o Python só repassa as linhas)
+        query = """
+            SELECT 
+                id_ponto, 
+                logradouro, 
+                numero, 
+                bairro, 
+                complemento, 
+                CASE WHEN is_ativo THEN 'ATIVO' ELSE 'INATIVO' END, 
+                responsavel_vistoria, 
+                to_char(data_vistoria, 'DD/MM/YYYY HH24:MI')
+            FROM sigp.enderecos_cadastrados
+            ORDER BY id_ponto
+        """
+        return ler_em_lotes(query)
+
+    def importar_em_lote(self, arquivo_csv, criado_por):
+        """
+        Importa de uma vez as linhas de arquivo_csv (texto CSV sem cabeçalho, colunas:
+        linha, id_ponto, logradouro, numero, bairro, complemento, status; já em caixa alta).
+        As linhas vão por COPY para uma tabela temporária, são validadas lá e entram na tabela
+        com um único INSERT ... ON CONFLICT. Tudo numa transação: se algo falhar, nada é gravado.
+        Devolve (inseridos, atualizados, [(linha, motivo)] das linhas recusadas).
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        CREATE TEMP TABLE tmp_importacao_enderecos (
+                            linha integer, id_ponto text, logradouro text, numero text,
+                            bairro text, complemento text, status text, motivo text
+                        ) ON COMMIT DROP
+                    """)
+                    cursor.copy_expert("""
+                        COPY tmp_importacao_enderecos (linha, id_ponto, logradouro, numero, bairro, complemento, status)
+                        FROM STDIN WITH (FORMAT csv)
+                    """, arquivo_csv)
+
+                    # VALIDAÇÃO (AS MESMAS REGRAS DO FORMULÁRIO)
+                    cursor.execute("""
+                        UPDATE tmp_importacao_enderecos
+                        SET motivo = 'ID do Ponto e Endereço são obrigatórios.'
+                        WHERE COALESCE(id_ponto, '') = '' OR COALESCE(logradouro, '') = ''
+                    """)
+                    cursor.execute("""
+                        UPDATE tmp_importacao_enderecos
+                        SET motivo = 'Status inválido (use ATIVO, INATIVO ou EM MANUTENÇÃO): ' || status
+                        WHERE motivo IS NULL AND COALESCE(status, '') NOT IN ('', 'ATIVO', 'INATIVO', 'EM MANUTENÇÃO', 'EM MANUTENCAO')
+                    """)
+                    # ID repetido na planilha: vale a última linha (o ON CONFLICT não atualiza a mesma linha duas vezes)
+                    cursor.execute("""
+                        UPDATE tmp_importacao_enderecos t
+                        SET motivo = 'ID ' || t.id_ponto || ' repetido na planilha (vale a linha ' || u.ultima || ').'
+                        FROM (
+                            SELECT id_ponto, MAX(linha) AS ultima FROM tmp_importacao_enderecos
+                            WHERE motivo IS NULL GROUP BY id_ponto HAVING COUNT(*) > 1
+                        ) u
+                        WHERE t.motivo IS NULL AND t.id_ponto = u.id_ponto AND t.linha < u.ultima
+                    """)
+
+                    cursor.execute("""
+                        SELECT COUNT(*) FROM tmp_importacao_enderecos t
+                        JOIN sigp.enderecos_cadastrados e ON e.id_ponto = t.id_ponto
+                        WHERE t.motivo IS NULL
+                    """)
+                    atualizados = cursor.fetchone()[0]
+
+                    # MESCLAGEM (UM COMANDO PARA TODAS AS LINHAS VÁLIDAS)
+                    cursor.execute("""
+                        INSERT INTO sigp.enderecos_cadastrados
+                        (id_ponto, logradouro, numero, bairro, complemento, is_ativo, responsavel_vistoria, data_vistoria)
+                        SELECT id_ponto, logradouro, COALESCE(NULLIF(numero, ''), 'S/N'), COALESCE(bairro, ''), COALESCE(complemento, ''),
+                               COALESCE(NULLIF(status, ''), 'ATIVO') = 'ATIVO', %s, CURRENT_TIMESTAMP
+                        FROM tmp_importacao_enderecos
+                        WHERE motivo IS NULL
+                        ON CONFLICT (id_ponto) DO UPDATE SET
+                            logradouro = EXCLUDED.logradouro,
+                            numero = EXCLUDED.numero,
+                            bairro = EXCLUDED.bairro,
+                            complemento = EXCLUDED.complemento,
+                            is_ativo = EXCLUDED.is_ativo,
+                            responsavel_vistoria = EXCLUDED.responsavel_vistoria,
+                            data_vistoria = CURRENT_TIMESTAMP
+                    """, (criado_por,))
+                    inseridos = cursor.rowcount - atualizados
+
+                    cursor.execute("SELECT linha, motivo FROM tmp_importacao_enderecos WHERE motivo IS NOT NULL ORDER BY linha")
+                    recusadas = cursor.fetchall()
+            return inseridos, atualizados, recusadas
+        except psycopg2.Error as e:
+            print(f"[LOG DB] Erro na importação de endereços: {e}")
+            raise Exception(f"Falha ao gravar os endereços no banco: {e.pgerror or e}")
+        finally:
+            cache_enderecos.invalidar()
@@ -1,6 +1,7 @@
-import pandas as pd
-from tkinter import filedialog
+import io
+import os
 from src.enderecos.repository import EnderecoRepository
+from src.shared.utils import normalizar_texto
 
 class EnderecoService:
     def __init__(self):
@@ -29,37 +30,88 @@ class EnderecoService:
     def listar_enderecos(self):
         return self.repo.listar_todos()
 
-    def exportar_excel(self):
-        df = self.listar_enderecos()
-        if df.empty:
+    def carregar_para_busca(self):
+        """Lista completa e o índice da busca por ID/endereço/bairro (montado aqui, fora da thread da tela)."""
+        from src.enderecos.indice_busca import IndiceBuscaEnderecos
+        df = self.repo.listar_todos()
+        return df, IndiceBuscaEnderecos(df)
+
+    def exportar_excel(self, filepath):
+        """Grava a base inteira de endereços em filepath, lendo e escrevendo em lotes (memória constante)."""
+        from src.shared.exportacao import abrir_planilha, escrever_aba  # Import adiado (só na exportação)
+
+        colunas = [("ID", 15), ("ENDEREÇO", 40), ("NÚMERO", 20), ("BAIRRO", 20), ("COMPLEMENTO", 20),
+                   ("STATUS", 25), ("ÚLTIMA ATUALIZAÇÃO POR", 25), ("DATA ATUALIZAÇÃO", 25)]
+        try:
+            workbook = abrir_planilha(filepath)
+            try:
+                total = escrever_aba(workbook, 'Endereços', colunas, self.repo.iterar_para_exportacao())
+            finally:
+                workbook.close()
+        except Exception as e:
+            return False, f"Erro ao exportar: {e}"
+
+        if total == 0:
+            os.remove(filepath)
             return False, "Não há dados para exportar."
+        return True, f"Planilha exportada com sucesso! ({total} endereços)"
 
-        filepath = filedialog.asksaveasfilename(
-            defaultextension=".xlsx", 
-            filetypes=[("Planilha Excel", "*.xlsx")], 
-            title="Salvar Banco de Endereços"
-        )
-        
-        if not filepath:
-            return False, "Exportação cancelada pelo usuário."
+    # =========================================================
+    # IMPORTAÇÃO EM LOTE (PLANILHA CSV/XLSX DE VISTORIA)
+    # =========================================================
+    # Cabeçalho da planilha (sem acento, maiúsculo) -> coluna da importação
+    COLUNAS_IMPORTACAO = {
+        "ID": "id_ponto", "ID DO PONTO": "id_ponto", "ID PONTO": "id_ponto",
+        "ENDERECO": "logradouro", "LOGRADOURO": "logradouro", "RUA": "logradouro",
+        "NUMERO": "numero", "N": "numero", "NO": "numero",
+        "BAIRRO": "bairro",
+        "COMPLEMENTO": "complemento", "REFERENCIA": "complemento", "COMPLEMENTO / REFERENCIA": "complemento",
+        "STATUS": "status",
+    }
+
+    def importar_planilha(self, caminho, usuario_logado):
+        """
+        Cadastra/atualiza de uma vez os pontos de uma planilha (uma linha por ponto, mesmos campos do formulário).
+        Linhas com problema são recusadas sem impedir as demais. Retorna (sucesso, mensagem, relatorio),
+        com relatorio = [(linha_na_planilha, ok, texto)] das linhas recusadas.
+        """
+        import pandas as pd  # Import adiado: pandas só é carregado quando uma planilha é importada
 
         try:
-            # Formata a data para ficar bonita no Excel
-            if 'updated_at' in df.columns:
-                df['updated_at'] = pd.to_datetime(df['updated_at']).dt.strftime('%d/%m/%Y %H:%M')
-
-            # Renomeia as colunas para o usuário final
-            df.columns = ["ID", "ENDEREÇO", "NÚMERO", "BAIRRO", "COMPLEMENTO", "STATUS", "ÚLTIMA ATUALIZAÇÃO POR", "DATA ATUALIZAÇÃO"]
-            
-            with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
-                df.to_excel(writer, sheet_name='Endereços', index=False)
-                worksheet = writer.sheets['Endereços']
-                # Ajusta a largura das colunas
-                worksheet.set_column('A:A', 15)
-                worksheet.set_column('B:B', 40)
-                worksheet.set_column('C:E', 20)
-                worksheet.set_column('F:H', 25)
-
-            return True, "Planilha exportada com sucesso!"
+            if caminho.lower().endswith(".csv"):
+                # sep=None descobre sozinho se o separador é ';' (Excel em português) ou ','
+                df = pd.read_csv(caminho, sep=None, engine="python", dtype=str, encoding="utf-8-sig", keep_default_na=False)
+            else:
+                df = pd.read_excel(caminho, dtype=str, keep_default_na=False)
         except Exception as e:
-            return False, f"Erro ao exportar: {e}"
\ No newline at end of file
+            return False, f"Não foi possível ler a planilha:\n{e}", []
+
+        colunas = {}
+        for coluna in df.columns:
+            campo = self.COLUNAS_IMPORTACAO.get(" ".join(normalizar_texto(coluna).replace(".", " ").split()))
+            if campo and campo not in colunas.values():
+                colunas[coluna] = campo
+        faltando = {"id_ponto", "logradouro"} - set(colunas.values())
+        if faltando:
+            nomes = {"id_ponto": "ID DO PONTO", "logradouro": "ENDEREÇO"}
+            return False, f"Coluna obrigatória ausente na planilha: {', '.join(sorted(nomes[c] for c in faltando))}", []
+
+        # Normalização vetorizada (como no formulário: tudo em caixa alta, sem espaços nas pontas)
+        dados = pd.DataFrame({"linha": df.index + 2})  # +1 do cabeçalho, +1 porque a planilha começa em 1
+        for campo in ("id_ponto", "logradouro", "numero", "bairro", "complemento", "status"):
+            origem = next((c for c, f in colunas.items() if f == campo), None)
+            dados[campo] = df[origem].astype(str).str.strip().str.upper() if origem is not None else ""
+        dados = dados[(dados.drop(columns="linha") != "").any(axis=1)]  # Linhas em branco no meio/fim da planilha
+        if dados.empty:
+            return False, "A planilha não tem nenhuma linha preenchida.", []
+
+        arquivo_csv = io.StringIO()
+        dados.to_csv(arquivo_csv, index=False, header=False)
+        arquivo_csv.seek(0)
+        try:
+            inseridos, atualizados, recusadas = self.repo.importar_em_lote(arquivo_csv, usuario_logado.get('nome_completo', 'Sistema'))
+        except Exception as e:
+            return False, f"Nenhum endereço foi importado:\n{e}", []
+
+        msg = f"Importação concluída: {inseridos} cadastrado(s), {atualizados} atualizado(s), {len(recusadas)} recusado(s)."
+        return inseridos + atualizados > 0, msg, [(linha, False, motivo) for linha, motivo in recusadas]
@@ -1,19 +1,28 @@
 import customtkinter as ctk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from src.enderecos.service import EnderecoService
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import IndicadorCarregamento
 
 COLOR_BG = "#F4F6F9"
 COLOR_WHITE = "#FFFFFF"
 COLOR_PRIMARY = "#0F8C75"
 
 class CadastroEnderecoView(ctk.CTkFrame):
+    ESPERA_BUSCA_MS = 150  # Filtra quando a digitação para, não a cada tecla
+
     def __init__(self, master, usuario_logado):
         super().__init__(master, fg_color=COLOR_BG)
         self.pack(fill="both", expand=True)
         
         self.usuario_logado = usuario_logado
         self.service = EnderecoService()
+        self.executor = obter_executor(self)
         self.df_atual = None
+        self.indice = None          # IndiceBuscaEnderecos da carga atual
+        self._visiveis = []         # Posições (iids) hoje penduradas na tabela, em ordem
+        self._termo_aplicado = None
+        self._busca_agendada = None
 
         self._construir_interface()
         self._carregar_tabela()
@@ -24,9 +33,14 @@ class CadastroEnderecoView(ctk.CTkFrame):
         header.pack(fill="x", side="top")
         header.pack_propagate(False)
         ctk.CTkLabel(header, text="Gestão de Ponto de Parada (Endereços)", font=("Arial Black", 20), text_color=COLOR_PRIMARY).pack(side="left", padx=20, pady=15)
+        self.indicador = IndicadorCarregamento(header)
+        self.indicador.pack(side="left", padx=10)
 
-        btn_exportar = ctk.CTkButton(header, text="📥 EXPORTAR EXCEL", font=("Arial Bold", 12), fg_color="#27AE60", hover_color="#1E8449", command=self.acao_exportar)
-        btn_exportar.pack(side="right", padx=20, pady=15)
+        self.btn_exportar = ctk.CTkButton(header, text="📥 EXPORTAR EXCEL", font=("Arial Bold", 12), fg_color="#27AE60", hover_color="#1E8449", command=self.acao_exportar)
+        self.btn_exportar.pack(side="right", padx=20, pady=15)
+        # Importação de uma planilha de vistoria (um ponto por linha)
+        self.btn_importar = ctk.CTkButton(header, text="📤 IMPORTAR PLANILHA", font=("Arial Bold", 12), fg_color="#555", hover_color="#333", command=self.acao_importar)
+        self.btn_importar.pack(side="right", pady=15)
 
         # CORPO (PANEL DUPLO)
         corpo = ctk.CTkFrame(self, fg_color="transparent")
@@ -75,7 +89,7 @@ class CadastroEnderecoView(ctk.CTkFrame):
         ctk.CTkLabel(frame_busca, text="🔍 Buscar:", font=("Arial Bold", 13), text_color="#333").pack(side="left")
         self.entry_busca = ctk.CTkEntry(frame_busca, width=300, height=35, placeholder_text="Digite ID, Rua ou Bairro...")
         self.entry_busca.pack(side="left", padx=10)
-        self.entry_busca.bind("<KeyRelease>", self._filtrar_tabela) # Filtra ao digitar
+        self.entry_busca.bind("<KeyRelease>", self._agendar_filtro) # Filtra ao digitar (com espera)
 
         # Estilo da Tabela
         style = ttk.Style()
@@ -106,40 +120,56 @@ class CadastroEnderecoView(ctk.CTkFrame):
         self.tree.bind("<Double-1>", self._ao_clicar_tabela)
 
     def _carregar_tabela(self):
-        self.df_atual = self.service.listar_enderecos()
-        self._preencher_treeview(self.df_atual)
-
-    def _preencher_treeview(self, df):
-        # Limpa a tabela antes de preencher com os novos dados
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        if df is None or df.empty: return
-
-        for _, row in df.iterrows():
-            self.tree.insert("", "end", values=(row['id_ponto'], row['endereco'], row['numero'], row['bairro'], row['status']))
-
-    def _filtrar_tabela(self, event=None):
-        termo = self.entry_busca.get().upper()
-        if self.df_atual is None or self.df_atual.empty: return
-        
-        # Filtra o dataframe Pandas procurando o termo no ID, Endereço ou Bairro
-        df_filtrado = self.df_atual[
-            self.df_atual['id_ponto'].astype(str).str.contains(termo, na=False) |
-            self.df_atual['endereco'].astype(str).str.contains(termo, na=False) |
-            self.df_atual['bairro'].astype(str).str.contains(termo, na=False)
-        ]
-        self._preencher_treeview(df_filtrado)
+        self.executor.executar("enderecos-lista", self.service.carregar_para_busca,
+                               ao_concluir=self._ao_receber_enderecos, indicador=self.indicador)
+
+    def _ao_receber_enderecos(self, resultado):
+        self.df_atual, self.indice = resultado
+        self._preencher_treeview()
+        self._filtrar_tabela()  # Mantém o filtro que foi digitado enquanto carregava
+
+    def _preencher_treeview(self):
+        # Cada linha é inserida uma vez por carga, com a posição no índice como iid;
+        # a busca depois só pendura/despendura itens (ver _filtrar_tabela)
+        self.tree.delete(*self.tree.get_children())
+        self._visiveis = []
+        self._termo_aplicado = None
+        if not self.indice: return
+
+        for posicao, valores in enumerate(self.indice.linhas):
+            self.tree.insert("", "end", iid=posicao, values=valores)
+        self._visiveis = list(range(len(self.indice)))
+        self._termo_aplicado = ""
+
+    def _agendar_filtro(self, event=None):
+        if self._busca_agendada is not None:
+            self.after_cancel(self._busca_agendada)
+        self._busca_agendada = self.after(self.ESPERA_BUSCA_MS, self._filtrar_tabela)
+
+    def _filtrar_tabela(self):
+        self._busca_agendada = None
+        termo = self.entry_busca.get()
+        if self.indice is None or termo == self._termo_aplicado: return  # Ex.: setas e Shift não mudam o texto
+        self._termo_aplicado = termo
+
+        posicoes = self.indice.buscar(termo)
+        if posicoes == self._visiveis: return
+        novas = set(posicoes)
+        if novas.issubset(self._visiveis):
+            # Termo mais específico (o caso de quem está digitando): só tira as linhas que saíram
+            self.tree.detach(*[p for p in self._visiveis if p not in novas])
+        else:
+            # Troca a lista de filhos de uma vez: os que não estão nela são despendurados (não apagados)
+            self.tree.set_children("", *posicoes)
+        self._visiveis = posicoes
+        self.tree.yview_moveto(0)
 
     def _ao_clicar_tabela(self, event):
         item_selecionado = self.tree.focus()
         if not item_selecionado: return
         
-        valores = self.tree.item(item_selecionado, "values")
-        id_ponto = valores[0]
-        
-        # Busca os dados completos no dataframe carregado
-        linha = self.df_atual[self.df_atual['id_ponto'] == id_ponto].iloc[0]
+        # O iid é a posição da linha no dataframe carregado (dados completos, com o complemento)
+        linha = self.df_atual.iloc[int(item_selecionado)]
         
         self.limpar_form()
         self.entradas["id_ponto"].insert(0, str(linha['id_ponto']))
@@ -159,7 +189,12 @@ class CadastroEnderecoView(ctk.CTkFrame):
         dados = {key: entry.get() for key, entry in self.entradas.items()}
         dados['status'] = self.cb_status.get()
         
-        sucesso, msg = self.service.salvar_endereco(dados, self.usuario_logado)
+        self.executor.executar("enderecos-salvar", self.service.salvar_endereco, dados, self.usuario_logado,
+                               ao_concluir=self._ao_concluir_salvar,
+                               ao_falhar=lambda e: self._ao_concluir_salvar((False, f"Erro ao salvar: {e}")), indicador=self.indicador)
+
+    def _ao_concluir_salvar(self, resultado):
+        sucesso, msg = resultado
         if sucesso:
             messagebox.showinfo("Sucesso", msg)
             self.limpar_form()
@@ -169,11 +204,62 @@ class CadastroEnderecoView(ctk.CTkFrame):
             messagebox.showerror("Erro", msg)
 
     def acao_exportar(self):
-        sucesso, msg = self.service.exportar_excel()
+        filepath = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Planilha Excel", "*.xlsx")], title="Salvar Banco de Endereços")
+        if not filepath: return
+
+        # A base inteira é lida e gravada em lotes numa thread de trabalho
+        self.btn_exportar.configure(state="disabled")
+        self.executor.executar("enderecos-exportar", self.service.exportar_excel, filepath,
+                               ao_concluir=self._ao_concluir_exportar,
+                               ao_falhar=lambda e: self._ao_concluir_exportar((False, f"Erro ao exportar: {e}")), indicador=self.indicador)
+
+    def _ao_concluir_exportar(self, resultado):
+        self.btn_exportar.configure(state="normal")
+        sucesso, msg = resultado
         if sucesso:
             messagebox.showinfo("Sucesso", msg)
         else:
             messagebox.showwarning("Atenção", msg)
 
+    def acao_importar(self):
+        caminho = filedialog.askopenfilename(
+            title="Planilha de Endereços (uma linha por ponto)",
+            filetypes=[("Planilhas", "*.xlsx *.csv"), ("Excel", "*.xlsx"), ("CSV", "*.csv")]
+        )
+        if not caminho: return
+
+        self.btn_importar.configure(state="disabled", text="⏳ IMPORTANDO...")
+        self.executor.executar("enderecos-importar", self.service.importar_planilha, caminho, self.usuario_logado,
+                               ao_concluir=self._ao_concluir_importar,
+                               ao_falhar=lambda e: self._ao_concluir_importar((False, f"Erro inesperado na importação:\n{e}", [])),
+                               indicador=self.indicador)
+
+    def _ao_concluir_importar(self, resultado):
+        sucesso, msg, recusadas = resultado
+        self.btn_importar.configure(state="normal", text="📤 IMPORTAR PLANILHA")
+        if sucesso:
+            self._carregar_tabela()
+
+        if not recusadas:
+            (messagebox.showinfo if sucesso else messagebox.showerror)("Sucesso" if sucesso else "Erro", msg)
+            return
+        self._mostrar_recusadas(sucesso, msg, recusadas)
+
+    def _mostrar_recusadas(self, sucesso, msg, recusadas):
+        """Resumo da importação com o motivo de cada linha recusada da planilha."""
+        popup = ctk.CTkToplevel(self)
+        popup.title("Resultado da Importação de Endereços")
+        popup.geometry("800x600")
+        popup.grab_set()
+
+        ctk.CTkLabel(popup, text=msg, font=("Arial Bold", 15), text_color=COLOR_PRIMARY if sucesso else "#C21010", wraplength=740, justify="left").pack(pady=15, padx=20, anchor="w")
+
+        caixa = ctk.CTkTextbox(popup, font=("Consolas", 12), fg_color="#F9F9F9")
+        caixa.pack(fill="both", expand=True, padx=20, pady=10)
+        caixa.insert("end", "".join(f"✖ Linha {linha}: {texto}\n" for linha, _, texto in recusadas))
+        caixa.configure(state="disabled")
+
+        ctk.CTkButton(popup, text="Fechar", fg_color="gray", font=("Arial Bold", 15), height=45, command=popup.destroy).pack(fill="x", padx=40, pady=20)
+
 def renderizar(frame_destino, usuario_logado):
     return CadastroEnderecoView(master=frame_destino, usuario_logado=usuario_logado)
\ No newline at end of file
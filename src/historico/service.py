@@ -1,11 +1,12 @@
 from config.database import get_db_connection
+from src.shared.filtros_sql import condicao_contem, clausula_apos, clausula_periodo
 
 class HistoricoService:
-    def buscar_historico(self, filtros):
-        # Monta a query SQL com base nos filtros fornecidos
-        query = "SELECT modulo, numero, motivo, excluido_por, TO_CHAR(data_exclusao, 'DD/MM/YYYY HH24:MI'), dados FROM common.lixeira WHERE 1=1"
+    def _filtros(self, filtros):
+        # Monta o WHERE da busca (compartilhado entre a listagem paginada e a contagem)
+        query = " WHERE 1=1"
         params = []
-        
+
         if filtros.get("modulo") and filtros["modulo"] != "Todos":
             query += " AND modulo = %s"
             params.append(filtros["modulo"].upper())
@@ -13,19 +14,57 @@ class HistoricoService:
             query += " AND numero = %s"
             params.append(int(filtros["numero"]))
         if filtros.get("excluido_por"):
-            query += " AND excluido_por ILIKE %s"
+            query += f" AND {condicao_contem('excluido_por')}"
             params.append(f"%{filtros['excluido_por']}%")
         if filtros.get('data_inicio') and filtros.get('data_fim'):
-            query += " AND DATE(data_exclusao) BETWEEN %s AND %s"
-            params.extend([filtros['data_inicio'], filtros['data_fim']])
-            
-        query += " ORDER BY data_exclusao DESC"
-        
+            # Intervalo direto na coluna (usa o índice de data_exclusao)
+            clausula, params_periodo = clausula_periodo("data_exclusao", filtros['data_inicio'], filtros['data_fim'])
+            query += clausula
+            params.extend(params_periodo)
+        return query, params
+
+    def contar_historico(self, filtros):
+        # CONTAGEM SEPARADA (SÓ O NÚMERO, SEM TRAZER AS LINHAS)
+        where, params = self._filtros(filtros)
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT COUNT(*) FROM common.lixeira" + where, params)
+                    return cur.fetchone()[0]
+        except Exception as e:
+            print(f"[LOG DB] Erro ao contar a Lixeira: {e}")
+            raise Exception("Falha ao contar o histórico no banco de dados.")
+
+    def buscar_pagina(self, filtros, limite, apos=None):
+        """
+        Uma página da lixeira, só com as colunas da tabela (o JSON arquivado fica no banco até abrir os detalhes).
+        Devolve (linhas, chave_proxima_pagina); linha = (id, modulo, numero, motivo, excluido_por, data_exclusao).
+        """
+        where, params = self._filtros(filtros)
+        query = "SELECT id, modulo, numero, motivo, excluido_por, TO_CHAR(data_exclusao, 'DD/MM/YYYY HH24:MI'), data_exclusao FROM common.lixeira" + where
+        clausula, params_apos = clausula_apos("data_exclusao", "id", apos)
+        query += clausula + " ORDER BY data_exclusao DESC NULLS LAST, id DESC LIMIT %s"
+        params = params + params_apos + [int(limite)]
+
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute(query, params)
-                    return cur.fetchall()
+                    linhas = cur.fetchall()
+        except Exception as e:
+            print(f"[LOG DB] Erro ao buscar a Lixeira: {e}")
+            raise Exception("Falha ao buscar o histórico no banco de dados.")
+        chave = (linhas[-1][6], linhas[-1][0]) if linhas else None
+        return [linha[:6] for linha in linhas], chave
+
+    def buscar_dados_arquivados(self, id_registro):
+        # JSON completo do registro excluído (só quando os detalhes são abertos)
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT dados FROM common.lixeira WHERE id = %s", (id_registro,))
+                    linha = cur.fetchone()
+                    return linha[0] if linha else None
         except Exception as e:
-            print(f"Erro na Lixeira: {e}")
-            return []
\ No newline at end of file
+            print(f"[LOG DB] Erro ao buscar os dados arquivados: {e}")
+            raise Exception("Falha ao carregar os dados arquivados do banco.")
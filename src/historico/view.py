@@ -1,8 +1,11 @@
 import math
 import json
 import customtkinter as ctk
+from tkinter import messagebox
 from tkcalendar import DateEntry
 from src.historico.service import HistoricoService
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import IndicadorCarregamento, TabelaVirtual
 
 class HistoricoView(ctk.CTkFrame):
     def __init__(self, master, usuario_logado):
@@ -10,10 +13,15 @@ class HistoricoView(ctk.CTkFrame):
         self.pack(fill="both", expand=True)
 
         self.service = HistoricoService()
+        self.executor = obter_executor(self)
         self.filtros_widgets = {} 
-        self.dados_completos = []
+        self.dados_pagina = []
+        self.total_itens = 0
+        self.filtros_atuais = {}
+        self.chaves_paginas = [None] # Chave (data_exclusao, id) onde começa cada página já visitada
         self.pagina_atual = 1
-        self.itens_por_pagina = 25
+        self.pagina_exibida = 1 # Página cujos dados estão na tabela (volta para ela se a busca de outra falhar)
+        self.itens_por_pagina = 200 # A tabela é virtual: só as linhas visíveis viram widgets
 
         self._construir_interface()
         self.acao_buscar() 
@@ -50,6 +58,8 @@ class HistoricoView(ctk.CTkFrame):
         info_frame.pack(fill="x", padx=20, pady=(15, 5))
         self.lbl_contador = ctk.CTkLabel(info_frame, text="0 resultados", font=("Arial Bold", 14), text_color="#333333")
         self.lbl_contador.pack(side="left")
+        self.indicador = IndicadorCarregamento(info_frame)
+        self.indicador.pack(side="left", padx=15)
 
         pag_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
         pag_frame.pack(side="right")
@@ -65,9 +75,6 @@ class HistoricoView(ctk.CTkFrame):
         self.tabela_container.pack(fill="both", expand=True, padx=20, pady=(0, 15))
         self.header_frame = ctk.CTkFrame(self.tabela_container, fg_color="#0F8C75", corner_radius=6)
         self.header_frame.pack(fill="x", padx=5, pady=(5, 0))
-        self.scroll_tabela = ctk.CTkScrollableFrame(self.tabela_container, fg_color="transparent")
-        self.scroll_tabela.pack(fill="both", expand=True, padx=5, pady=5)
-
         self.headers = ["Módulo", "Nº", "Motivo (Justificativa)", "Excluído Por", "Data Exclusão", "Ações"]
         self.col_widths = [100, 60, 480, 160, 150, 100] 
 
@@ -76,6 +83,13 @@ class HistoricoView(ctk.CTkFrame):
             lbl = ctk.CTkLabel(self.header_frame, text=txt, width=self.col_widths[j], font=("Arial Bold", 13), text_color="white", anchor="w")
             lbl.pack(side="left", padx=5, pady=6)
 
+        # Linha = (id, modulo, numero, motivo, excluido_por, data_exclusao); o JSON é buscado ao abrir os detalhes
+        acoes = [{"texto": "🔍 Detalhes", "cor": "#14A1D9", "cor_hover": "#0F7FA8", "largura": 90, "fonte": ("Arial", 13),
+                  "comando": lambda linha: self._acao_detalhes(linha[0], linha[1], linha[2])}]
+        self.tabela = TabelaVirtual(self.tabela_container, self.col_widths[:-1], acoes=acoes, largura_acoes=self.col_widths[-1],
+                                    extrair_valores=lambda linha: linha[1:6], texto_vazio="O Histórico está vazio.")
+        self.tabela.pack(fill="both", expand=True, padx=5, pady=5)
+
     def _add_filtro_grid(self, parent, label, key, row, col, width=120):
         # Cria um frame para o filtro, com label e entry, e armazena a referência do widget no dicionário de filtros
         frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -102,54 +116,76 @@ class HistoricoView(ctk.CTkFrame):
         if self.usar_data_var.get():
             filtros['data_inicio'], filtros['data_fim'] = self.data_inicio.get_date(), self.data_fim.get_date()
 
-        self.dados_completos = self.service.buscar_historico(filtros)
-        self.lbl_contador.configure(text=f"{len(self.dados_completos)} registro(s) arquivado(s)")
+        self.filtros_atuais = filtros
         self.pagina_atual = 1
+        self.chaves_paginas = [None]
+        self._bloquear_paginacao()
+        # Contagem e primeira página rodam fora da thread do Tk; uma busca nova descarta o resultado da anterior
+        self.executor.executar("historico-busca", self._buscar_primeira_pagina, filtros, self.itens_por_pagina,
+                               ao_concluir=self._ao_receber_busca, ao_falhar=self._ao_falhar_busca, indicador=self.indicador)
+
+    def _buscar_primeira_pagina(self, filtros, limite):
+        return self.service.contar_historico(filtros), self.service.buscar_pagina(filtros, limite)
+
+    def _ao_receber_busca(self, resultado):
+        self.total_itens, pagina = resultado
+        self.lbl_contador.configure(text=f"{self.total_itens} registro(s) arquivado(s)")
+        self._ao_receber_pagina(1, pagina)
+
+    def _carregar_pagina(self):
+        # Busca no banco só as linhas da página atual (a partir da chave onde ela começa)
+        pagina = self.pagina_atual
+        self._bloquear_paginacao()
+        self.executor.executar("historico-busca", self.service.buscar_pagina, self.filtros_atuais, self.itens_por_pagina, self.chaves_paginas[pagina - 1],
+                               ao_concluir=lambda resultado: self._ao_receber_pagina(pagina, resultado),
+                               ao_falhar=self._ao_falhar_pagina, indicador=self.indicador)
+
+    def _ao_receber_pagina(self, pagina, resultado):
+        self.dados_pagina, chave_proxima = resultado
+        if len(self.chaves_paginas) == pagina:
+            self.chaves_paginas.append(chave_proxima)
+        self.pagina_exibida = pagina
         self._renderizar_pagina()
 
-    def _renderizar_pagina(self):
-        for w in self.scroll_tabela.winfo_children(): w.destroy()
+    def _ao_falhar_busca(self, erro):
+        # Busca nova falhou: a tabela antiga não corresponde mais aos filtros (nem às chaves de página)
+        self.total_itens = 0
+        self.dados_pagina = []
+        self.pagina_atual = self.pagina_exibida = 1
+        self.lbl_contador.configure(text="0 resultados")
+        self._renderizar_pagina()
+        messagebox.showerror("Erro", f"Falha ao buscar o histórico:\n{erro}")
 
-        total_itens = len(self.dados_completos)
+    def _ao_falhar_pagina(self, erro):
+        # Troca de página falhou: continua na página que está na tela (nenhuma chave nova foi guardada)
+        self.pagina_atual = self.pagina_exibida
+        self._renderizar_pagina()
+        messagebox.showerror("Erro", f"Falha ao buscar o histórico:\n{erro}")
+
+    def _bloquear_paginacao(self):
+        # Evita trocar de página enquanto a chave da próxima ainda não chegou
+        self.btn_ant.configure(state="disabled")
+        self.btn_prox.configure(state="disabled")
+
+    def _renderizar_pagina(self):
+        total_itens = self.total_itens
         total_paginas = math.ceil(total_itens / self.itens_por_pagina) if total_itens > 0 else 1
 
         self.lbl_paginacao.configure(text=f"{self.pagina_atual} / {total_paginas}")
         self.btn_ant.configure(state="normal" if self.pagina_atual > 1 else "disabled")
         self.btn_prox.configure(state="normal" if self.pagina_atual < total_paginas else "disabled")
-
-        if total_itens == 0: 
-            ctk.CTkLabel(self.scroll_tabela, text="O Histórico está vazio.", text_color="gray", font=("Arial", 14)).pack(pady=20)
-            return
-
-        inicio = (self.pagina_atual - 1) * self.itens_por_pagina
-        for i, linha in enumerate(self.dados_completos[inicio : inicio + self.itens_por_pagina]):
-            bg_color = "#F9F9F9" if i % 2 == 0 else "#FFFFFF"
-            linha_frame = ctk.CTkFrame(self.scroll_tabela, fg_color=bg_color, corner_radius=6)
-            linha_frame.pack(fill="x", pady=2, padx=2)
-
-            modulo, numero, motivo, excl_por, dt_excl, d_json = linha
-            valores_exibicao = [modulo, numero, motivo, excl_por, dt_excl]
-
-            for j, val in enumerate(valores_exibicao):
-                texto = str(val) if val is not None else "-"
-                limite = int(self.col_widths[j] / 8)
-                texto_curto = texto[:limite] + ".." if len(texto) > limite else texto
-
-                lbl = ctk.CTkLabel(linha_frame, text=texto_curto, width=self.col_widths[j], text_color="#333", font=("Arial", 12), anchor="w")
-                lbl.pack(side="left", padx=5, pady=6)
-
-            frame_botoes = ctk.CTkFrame(linha_frame, fg_color="transparent")
-            frame_botoes.pack(side="right", padx=5)
-
-            # Botão Único (Mostrar os dados originais Read-Only)
-            ctk.CTkButton(frame_botoes, text="🔍 Detalhes", fg_color="#14A1D9", hover_color="#0F7FA8", width=90, height=28, 
-                          command=lambda d=d_json, m=modulo, n=numero: self._mostrar_detalhes(m, n, d)).pack(side="left", padx=2)
+        self.tabela.definir_dados(self.dados_pagina if total_itens else [])
 
     def _proxima_pagina(self):
-        self.pagina_atual += 1; self._renderizar_pagina()
+        self.pagina_atual += 1; self._carregar_pagina()
 
     def _pagina_anterior(self):
-        self.pagina_atual -= 1; self._renderizar_pagina()
+        self.pagina_atual -= 1; self._carregar_pagina()
+
+    def _acao_detalhes(self, id_registro, modulo, numero):
+        self.executor.executar("historico-detalhes", self.service.buscar_dados_arquivados, id_registro,
+                               ao_concluir=lambda dados: self._mostrar_detalhes(modulo, numero, dados),
+                               ao_falhar=lambda e: messagebox.showerror("Erro", str(e)), indicador=self.indicador)
 
     def _mostrar_detalhes(self, modulo, numero, dados_json):
         """Transforma o JSON salvo no banco em um relatório legível e bonito na tela"""
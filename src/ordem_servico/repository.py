@@ -1,11 +1,29 @@
 import psycopg2
 from config.database import get_db_connection
 from datetime import datetime
+from src.shared.cache_enderecos import cache_enderecos, AUSENTE
+from src.shared.numeracao import reservar_numeros
+from src.shared.pontos_documentos import condicao_ponto, MODULO_OS
 
 class OSRepository:
     
+    @staticmethod
+    def _montar_endereco(logradouro, bairro, numero, complemento, is_ativo):
+        return {
+            "endereco": logradouro,
+            "bairro": bairro,
+            "numero": numero,
+            "complemento": complemento or "",
+            "status": "ATIVO" if is_ativo else "INATIVO"
+        }
+
     def buscar_endereco_por_id(self, id_procurado):
-        # BUSCA DE ENDEREÇO CADASTRADO PELO ID DO PONTO
+        # BUSCA DE ENDEREÇO CADASTRADO PELO ID DO PONTO (PRIMEIRO NO CACHE EM MEMÓRIA)
+        em_cache = cache_enderecos.obter(id_procurado)
+        if em_cache is not AUSENTE:
+            return em_cache
+
+        versao = cache_enderecos.versao()
         query = """
             SELECT logradouro, bairro, numero, complemento, is_ativo
             FROM sigp.enderecos_cadastrados 
@@ -16,99 +34,107 @@ class OSRepository:
                 with conn.cursor() as cursor:
                     cursor.execute(query, (id_procurado,))
                     resultado = cursor.fetchone()
-                    if resultado:
-                        return {
-                            "endereco": resultado[0],
-                            "bairro": resultado[1],
-                            "numero": resultado[2],
-                            "complemento": resultado[3] or "",
-                            "status": "ATIVO" if resultado[4] else "INATIVO"
-                        }
-            return None
+            dados = self._montar_endereco(*resultado) if resultado else None
+            cache_enderecos.guardar(id_procurado, dados, versao)
+            return dados
         except Exception as e:
             print(f"[LOG DB] Erro ao buscar endereço: {e}")
             raise Exception("Erro ao buscar endereço no banco de dados.")
 
-    def cadastrar_endereco(self, id_texto, endereco, numero, bairro, complemento, usuario):
-        # CADASTRO DE NOVO ENDEREÇO PARA UM PONTO (COM RESPONSÁVEL E DATA DE VISTORIA)
+    def aquecer_cache_enderecos(self):
+        # CARGA DE TODOS OS ENDEREÇOS NO CACHE (RODA EM SEGUNDO PLANO APÓS O LOGIN)
+        versao = cache_enderecos.versao()
         query = """
-            INSERT INTO sigp.enderecos_cadastrados 
-            (id_ponto, logradouro, numero, bairro, complemento, is_ativo, responsavel_vistoria, data_vistoria)
-            VALUES (%s, %s, %s, %s, %s, TRUE, %s, %s)
-        """
-        data_atual = datetime.now() 
-        params = (id_texto, endereco, numero, bairro, complemento, usuario, data_atual)
-        try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, params)
-            return True
-        except Exception as e:
-            print(f"[LOG DB] Erro ao cadastrar endereço: {e}")
-            raise Exception("Falha ao salvar o novo endereço no banco.")
-
-    def atualizar_endereco(self, id_texto, endereco, numero, bairro, complemento, usuario, reativar=False):
-        set_ativo = "is_ativo = TRUE," if reativar else ""
-        
-        # ATUALIZAÇÃO DE ENDEREÇO EXISTENTE (COM OPÇÃO DE REATIVAÇÃO)
-        query = f"""
-            UPDATE sigp.enderecos_cadastrados
-            SET logradouro=%s, numero=%s, bairro=%s, complemento=%s, {set_ativo}
-                responsavel_vistoria=%s, data_vistoria=%s
-            WHERE id_ponto=%s
+            SELECT id_ponto, logradouro, bairro, numero, complemento, is_ativo
+            FROM sigp.enderecos_cadastrados
+            ORDER BY data_vistoria DESC NULLS LAST
+            LIMIT %s
         """
-        
-        data_atual = datetime.now()
-        params = (endereco, numero, bairro, complemento, usuario, data_atual, id_texto)
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, params)
-            return True
+                    cursor.execute(query, (cache_enderecos.max_itens,))
+                    enderecos = {linha[0]: self._montar_endereco(*linha[1:]) for linha in cursor.fetchall()}
+            cache_enderecos.guardar_varios(enderecos, versao)
+            return len(enderecos)
         except Exception as e:
-            print(f"[LOG DB] Erro ao atualizar endereço: {e}")
-            raise Exception("Falha ao atualizar o endereço no banco.")
+            print(f"[LOG DB] Erro ao carregar o cache de endereços: {e}")
+            return 0
 
     def buscar_historico_os(self, id_procurado, limite=5):
         # BUSCA DO HISTÓRICO DE ORDEM DE SERVIÇO PARA UM PONTO (COM LIMITAÇÃO DE REGISTROS)
-        query = """
+        # Com a tabela de vínculos entram também as OS em que o ponto é ID adicional
+        condicao = condicao_ponto(MODULO_OS, "id") or "ponto_principal_id = %s"
+        query = f"""
             SELECT numero, TO_CHAR(data_criacao, 'DD/MM/YYYY'), acao_realizada, tipo_item, logradouro_completo, bairro, responsavel
             FROM sigp.ordens_servico
-            WHERE ponto_principal_id = %s
+            WHERE {condicao}
             ORDER BY data_criacao DESC
             LIMIT %s
         """
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (id_procurado, limite))
+                    cursor.execute(query, (str(id_procurado).strip(), limite))
                     return cursor.fetchall()
         except Exception as e:
             print(f"[LOG DB] Erro ao buscar histórico: {e}")
             return []
 
-    def obter_proximo_numero_os(self, pasta_final, ano_atual):
-        # GERAÇÃO DO PRÓXIMO NÚMERO DE ORDEM DE SERVIÇO PARA O MODELO SELECIONADO NO ANO ATUAL
-        query = """
+    def _reservar_numero_os(self, cursor, pasta_final, ano, quantidade=1):
+        # NUMERAÇÃO DA OS POR MODELO E ANO (CONTADOR ATÔMICO, SEMEADO PELO MAIOR NÚMERO JÁ GRAVADO)
+        semente = """
             SELECT MAX(numero)
             FROM sigp.ordens_servico
-            WHERE modelo_documento = %s AND EXTRACT(YEAR FROM data_criacao) = %s
+            WHERE modelo_documento = %s AND data_criacao >= make_date(%s, 1, 1) AND data_criacao < make_date(%s + 1, 1, 1)
         """
+        return reservar_numeros(cursor, "SIGP", f"OS:{pasta_final}", ano, semente, (pasta_final, ano, ano), quantidade)
+
+    def salvar_os_com_enderecos(self, ids_pontos, form_dados, usuario, dados_os):
+        # GRAVA OS ENDEREÇOS DE TODOS OS PONTOS E A ORDEM DE SERVIÇO NUMA ÚNICA TRANSAÇÃO
+        # (se qualquer parte falhar, nada é gravado: nem endereço pela metade, nem OS sem endereço)
+        # O número da OS é reservado dentro da mesma transação e retornado
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (pasta_final, int(ano_atual)))
-                    resultado = cursor.fetchone()
-                    if resultado and resultado[0] is not None:
-                        return resultado[0] + 1
-                    return 1
+                    self._upsert_enderecos(cursor, ids_pontos, form_dados, usuario)
+                    data_str, pasta_escolhida = dados_os[0], dados_os[13]
+                    ano = datetime.strptime(data_str, "%d/%m/%Y").year
+                    numero_os = self._reservar_numero_os(cursor, pasta_escolhida, ano)
+                    self._inserir_os(cursor, numero_os, dados_os)
+            return numero_os
         except Exception as e:
-            print(f"[LOG DB] Erro ao gerar numeração da OS: {e}")
-            return 1
+            print(f"[LOG DB] Erro ao salvar OS final: {e}")
+            raise Exception("Falha ao registrar a Ordem de Serviço no banco de dados.")
+        finally:
+            cache_enderecos.invalidar(*ids_pontos)
 
-    def salvar_os(self, dados_os):
-        # SALVA A ORDEM DE SERVIÇO NO BANCO DE DADOS (COM A ORIGEM DA DEMANDA)
-        (numero_os, data_str, id_principal, ids_formatado,
+    def _upsert_enderecos(self, cursor, ids_pontos, form_dados, usuario):
+        # CADASTRA OS PONTOS NOVOS E ATUALIZA (REATIVANDO SE PRECISO) OS EXISTENTES, TUDO EM UM COMANDO
+        if not ids_pontos: return
+        query = """
+            INSERT INTO sigp.enderecos_cadastrados
+            (id_ponto, logradouro, numero, bairro, complemento, is_ativo, responsavel_vistoria, data_vistoria)
+            SELECT t.id_ponto, %s, %s, %s, %s, TRUE, %s, %s
+            FROM (SELECT DISTINCT unnest(%s::text[]) AS id_ponto) AS t
+            ON CONFLICT (id_ponto) DO UPDATE SET
+                logradouro = EXCLUDED.logradouro,
+                numero = EXCLUDED.numero,
+                bairro = EXCLUDED.bairro,
+                complemento = EXCLUDED.complemento,
+                is_ativo = TRUE,
+                responsavel_vistoria = EXCLUDED.responsavel_vistoria,
+                data_vistoria = EXCLUDED.data_vistoria
+        """
+        params = (
+            form_dados['endereco'], form_dados['numero'], form_dados['bairro'], form_dados['complemento'],
+            usuario, datetime.now(), list(ids_pontos)
+        )
+        cursor.execute(query, params)
+
+    def _inserir_os(self, cursor, numero_os, dados_os):
+        # INSERE A ORDEM DE SERVIÇO (COM A ORIGEM DA DEMANDA)
+        (data_str, id_principal, ids_formatado,
          tipo_os, _lixo1, tipo_item, _lixo2,
          endereco_completo, bairro_str, _lixo3,
          complemento_str, descricoes, usuario_logado, pasta_escolhida, origem_demanda) = dados_os
@@ -127,12 +153,4 @@ class OSRepository:
             tipo_os, tipo_item, endereco_completo, bairro_str,
             complemento_str, descricoes, usuario_logado, pasta_escolhida, origem_demanda
         )
-
-        try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, params)
-            return True
-        except Exception as e:
-            print(f"[LOG DB] Erro ao salvar OS final: {e}")
-            raise Exception("Falha ao registrar a Ordem de Serviço no banco de dados.")
\ No newline at end of file
+        cursor.execute(query, params)
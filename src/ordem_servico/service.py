@@ -1,10 +1,10 @@
 import os
 import unicodedata
 from datetime import datetime
-from docx import Document
-from docx.shared import Inches
 from src.ordem_servico.repository import OSRepository
 from config.settings import RAIZ_REDE
+from src.shared.modelos_docx import obter_modelo
+from src.shared.fila_envio import fila_envio
 
 # Tenta puxar o utils da raiz ou da pasta shared
 try:
@@ -61,9 +61,7 @@ class OSService:
         # ---> NOVO CAMINHO DINÂMICO E INTELIGENTE DA REDE <---
         ano_atual = datetime.now().strftime('%Y')
         
-        # Só bloqueia se o Servidor/Rede estiver fora do ar. As pastas do ano ele cria sozinho!
-        if not os.path.exists(RAIZ_REDE):
-            return False, f"A raiz da rede não está acessível no momento. Verifique a conexão:\n{RAIZ_REDE}"
+        # A rede não é consultada aqui: o Word vai para a fila local e é copiado para lá em segundo plano
 
         if pasta_escolhida == "URBMIDIA":
             pasta_base = rf"{RAIZ_REDE}\SIGP\{ano_atual}\ORDENS DE SERVICO\URBMIDIA"
@@ -74,24 +72,6 @@ class OSService:
         ids_formatado = "-".join(ids_unicos)
         id_principal = descricoes_acumuladas[0]["id"]
 
-        for id_atual in ids_unicos:
-            dados_id = self.repo.buscar_endereco_por_id(id_atual)
-            try:
-                if not dados_id:
-                    self.repo.cadastrar_endereco(
-                        id_atual, form_dados['endereco'], form_dados['numero'], 
-                        form_dados['bairro'], form_dados['complemento'], usuario_logado
-                    )
-                else:
-                    reativar = dados_id["status"].strip().upper() == "INATIVO"
-                    self.repo.atualizar_endereco(
-                        id_atual, form_dados['endereco'], form_dados['numero'], 
-                        form_dados['bairro'], form_dados['complemento'], usuario_logado, reativar=reativar
-                    )
-            except Exception as e:
-                return False, f"Erro ao gerenciar endereços no banco:\n{str(e)}"
-
-        numero_os = self.repo.obter_proximo_numero_os(pasta_escolhida, ano_atual)
         data_str = datetime.now().strftime("%d/%m/%Y")
 
         endereco_completo = descricoes_acumuladas[0]["descricao"].split(" NA ")[-1].split(",")[0].strip()
@@ -112,7 +92,7 @@ class OSService:
         tipo_item_up = str(tipo_item).strip().upper() if tipo_item else ""
 
         dados_salvar_os = (
-            numero_os, data_str, id_principal, ids_formatado,
+            data_str, id_principal, ids_formatado,
             tipo_os_up, self.normalizar(tipo_os_up),
             tipo_item_up, self.normalizar(tipo_item_up),
             endereco_completo, bairro_str, self.normalizar(bairro_str),
@@ -120,10 +100,11 @@ class OSService:
             usuario_logado, pasta_escolhida, origem_demanda 
         )
 
+        # Endereços de todos os IDs + número + OS numa única transação no banco
         try:
-            self.repo.salvar_os(dados_salvar_os)
+            numero_os = self.repo.salvar_os_com_enderecos(ids_unicos, form_dados, usuario_logado, dados_salvar_os)
         except Exception as e:
-            return False, f"Erro Crítico! A OS NÃO foi gerada pois houve falha no Banco de Dados:\n{str(e)}"
+            return False, f"Erro Crítico! A OS NÃO foi gerada pois houve falha no Banco de Dados (nenhum endereço foi alterado):\n{str(e)}"
 
         nome_pasta = f"{numero_os:03d}-{datetime.now().strftime('%m')}-{ano_atual}-ID{'-'.join(ids_unicos) if ids_unicos else 'EMERGENCIA'}"
         caminho_pasta = os.path.join(pasta_base, nome_pasta)
@@ -131,49 +112,34 @@ class OSService:
         destino_docx = os.path.join(caminho_pasta, nome_arquivo)
 
         try:
-            os.makedirs(caminho_pasta, exist_ok=True)
             caminho_modelo = resource_path(modelo_escolhido)
-            self._gerar_documento_modelo(caminho_modelo, destino_docx, numero_os, data_str, id_principal, descricoes_acumuladas)
+            caminho_local = fila_envio.caminho_local(destino_docx)
+            self._gerar_documento_modelo(caminho_modelo, caminho_local, numero_os, data_str, id_principal, descricoes_acumuladas)
+            fila_envio.enfileirar(caminho_local, destino_docx)
             
-            return True, f"Ordem de Serviço Nº {numero_os:03d} criada e registrada com sucesso!\nSalva em:\n{destino_docx}"
+            return True, f"Ordem de Serviço Nº {numero_os:03d} criada e registrada com sucesso!\nSalva em (cópia para a rede em segundo plano):\n{destino_docx}"
             
         except Exception as e:
-            return False, f"Atenção: A OS foi registrada no banco, mas houve falha ao gerar o documento Word na rede:\n{e}"
+            return False, f"Atenção: A OS foi registrada no banco, mas houve falha ao gerar o documento Word:\n{e}"
 
     # =========================================================
     # MANIPULAÇÃO DO WORD (DOCX)
     # =========================================================
     def _gerar_documento_modelo(self, modelo_path, destino_path, numero_os, data_str, id_texto, descricoes):
-        """Abre o modelo do Word, substitui as tags e gera a tabela de descrições."""
-        doc = Document(modelo_path)
+        """Gera a OS a partir do modelo pré-compilado: troca as tags e repete a linha da tabela de descrições."""
+        modelo = obter_modelo(modelo_path, self._preparar_tabela_descricoes)
         mapeamento = {
             "{{NUMERO_OS}}": f"{numero_os:03d}",
             "{{DATA}}": data_str,
             "{{ID}}": id_texto if id_texto.strip() else "-"
         }
-        
-        for paragrafo in doc.paragraphs:
-            texto_original = "".join(run.text for run in paragrafo.runs)
-            novo_texto = texto_original
-            for chave, valor in mapeamento.items():
-                if chave in novo_texto:
-                    novo_texto = novo_texto.replace(chave, valor)
-            if novo_texto != texto_original:
-                for run in paragrafo.runs: run.text = ""
-                if paragrafo.runs: paragrafo.runs[0].text = novo_texto
-
-        for tabela in doc.tables:
-            for linha in tabela.rows:
-                for celula in linha.cells:
-                    for paragrafo in celula.paragraphs:
-                        texto_original = "".join(run.text for run in paragrafo.runs)
-                        novo_texto = texto_original
-                        for chave, valor in mapeamento.items():
-                            if chave in novo_texto:
-                                novo_texto = novo_texto.replace(chave, valor)
-                        if novo_texto != texto_original:
-                            for run in paragrafo.runs: run.text = ""
-                            if paragrafo.runs: paragrafo.runs[0].text = novo_texto
+        linhas = [{"{{LINHA.ID}}": item['id'], "{{LINHA.DESCRICAO}}": item['descricao']} for item in descricoes]
+        modelo.gerar(destino_path, mapeamento, linhas)
+
+    @staticmethod
+    def _preparar_tabela_descricoes(doc):
+        """Roda uma vez por modelo: troca o parágrafo {{DESCRICAO}} pela tabela (cabeçalho + linha que se repete)."""
+        from docx.shared import Inches
 
         for paragrafo in doc.paragraphs:
             if "{{DESCRICAO}}" in paragrafo.text:
@@ -189,13 +155,10 @@ class OSService:
                 hdr_cells[0].text = 'ID'
                 hdr_cells[1].text = 'DESCRIÇÃO'
                 
-                for item in descricoes:
-                    row_cells = tabela.add_row().cells
-                    row_cells[0].text = item['id']
-                    row_cells[1].text = item['descricao']
+                row_cells = tabela.add_row().cells
+                row_cells[0].text = "{{LINHA.ID}}"
+                row_cells[1].text = "{{LINHA.DESCRICAO}}"
                 
                 p.addnext(tabela._element)
                 parent.remove(p)
-                break
-        
-        doc.save(destino_path)
\ No newline at end of file
+                break
\ No newline at end of file
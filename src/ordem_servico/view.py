@@ -1,6 +1,8 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from src.ordem_servico.service import OSService
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import IndicadorCarregamento
 
 class OSView(ctk.CTkFrame):
     def __init__(self, master, usuario_logado):
@@ -8,6 +10,7 @@ class OSView(ctk.CTkFrame):
         self.pack(fill="both", expand=True)
 
         self.service = OSService()
+        self.executor = obter_executor(self)
         self.usuario_logado = usuario_logado.get('nome') if isinstance(usuario_logado, dict) else usuario_logado
         self.descricoes_acumuladas = []
 
@@ -57,6 +60,8 @@ class OSView(ctk.CTkFrame):
 
         self.id_entry = self._criar_campo(row2, "ID do Ponto", width=250, side="left")
         self.id_entry.bind("<FocusOut>", self.ao_sair_do_id)
+        self.indicador = IndicadorCarregamento(row2, texto="⏳ Consultando...")
+        self.indicador.pack(side="left", padx=10, pady=(18, 0))
 
         # Linha 3: Endereço, Número
         row3 = ctk.CTkFrame(form_frame, fg_color="transparent")
@@ -91,7 +96,8 @@ class OSView(ctk.CTkFrame):
         self.criado_por_label = ctk.CTkLabel(footer_frame, text=f"Responsável: {self.usuario_logado}", font=("Arial", 12), text_color="gray")
         self.criado_por_label.pack(side="left", padx=10)
 
-        ctk.CTkButton(footer_frame, text="✅ GERAR ORDEM DE SERVIÇO", fg_color="#0F8C75", font=("Arial Bold", 16), height=50, width=300, command=self.acao_criar_os).pack(side="right", padx=10)
+        self.btn_gerar = ctk.CTkButton(footer_frame, text="✅ GERAR ORDEM DE SERVIÇO", fg_color="#0F8C75", font=("Arial Bold", 16), height=50, width=300, command=self.acao_criar_os)
+        self.btn_gerar.pack(side="right", padx=10)
 
     # --- UTILITÁRIOS VISUAIS ---
     def _criar_campo(self, parent, label_text, width, side="top"):
@@ -122,9 +128,16 @@ class OSView(ctk.CTkFrame):
     def ao_sair_do_id(self, event=None):
         id_digitado = self.id_entry.get().strip().upper()
         if not id_digitado: return
-        
-        dados = self.service.consultar_endereco(id_digitado)
-        
+
+        # Consulta fora da thread do Tk: o foco já passou para o próximo campo enquanto o banco responde
+        self.executor.executar("os-endereco", self.service.consultar_endereco, id_digitado,
+                               ao_concluir=lambda dados: self._preencher_endereco(id_digitado, dados),
+                               ao_falhar=lambda e: messagebox.showerror("Erro", str(e)), indicador=self.indicador)
+
+    def _preencher_endereco(self, id_consultado, dados):
+        # O usuário pode ter trocado o ID enquanto a consulta rodava
+        if self.id_entry.get().strip().upper() != id_consultado: return
+
         self.endereco_entry.delete(0, ctk.END)
         self.numero_entry.delete(0, ctk.END)
         self.bairro_entry.delete(0, ctk.END)
@@ -190,8 +203,9 @@ class OSView(ctk.CTkFrame):
         if id_digitado:
              resposta = messagebox.askyesno("Verificação de ID", f"Você já consultou o histórico do ID {id_digitado}?\nSe não, clique em NÃO para ver agora.")
              if not resposta:
-                 historico = self.service.obter_historico_formatado(id_digitado)
-                 messagebox.showinfo(f"Histórico ID {id_digitado}", historico)
+                 self.executor.executar("os-historico", self.service.obter_historico_formatado, id_digitado,
+                                        ao_concluir=lambda historico: messagebox.showinfo(f"Histórico ID {id_digitado}", historico),
+                                        ao_falhar=lambda e: messagebox.showerror("Erro", str(e)), indicador=self.indicador)
                  return
 
         form_dados = {
@@ -204,17 +218,26 @@ class OSView(ctk.CTkFrame):
         modelo = "dados/modelo_etufor_urbmidia.docx" if self.pasta_escolhida_var.get() == "URBMIDIA" else "dados/modelo_etufor_prxparada.docx"
 
         # ---> NOVO: Passando a Origem selecionada para o Service
-        sucesso, mensagem = self.service.processar_criacao_os(
-            descricoes_acumuladas=self.descricoes_acumuladas,
+        # Banco + geração do Word na rede rodam fora da thread do Tk; o botão fica travado até terminar
+        self.btn_gerar.configure(state="disabled", text="⏳ GERANDO...")
+        self.executor.executar(
+            "os-criar", self.service.processar_criacao_os,
+            descricoes_acumuladas=list(self.descricoes_acumuladas),
             pasta_escolhida=self.pasta_escolhida_var.get(),
             modelo_escolhido=modelo,
             tipo_os=self.tipo_os_var.get(),
             tipo_item=self.tipo_item_var.get(),
             form_dados=form_dados,
             usuario_logado=self.usuario_logado,
-            origem_demanda=self.origem_var.get() 
+            origem_demanda=self.origem_var.get(),
+            ao_concluir=self._ao_concluir_criacao,
+            ao_falhar=lambda e: self._ao_concluir_criacao((False, f"Erro inesperado ao gerar a OS:\n{e}"))
         )
 
+    def _ao_concluir_criacao(self, resultado):
+        sucesso, mensagem = resultado
+        self.btn_gerar.configure(state="normal", text="✅ GERAR ORDEM DE SERVIÇO")
+
         if sucesso:
             messagebox.showinfo("OS Gerada com Sucesso!", mensagem)
             self.id_entry.delete(0, ctk.END)
@@ -1,33 +1,27 @@
 import psycopg2
+from psycopg2.extras import execute_values
 from config.database import get_db_connection
+from src.shared.numeracao import reservar_numeros
 
 class ParecerRepository:
     
-    def obter_proximo_numero(self, ano):
-        """Calcula o próximo número do parecer para o SIGP no ano atual consultando a Tabela Mãe."""
-        query = "SELECT MAX(numero_parecer_ano) FROM common.pareceres_base WHERE ano = %s AND sistema_origem = 'SIGP'"
-        try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, (ano,))
-                    resultado = cursor.fetchone()
-                    if resultado and resultado[0] is not None:
-                        return resultado[0] + 1
-                    return 1
-        except Exception as e:
-            print(f"[LOG DB] Erro ao buscar número do parecer: {e}")
-            raise Exception("Falha ao calcular a numeração do parecer.")
+    def _reservar_numero(self, cursor, ano, quantidade=1):
+        """Reserva o(s) próximo(s) número(s) de parecer do SIGP no ano (contador atômico, semeado pela Tabela Mãe)."""
+        semente = "SELECT MAX(numero_parecer_ano) FROM common.pareceres_base WHERE ano = %s AND sistema_origem = 'SIGP'"
+        return reservar_numeros(cursor, "SIGP", "PARECER", ano, semente, (ano,), quantidade)
 
-    def salvar_parecer(self, dados_banco):
+    def salvar_parecer(self, dados_banco, montar_caminho):
         """
         Salva na Tabela Mãe (common.pareceres_base) e na Tabela Filha (sigp.pareceres) 
         em uma única transação segura (Duplo Insert).
+        O número é reservado na mesma transação; montar_caminho(numero) dá o caminho do .docx.
+        Retorna (numero, caminho_arquivo).
         """
         
         # Desempacota os dados exatos que o seu Service manda
-        (numero, ano, data_criacao, tipo_parecer, processo, 
+        (ano, data_criacao, tipo_parecer, processo, 
          assunto, ids_joined, tipo_exec, item, endereco, 
-         solicitante, motivo, quantidade, caminho_arquivo, usuario_logado, origem_demanda) = dados_banco
+         solicitante, motivo, quantidade, usuario_logado, origem_demanda) = dados_banco
 
         try:
             with get_db_connection() as conn:
@@ -38,6 +32,9 @@ class ParecerRepository:
                     user_row = cursor.fetchone()
                     usuario_id = user_row[0] if user_row else None
 
+                    numero = self._reservar_numero(cursor, ano)
+                    caminho_arquivo = montar_caminho(numero)
+
                     # INSERE NA TABELA MÃE e pega o ID gerado usando 'RETURNING id'
                     query_mae = """
                         INSERT INTO common.pareceres_base 
@@ -67,8 +64,60 @@ class ParecerRepository:
                     # Confirma a transação
                     conn.commit()
                     
-            return True
+            return numero, caminho_arquivo
             
         except Exception as e:
             print(f"[LOG DB] Erro ao salvar parecer duplo: {e}")
-            raise Exception(f"Erro ao registrar o Parecer no Banco de Dados: {e}")
\ No newline at end of file
+            raise Exception(f"Erro ao registrar o Parecer no Banco de Dados: {e}")
+
+    def salvar_pareceres_em_lote(self, lista_dados_banco, montar_caminho):
+        """
+        Grava vários pareceres (mesmo formato de dados_banco, todos do mesmo ano) numa transação só:
+        os números são reservados em bloco e as Tabelas Mãe/Filha recebem um INSERT cada.
+        montar_caminho(indice, numero) dá o caminho do .docx. Retorna [(numero, caminho_arquivo)] na ordem recebida.
+        """
+        if not lista_dados_banco:
+            return []
+        ano = lista_dados_banco[0][0]
+        usuario_logado = lista_dados_banco[0][12]
+
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT id FROM common.usuarios WHERE nome_completo = %s OR username = %s LIMIT 1", (usuario_logado, usuario_logado))
+                    user_row = cursor.fetchone()
+                    usuario_id = user_row[0] if user_row else None
+
+                    primeiro = self._reservar_numero(cursor, ano, quantidade=len(lista_dados_banco))
+                    numeros = [primeiro + i for i in range(len(lista_dados_banco))]
+                    caminhos = [montar_caminho(i, numero) for i, numero in enumerate(numeros)]
+
+                    # TABELA MÃE: o número identifica cada linha devolvida pelo RETURNING
+                    ids_mae = dict(execute_values(cursor, """
+                        INSERT INTO common.pareceres_base (sistema_origem, numero_parecer_ano, ano, criado_por_id)
+                        VALUES %s
+                        RETURNING numero_parecer_ano, id
+                    """, [("SIGP", numero, ano, usuario_id) for numero in numeros], fetch=True))
+
+                    # TABELA FILHA
+                    linhas_filha = []
+                    for numero, caminho, dados in zip(numeros, caminhos, lista_dados_banco):
+                        (_ano, _data, tipo_parecer, processo, assunto, ids_joined, tipo_exec, item, endereco,
+                         solicitante, motivo, quantidade, _usuario, origem_demanda) = dados
+                        linhas_filha.append((
+                            ids_mae[numero], tipo_parecer, processo, assunto, solicitante, ids_joined,
+                            tipo_exec, item, endereco, motivo, quantidade, caminho, origem_demanda
+                        ))
+                    execute_values(cursor, """
+                        INSERT INTO sigp.pareceres (
+                            id, tipo_parecer, processo, assunto, solicitante, ids_pontos,
+                            tipo_execucao, item, endereco_vistoria, motivo_indeferimento,
+                            quantidade, caminho_arquivo_docx, origem_demanda
+                        ) VALUES %s
+                    """, linhas_filha)
+
+            return list(zip(numeros, caminhos))
+
+        except Exception as e:
+            print(f"[LOG DB] Erro ao salvar lote de pareceres: {e}")
+            raise Exception(f"Erro ao registrar o lote de Pareceres no Banco de Dados: {e}")
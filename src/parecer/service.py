@@ -1,8 +1,10 @@
 import os
+import unicodedata
 from datetime import datetime
-from docx import Document
 from src.parecer.repository import ParecerRepository
-from config.settings import RAIZ_REDE
+from config.settings import RAIZ_REDE, LOTE_PARECER_PROCESSOS, LOTE_PARECER_MINIMO_PROCESSOS
+from src.shared.modelos_docx import obter_modelo
+from src.shared.fila_envio import fila_envio
 
 try:
     from src.shared.utils import resource_path
@@ -13,10 +15,8 @@ class ParecerService:
     def __init__(self):
         self.repo = ParecerRepository()
 
-    def processar_geracao_parecer(self, dados_form, ids_list, usuario_logado):
-        if not ids_list:
-            return False, "Adicione ao menos um ID antes de gerar o parecer."
-
+    def _preparar_parecer(self, dados_form, ids_list, usuario_logado, data_atual):
+        """Regras comuns ao parecer avulso e ao lote: campos padrão, plural do item, modelo e pasta de saída."""
         # Extrai os dados do formulário
         origem = dados_form['origem']
         tipo_parecer = dados_form['tipo']
@@ -30,7 +30,6 @@ class ParecerService:
         quantidade = dados_form['quantidade'] or "-"
         
         ids_joined = ", ".join(ids_list)
-        data_atual = datetime.now()
         ano = data_atual.year
         data_str = data_atual.strftime("%d/%m/%Y")
 
@@ -46,93 +45,228 @@ class ParecerService:
         if not (quantidade_normalizada.startswith("um") or quantidade_normalizada.startswith("uma")):
             item = plurais.get(item, item)
 
-        # Pega o número do parecer
-        try:
-            numero = self.repo.obter_proximo_numero(ano)
-        except Exception as e:
-            return False, str(e)
-
         # Prepara Caminhos do Arquivo Word
         modelo = resource_path(os.path.join("dados", "modelo_deferido.docx")) if tipo_parecer == "Deferido" else resource_path(os.path.join("dados", "modelo_indeferido.docx"))
-        
-        if not os.path.exists(modelo):
-            return False, f"Modelo Word não encontrado em: {modelo}"
-        
-        # Só bloqueia se o Servidor/Rede estiver fora do ar.
-        if not os.path.exists(RAIZ_REDE):
-            return False, f"A raiz da rede não está acessível no momento. Verifique a conexão:\n{RAIZ_REDE}"
-
         pasta_base = rf"{RAIZ_REDE}\SIGP\{ano}\PARECERES TECNICOS"
         pasta_saida = os.path.join(pasta_base, tipo_parecer.upper())
-        
-        nome_arquivo = f"Parecer_{numero:03d}_{ano}_{tipo_parecer}.docx"
-        caminho_arquivo = os.path.join(pasta_saida, nome_arquivo)
 
         # Prepara os dados para o banco (Com a ORIGEM no final)
         dados_banco = (
-            numero, ano, data_atual.date(), tipo_parecer.upper(), processo, 
+            ano, data_atual.date(), tipo_parecer.upper(), processo, 
             assunto, ids_joined, tipo_exec, item, endereco, 
             solicitante, motivo if tipo_parecer == "Indeferido" else None, 
-            quantidade, caminho_arquivo, usuario_logado, origem 
+            quantidade, usuario_logado, origem 
         )
+        # Tags do Word (o {{NUM_PARECER}} entra depois que o banco reserva o número)
+        tags = {
+            "{{DATA}}": data_str,
+            "{{PROCESSO}}": processo,
+            "{{ASSUNTO}}": assunto,
+            "{{SOLICITANTE}}": solicitante,
+            "{{ID}}": ids_joined,
+            "{{TIPO}}": tipo_exec,
+            "{{ITEM}}": item,
+            "{{ENDERECO}}": endereco,
+            "{{MOTIVO}}": motivo,
+            "{{QUANTIDADE}}": quantidade
+        }
+
+        # O número (e com ele o nome do arquivo) é reservado pelo banco na hora de gravar
+        def montar_caminho(numero):
+            return os.path.join(pasta_saida, f"Parecer_{numero:03d}_{ano}_{tipo_parecer}.docx")
+
+        return dados_banco, tags, modelo, montar_caminho
+
+    def processar_geracao_parecer(self, dados_form, ids_list, usuario_logado):
+        if not ids_list:
+            return False, "Adicione ao menos um ID antes de gerar o parecer."
 
+        data_atual = datetime.now()
+        ano = data_atual.year
+        dados_banco, tags, modelo, montar_caminho = self._preparar_parecer(dados_form, ids_list, usuario_logado, data_atual)
+        
+        if not os.path.exists(modelo):
+            return False, f"Modelo Word não encontrado em: {modelo}"
+        
         # GERAÇÃO SEGURA (BANCO DE DADOS PRIMEIRO)
         try:
-            self.repo.salvar_parecer(dados_banco)
+            numero, caminho_arquivo = self.repo.salvar_parecer(dados_banco, montar_caminho)
         except Exception as e:
             return False, f"Erro Crítico! O Parecer NÃO foi gerado pois houve falha no Banco de Dados:\n{str(e)}"
 
-        # SE O BANCO DEU CERTO -> GERA A PASTA E O WORD
+        # SE O BANCO DEU CERTO -> GERA O WORD NA FILA LOCAL (A CÓPIA PARA A REDE, COM A PASTA DO ANO, É EM SEGUNDO PLANO)
         try:
-            # AQUI VAI CRIAR A PASTA DO ANO CASO NÃO EXISTA
-            os.makedirs(pasta_saida, exist_ok=True)
-            self._gerar_documento_word(modelo, caminho_arquivo, {
-                "{{NUM_PARECER}}": f"{numero:03d}",
-                "{{DATA}}": data_str,
-                "{{PROCESSO}}": processo,
-                "{{ASSUNTO}}": assunto,
-                "{{SOLICITANTE}}": solicitante,
-                "{{ID}}": ids_joined,
-                "{{TIPO}}": tipo_exec,
-                "{{ITEM}}": item,
-                "{{ENDERECO}}": endereco,
-                "{{MOTIVO}}": motivo,
-                "{{QUANTIDADE}}": quantidade
-            })
+            caminho_local = fila_envio.caminho_local(caminho_arquivo)
+            self._gerar_documento_word(modelo, caminho_local, {"{{NUM_PARECER}}": f"{numero:03d}", **tags})
+            fila_envio.enfileirar(caminho_local, caminho_arquivo)
             
-            return True, f"Parecer {numero:03d}/{ano} criado e registrado com sucesso!\nSalvo em:\n{caminho_arquivo}"
+            return True, f"Parecer {numero:03d}/{ano} criado e registrado com sucesso!\nSalvo em (cópia para a rede em segundo plano):\n{caminho_arquivo}"
             
         except Exception as e:
             return False, f"Atenção: O Parecer foi registrado no banco, mas houve falha ao gerar o documento Word:\n{e}"
 
+    # =========================================================
+    # GERAÇÃO EM LOTE (PLANILHA CSV/XLSX)
+    # =========================================================
+    # Cabeçalho da planilha (sem acento, maiúsculo) -> campo do formulário
+    COLUNAS_LOTE = {
+        "ORIGEM": "origem",
+        "TIPO": "tipo", "TIPO DO PARECER": "tipo", "DECISAO": "tipo",
+        "PROCESSO": "processo", "N DO PROCESSO": "processo", "NO DO PROCESSO": "processo",
+        "ASSUNTO": "assunto",
+        "SOLICITANTE": "solicitante",
+        "ACAO": "tipo_execucao", "ACAO RECOMENDADA": "tipo_execucao", "TIPO DE EXECUCAO": "tipo_execucao",
+        "ITEM": "item", "TIPO DE ITEM": "item",
+        "ENDERECO": "endereco", "ENDERECO COMPLETO": "endereco",
+        "QUANTIDADE": "quantidade",
+        "IDS": "ids", "ID": "ids", "IDS DOS PONTOS": "ids",
+        "MOTIVO": "motivo", "MOTIVO DO INDEFERIMENTO": "motivo",
+    }
+
+    @staticmethod
+    def _normalizar_cabecalho(texto):
+        nfkd = unicodedata.normalize('NFKD', str(texto))
+        sem_acentos = "".join(c for c in nfkd if not unicodedata.combining(c))
+        return " ".join(sem_acentos.replace("º", "").replace("°", "").replace(".", " ").upper().split())
+
+    def _ler_planilha_lote(self, caminho):
+        """Lê a planilha e devolve [(linha_na_planilha, dados_form, ids_list)] + lista de erros de validação."""
+        import pandas as pd  # Import adiado: pandas só é carregado quando um lote é importado
+
+        if caminho.lower().endswith(".csv"):
+            # sep=None descobre sozinho se o separador é ';' (Excel em português) ou ','
+            df = pd.read_csv(caminho, sep=None, engine="python", dtype=str, encoding="utf-8-sig", keep_default_na=False)
+        else:
+            df = pd.read_excel(caminho, dtype=str, keep_default_na=False)
+
+        colunas = {c: self.COLUNAS_LOTE.get(self._normalizar_cabecalho(c)) for c in df.columns}
+        faltando = {"tipo", "ids"} - set(colunas.values())
+        if faltando:
+            return [], [f"Coluna obrigatória ausente na planilha: {', '.join(sorted(c.upper() for c in faltando))}"]
+
+        linhas, erros = [], []
+        for indice, registro in enumerate(df.to_dict("records")):
+            linha = indice + 2  # +1 do cabeçalho, +1 porque a planilha começa em 1
+            valores = {campo: str(registro[coluna]).strip() for coluna, campo in colunas.items() if campo}
+            if not any(valores.values()):
+                continue  # Linha em branco no meio/fim da planilha
+
+            tipo = valores.get("tipo", "").capitalize()
+            origem = valores.get("origem", "").upper() or "SPU"
+            ids_list = []
+            for p in valores.get("ids", "").replace(";", ",").split(","):
+                if p.strip() and p.strip() not in ids_list:
+                    ids_list.append(p.strip())
+
+            if tipo not in ("Deferido", "Indeferido"):
+                erros.append(f"Linha {linha}: tipo do parecer deve ser Deferido ou Indeferido (veio '{valores.get('tipo', '')}').")
+            if origem not in ("SPU", "SISGEP"):
+                erros.append(f"Linha {linha}: origem deve ser SPU ou SISGEP (veio '{origem}').")
+            if not ids_list:
+                erros.append(f"Linha {linha}: informe ao menos um ID.")
+
+            dados_form = {
+                'origem': origem,
+                'tipo': tipo,
+                'processo': valores.get("processo", "").upper(),
+                'assunto': valores.get("assunto", ""),
+                'solicitante': valores.get("solicitante", ""),
+                'tipo_execucao': valores.get("tipo_execucao", ""),
+                'item': valores.get("item", ""),
+                'endereco': valores.get("endereco", ""),
+                'motivo': valores.get("motivo", ""),
+                'quantidade': valores.get("quantidade", "")
+            }
+            linhas.append((linha, dados_form, ids_list))
+
+        if not linhas and not erros:
+            erros.append("A planilha não tem nenhuma linha preenchida.")
+        return linhas, erros
+
+    def processar_lote_pareceres(self, caminho_planilha, usuario_logado, progresso=None):
+        """
+        Gera um parecer por linha da planilha. Valida tudo antes de gravar (um erro = nada é gerado),
+        grava todos no banco numa transação só (números seguidos) e depois gera os Word em paralelo.
+        progresso(feitos, total) é chamado a cada documento. Retorna (sucesso, mensagem, relatorio),
+        com relatorio = [(linha_na_planilha, ok, texto)].
+        """
+        try:
+            linhas, erros = self._ler_planilha_lote(caminho_planilha)
+        except Exception as e:
+            return False, f"Não foi possível ler a planilha:\n{e}", []
+        if erros:
+            return False, "Nenhum parecer foi gerado. Corrija a planilha:", [(None, False, erro) for erro in erros]
+
+        data_atual = datetime.now()
+        preparados = [self._preparar_parecer(dados_form, ids_list, usuario_logado, data_atual) for _, dados_form, ids_list in linhas]
+        for modelo in {modelo for _, _, modelo, _ in preparados}:
+            if not os.path.exists(modelo):
+                return False, f"Modelo Word não encontrado em: {modelo}", []
+
+        # BANCO PRIMEIRO (TUDO OU NADA)
+        try:
+            gravados = self.repo.salvar_pareceres_em_lote(
+                [dados_banco for dados_banco, _, _, _ in preparados],
+                lambda indice, numero: preparados[indice][3](numero)
+            )
+        except Exception as e:
+            return False, f"Erro Crítico! Nenhum parecer foi gerado pois houve falha no Banco de Dados:\n{str(e)}", []
+
+        # WORD EM PARALELO NA FILA LOCAL (CADA PROCESSO COMPILA O MODELO UMA VEZ E REAPROVEITA)
+        trabalhos = [
+            (modelo, fila_envio.caminho_local(caminho), {"{{NUM_PARECER}}": f"{numero:03d}", **tags})
+            for (numero, caminho), (_, tags, modelo, _) in zip(gravados, preparados)
+        ]
+        relatorio = [None] * len(trabalhos)
+        feitos = 0
+        for indice, erro in self._renderizar_em_paralelo(trabalhos):
+            numero, caminho = gravados[indice]
+            linha = linhas[indice][0]
+            if erro is None:
+                fila_envio.enfileirar(trabalhos[indice][1], caminho)
+                relatorio[indice] = (linha, True, f"Parecer {numero:03d}/{data_atual.year} → {caminho}")
+            else:
+                relatorio[indice] = (linha, False, f"Parecer {numero:03d}/{data_atual.year} registrado no banco, mas o Word falhou: {erro}")
+            feitos += 1
+            if progresso:
+                progresso(feitos, len(trabalhos))
+
+        falhas = sum(1 for _, ok, _ in relatorio if not ok)
+        ano = data_atual.year
+        faixa = f"{gravados[0][0]:03d} a {gravados[-1][0]:03d}/{ano}"
+        if falhas:
+            return False, f"Pareceres {faixa} registrados no banco, mas {falhas} documento(s) Word falharam:", relatorio
+        return True, f"{len(relatorio)} pareceres gerados com sucesso ({faixa})!", relatorio
+
+    def _renderizar_em_paralelo(self, trabalhos):
+        """Gera os .docx e devolve (indice, erro ou None) conforme cada um termina."""
+        if len(trabalhos) < LOTE_PARECER_MINIMO_PROCESSOS:
+            # Lote pequeno: abrir processos custa mais do que gerar os documentos aqui mesmo
+            for indice, trabalho in enumerate(trabalhos):
+                yield indice, _gerar_parecer_docx(*trabalho)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=min(LOTE_PARECER_PROCESSOS, len(trabalhos))) as pool:
+            futuros = {pool.submit(_gerar_parecer_docx, *trabalho): indice for indice, trabalho in enumerate(trabalhos)}
+            for futuro in as_completed(futuros):
+                try:
+                    erro = futuro.result()
+                except Exception as e:  # Processo auxiliar morreu (ex.: falta de memória)
+                    erro = str(e)
+                yield futuros[futuro], erro
+
     # MANIPULAÇÃO DO WORD (DOCX)
     def _gerar_documento_word(self, modelo_path, destino_path, tags):
-        doc = Document(modelo_path)
-        # Substitui as tags no documento (tanto em parágrafos quanto em tabelas)
-        for p in doc.paragraphs:
-            texto_completo = "".join(run.text for run in p.runs)
-            modificado = False
-            for tag, val in tags.items():
-                if tag in texto_completo:
-                    texto_completo = texto_completo.replace(tag, val)
-                    modificado = True
-            
-            if modificado:
-                for run in p.runs: run.text = ""
-                if p.runs: p.runs[0].text = texto_completo
-        # Substituição nas tabelas
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for p in cell.paragraphs:
-                        texto_completo = "".join(run.text for run in p.runs)
-                        modificado = False
-                        for tag, val in tags.items():
-                            if tag in texto_completo:
-                                texto_completo = texto_completo.replace(tag, val)
-                                modificado = True
-                        if modificado:
-                            for run in p.runs: run.text = ""
-                            if p.runs: p.runs[0].text = texto_completo
-        
-        doc.save(destino_path)
\ No newline at end of file
+        # Substitui as tags (parágrafos e tabelas) a partir do modelo pré-compilado em cache
+        obter_modelo(modelo_path).gerar(destino_path, tags)
+
+
+def _gerar_parecer_docx(modelo_path, destino_path, tags):
+    """Gera um parecer do lote (função de módulo para poder rodar num processo auxiliar). Retorna o erro ou None."""
+    try:
+        os.makedirs(os.path.dirname(destino_path), exist_ok=True)
+        obter_modelo(modelo_path).gerar(destino_path, tags)
+        return None
+    except Exception as e:
+        return str(e)
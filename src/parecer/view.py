@@ -1,6 +1,7 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 from src.parecer.service import ParecerService
+from src.shared.tarefas import obter_executor
 
 class ParecerView(ctk.CTkFrame):
     def __init__(self, master, usuario_logado):
@@ -8,6 +9,7 @@ class ParecerView(ctk.CTkFrame):
         self.pack(fill="both", expand=True)
 
         self.service = ParecerService()
+        self.executor = obter_executor(self)
         self.usuario_logado = usuario_logado.get('nome') if isinstance(usuario_logado, dict) else usuario_logado
         self.ids_list = []
 
@@ -167,7 +169,14 @@ class ParecerView(ctk.CTkFrame):
         footer_frame.pack(fill="x", pady=30)
         
         ctk.CTkLabel(footer_frame, text=f"Responsável: {self.usuario_logado}", text_color="gray", font=("Arial", 12)).pack(side="left", padx=10)
-        ctk.CTkButton(footer_frame, text="📄 GERAR PARECER TÉCNICO", fg_color="#0F8C75", font=("Arial Bold", 16), height=50, width=300, command=self._acao_gerar_parecer).pack(side="right", padx=10)
+        self.btn_gerar = ctk.CTkButton(footer_frame, text="📄 GERAR PARECER TÉCNICO", fg_color="#0F8C75", font=("Arial Bold", 16), height=50, width=300, command=self._acao_gerar_parecer)
+        self.btn_gerar.pack(side="right", padx=10)
+
+        # Geração em lote: um parecer por linha de uma planilha CSV/XLSX
+        self.btn_lote = ctk.CTkButton(footer_frame, text="📑 GERAR EM LOTE (PLANILHA)", fg_color="#555", hover_color="#333", font=("Arial Bold", 14), height=50, width=260, command=self._acao_gerar_lote)
+        self.btn_lote.pack(side="right", padx=10)
+        self.lbl_progresso_lote = ctk.CTkLabel(footer_frame, text="", text_color="#0F8C75", font=("Arial Bold", 12))
+        self.lbl_progresso_lote.pack(side="right", padx=10)
 
     # --- FUNÇÕES DE CONSTRUÇÃO DE UI ---
     def _criar_entry(self, parent, label_text, variable, width):
@@ -248,14 +257,71 @@ class ParecerView(ctk.CTkFrame):
             'quantidade': self.quantidade_var.get().strip()
         }
 
-        sucesso, msg = self.service.processar_geracao_parecer(dados_form, self.ids_list, self.usuario_logado)
-        
+        # Banco + geração do Word na rede rodam fora da thread do Tk; o botão fica travado até terminar
+        self.btn_gerar.configure(state="disabled", text="⏳ GERANDO...")
+        self.executor.executar("parecer-gerar", self.service.processar_geracao_parecer, dados_form, list(self.ids_list), self.usuario_logado,
+                               ao_concluir=self._ao_concluir_geracao,
+                               ao_falhar=lambda e: self._ao_concluir_geracao((False, f"Erro inesperado ao gerar o parecer:\n{e}")))
+
+    def _ao_concluir_geracao(self, resultado):
+        sucesso, msg = resultado
+        self.btn_gerar.configure(state="normal", text="📄 GERAR PARECER TÉCNICO")
+
         if sucesso:
             messagebox.showinfo("Sucesso", msg)
             self._limpar_formulario()
         else:
             messagebox.showerror("Erro", msg)
 
+    # --- GERAÇÃO EM LOTE ---
+    def _acao_gerar_lote(self):
+        caminho = filedialog.askopenfilename(
+            title="Planilha de Pareceres (uma linha por parecer)",
+            filetypes=[("Planilhas", "*.xlsx *.csv"), ("Excel", "*.xlsx"), ("CSV", "*.csv")]
+        )
+        if not caminho: return
+
+        self.btn_lote.configure(state="disabled", text="⏳ GERANDO LOTE...")
+        self.btn_gerar.configure(state="disabled")
+        self.lbl_progresso_lote.configure(text="Validando planilha...")
+        # O progresso chega da thread de trabalho e é repassado para a thread do Tk
+        progresso = lambda feitos, total: self.executor.notificar(self._ao_progresso_lote, feitos, total)
+        self.executor.executar("parecer-lote", self.service.processar_lote_pareceres, caminho, self.usuario_logado, progresso=progresso,
+                               ao_concluir=self._ao_concluir_lote,
+                               ao_falhar=lambda e: self._ao_concluir_lote((False, f"Erro inesperado ao gerar o lote:\n{e}", [])))
+
+    def _ao_progresso_lote(self, feitos, total):
+        self.lbl_progresso_lote.configure(text=f"Documentos: {feitos}/{total}")
+
+    def _ao_concluir_lote(self, resultado):
+        sucesso, msg, relatorio = resultado
+        self.btn_lote.configure(state="normal", text="📑 GERAR EM LOTE (PLANILHA)")
+        self.btn_gerar.configure(state="normal")
+        self.lbl_progresso_lote.configure(text="")
+
+        if not relatorio:
+            (messagebox.showinfo if sucesso else messagebox.showerror)("Sucesso" if sucesso else "Erro", msg)
+            return
+        self._mostrar_relatorio_lote(sucesso, msg, relatorio)
+
+    def _mostrar_relatorio_lote(self, sucesso, msg, relatorio):
+        """Resultado linha a linha da planilha (erros de validação ou o parecer gerado de cada linha)."""
+        popup = ctk.CTkToplevel(self)
+        popup.title("Resultado do Lote de Pareceres")
+        popup.geometry("800x600")
+        popup.grab_set()
+
+        ctk.CTkLabel(popup, text=msg, font=("Arial Bold", 15), text_color="#0F8C75" if sucesso else "#C21010", wraplength=740, justify="left").pack(pady=15, padx=20, anchor="w")
+
+        caixa = ctk.CTkTextbox(popup, font=("Consolas", 12), fg_color="#F9F9F9")
+        caixa.pack(fill="both", expand=True, padx=20, pady=10)
+        for linha, ok, texto in relatorio:
+            prefixo = f"Linha {linha}: " if linha else ""
+            caixa.insert("end", f"{'✔' if ok else '✖'} {prefixo}{texto}\n")
+        caixa.configure(state="disabled")
+
+        ctk.CTkButton(popup, text="Fechar", fg_color="gray", font=("Arial Bold", 15), height=45, command=popup.destroy).pack(fill="x", padx=40, pady=20)
+
     def _limpar_formulario(self):
         self.processo_var.set("")
         self.endereco_var.set("")
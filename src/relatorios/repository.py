@@ -1,21 +1,26 @@
 import psycopg2
 import json
 from config.database import get_db_connection
+from src.shared.exportacao import ler_em_lotes, copiar_csv
+from src.shared.filtros_sql import condicao_contem, clausula_apos
+from src.shared.pontos_documentos import condicao_ponto, MODULO_OS, MODULO_PARECER
 
 class RelatorioRepository:
 
     # BUSCAS GERAIS (TABELA)
-    def buscar_ordens_servico(self, filtros):
-        query = """
-            SELECT id, numero, data_criacao, ponto_principal_id, pontos_adicionais, 
-                   acao_realizada, tipo_item, logradouro_completo, bairro, 
-                   status_conclusao, data_conclusao, modelo_documento, responsavel, origem_demanda
-            FROM sigp.ordens_servico WHERE 1=1
-        """
+    def _filtros_ordens_servico(self, filtros):
+        # Monta o WHERE da busca de OS (compartilhado entre a listagem paginada e a contagem)
+        query = " WHERE 1=1"
         params = []
         if filtros.get('id'):
-            query += " AND (ponto_principal_id ILIKE %s OR pontos_adicionais ILIKE %s)"
-            params.extend([f"%{filtros['id']}%", f"%{filtros['id']}%"])
+            # Busca exata pela tabela de vínculos (principal + adicionais); sem ela, por trecho no texto
+            condicao = condicao_ponto(MODULO_OS, "id")
+            if condicao:
+                query += f" AND {condicao}"
+                params.append(filtros['id'].strip())
+            else:
+                query += f" AND ({condicao_contem('ponto_principal_id')} OR {condicao_contem('pontos_adicionais')})"
+                params.extend([f"%{filtros['id']}%", f"%{filtros['id']}%"])
         
         if filtros.get('origem') and filtros['origem'] != "Todos":
             query += " AND origem_demanda = %s"
@@ -28,10 +33,10 @@ class RelatorioRepository:
             query += " AND tipo_item ILIKE %s"
             params.append(f"%{filtros['tipo_item']}%")
         if filtros.get('bairro'):
-            query += " AND bairro ILIKE %s"
+            query += f" AND {condicao_contem('bairro')}"
             params.append(f"%{filtros['bairro']}%")
         if filtros.get('endereco'):
-            query += " AND logradouro_completo ILIKE %s"
+            query += f" AND {condicao_contem('logradouro_completo')}"
             params.append(f"%{filtros['endereco']}%")
         if filtros.get('concluida') and filtros['concluida'] != "Todos":
             query += " AND status_conclusao = %s"
@@ -43,32 +48,54 @@ class RelatorioRepository:
             query += " AND numero = %s"
             params.append(int(filtros['numero_os']))
         if filtros.get('criado_por'):
-            query += " AND responsavel ILIKE %s"
+            query += f" AND {condicao_contem('responsavel')}"
             params.append(f"%{filtros['criado_por']}%")
         if filtros.get('data_inicio') and filtros.get('data_fim'):
             query += " AND data_criacao BETWEEN %s AND %s"
             params.extend([filtros['data_inicio'], filtros['data_fim']])
+        return query, params
 
-        query += " ORDER BY data_criacao DESC"
+    def buscar_ordens_servico(self, filtros, limite=None, apos=None):
+        # Sem limite devolve tudo; com limite devolve só uma página, começando depois da chave 'apos'
+        where, params = self._filtros_ordens_servico(filtros)
+        query = """
+            SELECT id, numero, data_criacao, ponto_principal_id, pontos_adicionais, 
+                   acao_realizada, tipo_item, logradouro_completo, bairro, 
+                   status_conclusao, data_conclusao, modelo_documento, responsavel, origem_demanda
+            FROM sigp.ordens_servico
+        """ + where
+        clausula, params_apos = clausula_apos("data_criacao", "id", apos)
+        query += clausula
+        params = params + params_apos
+
+        query += " ORDER BY data_criacao DESC NULLS LAST, id DESC"
+        if limite:
+            query += " LIMIT %s"
+            params.append(int(limite))
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(query, params)
                     return cursor.fetchall()
         except Exception as e:
-            print(f"Erro ao buscar OS: {e}")
-            return []
+            print(f"[LOG DB] Erro ao buscar OS: {e}")
+            raise Exception("Falha ao buscar as Ordens de Serviço no banco de dados.")
 
-    def buscar_pareceres(self, filtros):
-        # BUSCA DE PARECERES COM FILTROS DINÂMICOS
-        query = """
-            SELECT p.id, b.numero_parecer_ano, p.tipo_parecer, p.processo, p.assunto, 
-                   p.ids_pontos, p.solicitante, p.endereco_vistoria, p.origem_demanda, 
-                   b.created_at, u.nome_completo, p.caminho_arquivo_docx
-            FROM sigp.pareceres p
-            JOIN common.pareceres_base b ON p.id = b.id
-            LEFT JOIN common.usuarios u ON b.criado_por_id = u.id WHERE 1=1
-        """
+    def contar_ordens_servico(self, filtros):
+        # CONTAGEM SEPARADA (SÓ O NÚMERO, SEM TRAZER AS LINHAS)
+        where, params = self._filtros_ordens_servico(filtros)
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM sigp.ordens_servico" + where, params)
+                    return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"[LOG DB] Erro ao contar OS: {e}")
+            raise Exception("Falha ao contar as Ordens de Serviço no banco de dados.")
+
+    def _filtros_pareceres(self, filtros):
+        # Monta o WHERE da busca de Pareceres (compartilhado entre a listagem paginada e a contagem)
+        query = " WHERE 1=1"
         params = []
         
         if filtros.get('origem') and filtros['origem'] != "Todos":
@@ -82,37 +109,148 @@ class RelatorioRepository:
             query += " AND p.assunto = %s"
             params.append(filtros['assunto'])
         if filtros.get('processo'):
-            query += " AND p.processo ILIKE %s"
+            query += f" AND {condicao_contem('p.processo')}"
             params.append(f"%{filtros['processo']}%")
         if filtros.get('numero_parecer'):
             query += " AND b.numero_parecer_ano = %s"
             params.append(int(filtros['numero_parecer']))
         if filtros.get('id'):
-            query += " AND p.ids_pontos ILIKE %s"
-            params.append(f"%{filtros['id']}%")
+            condicao = condicao_ponto(MODULO_PARECER, "p.id")
+            if condicao:
+                query += f" AND {condicao}"
+                params.append(filtros['id'].strip())
+            else:
+                query += f" AND {condicao_contem('p.ids_pontos')}"
+                params.append(f"%{filtros['id']}%")
         if filtros.get('tipo') and filtros['tipo'] != "Todos":
             query += " AND p.tipo_parecer = %s"
             params.append(filtros['tipo'].upper())
         if filtros.get('endereco'):
-            query += " AND p.endereco_vistoria ILIKE %s"
+            query += f" AND {condicao_contem('p.endereco_vistoria')}"
             params.append(f"%{filtros['endereco']}%")
         if filtros.get('criado_por'):
-            query += " AND u.nome_completo ILIKE %s"
+            query += f" AND {condicao_contem('u.nome_completo')}"
             params.append(f"%{filtros['criado_por']}%")
         if filtros.get('data_inicio') and filtros.get('data_fim'):
             query += " AND DATE(b.created_at) BETWEEN %s AND %s"
             params.extend([filtros['data_inicio'], filtros['data_fim']])
+        return query, params
+
+    def buscar_pareceres(self, filtros, limite=None, apos=None):
+        # BUSCA DE PARECERES COM FILTROS DINÂMICOS
+        where, params = self._filtros_pareceres(filtros)
+        query = """
+            SELECT p.id, b.numero_parecer_ano, p.tipo_parecer, p.processo, p.assunto, 
+                   p.ids_pontos, p.solicitante, p.endereco_vistoria, p.origem_demanda, 
+                   b.created_at, u.nome_completo, p.caminho_arquivo_docx
+            FROM sigp.pareceres p
+            JOIN common.pareceres_base b ON p.id = b.id
+            LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
+        """ + where
+        clausula, params_apos = clausula_apos("b.created_at", "p.id", apos)
+        query += clausula
+        params = params + params_apos
 
         # Ordenação por Data de Criação (Mais Recente Primeiro)
-        query += " ORDER BY b.created_at DESC"
+        query += " ORDER BY b.created_at DESC NULLS LAST, p.id DESC"
+        if limite:
+            query += " LIMIT %s"
+            params.append(int(limite))
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(query, params)
                     return cursor.fetchall()
         except Exception as e:
-            print(f"Erro ao buscar Pareceres: {e}")
-            return []
+            print(f"[LOG DB] Erro ao buscar Pareceres: {e}")
+            raise Exception("Falha ao buscar os Pareceres no banco de dados.")
+
+    def contar_pareceres(self, filtros):
+        # CONTAGEM SEPARADA (SÓ O NÚMERO, SEM TRAZER AS LINHAS)
+        where, params = self._filtros_pareceres(filtros)
+        query = """
+            SELECT COUNT(*)
+            FROM sigp.pareceres p
+            JOIN common.pareceres_base b ON p.id = b.id
+            LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
+        """ + where
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"[LOG DB] Erro ao contar Pareceres: {e}")
+            raise Exception("Falha ao contar os Pareceres no banco de dados.")
+
+    # EXPORTAÇÃO (MESMOS FILTROS DA TABELA, TODAS AS LINHAS, FORMATADAS NO BANCO)
+    # (título da coluna, expressão SQL, largura no Excel)
+    COLUNAS_EXPORTACAO_OS = [
+        ("ID", "id", 8),
+        ("Nº OS", "numero", 8),
+        ("Data Criação", "to_char(data_criacao, 'DD/MM/YYYY')", 13),
+        ("ID Principal", "ponto_principal_id", 13),
+        ("IDs Adicionais", "pontos_adicionais", 20),
+        ("Ação", "UPPER(acao_realizada)", 16),
+        ("Item", "UPPER(tipo_item)", 18),
+        ("Endereço", "logradouro_completo", 45),
+        ("Bairro", "bairro", 20),
+        ("Concluída", "COALESCE(status_conclusao, 'NÃO')", 16),
+        ("Data Conclusão", "to_char(data_conclusao, 'DD/MM/YYYY')", 15),
+        # Dias em aberto até hoje, ou até a conclusão (mesma conta do status da tabela)
+        ("Dias", "CASE WHEN COALESCE(status_conclusao, 'NÃO') = 'NÃO' THEN CURRENT_DATE - data_criacao "
+                 "ELSE data_conclusao::date - data_criacao END", 8),
+        ("Pasta", "modelo_documento", 16),
+        ("Responsável", "responsavel", 20),
+        ("Origem", "UPPER(COALESCE(origem_demanda, 'SPU'))", 10),
+    ]
+    COLUNAS_EXPORTACAO_PARECER = [
+        ("ID", "p.id", 8),
+        ("Nº Parecer", "b.numero_parecer_ano", 10),
+        ("Decisão", "p.tipo_parecer", 13),
+        ("Processo", "p.processo", 20),
+        ("Assunto", "p.assunto", 45),
+        ("IDs", "p.ids_pontos", 20),
+        ("Solicitante", "p.solicitante", 40),
+        ("Endereço", "p.endereco_vistoria", 45),
+        ("Origem", "UPPER(COALESCE(p.origem_demanda, 'SPU'))", 10),
+        ("Data Criação", "to_char(b.created_at, 'DD/MM/YYYY HH24:MI')", 17),
+        ("Criado por", "u.nome_completo", 25),
+        ("Arquivo", "p.caminho_arquivo_docx", 60),
+    ]
+
+    def _consulta_exportacao(self, tipo, filtros):
+        # SELECT de todas as linhas da busca, na mesma ordem da tabela, com os títulos como nomes das colunas
+        if tipo == "OS":
+            colunas = self.COLUNAS_EXPORTACAO_OS
+            where, params = self._filtros_ordens_servico(filtros)
+            origem = " FROM sigp.ordens_servico"
+            ordem = " ORDER BY data_criacao DESC NULLS LAST, id DESC"
+        else:
+            colunas = self.COLUNAS_EXPORTACAO_PARECER
+            where, params = self._filtros_pareceres(filtros)
+            origem = """
+                FROM sigp.pareceres p
+                JOIN common.pareceres_base b ON p.id = b.id
+                LEFT JOIN common.usuarios u ON b.criado_por_id = u.id
+            """
+            ordem = " ORDER BY b.created_at DESC NULLS LAST, p.id DESC"
+        selecao = ", ".join(f'{expressao} AS "{titulo}"' for titulo, expressao, _ in colunas)
+        return "SELECT " + selecao + origem + where + ordem, params
+
+    def colunas_exportacao(self, tipo):
+        colunas = self.COLUNAS_EXPORTACAO_OS if tipo == "OS" else self.COLUNAS_EXPORTACAO_PARECER
+        return [(titulo, largura) for titulo, _, largura in colunas]
+
+    def exportar_csv(self, tipo, filtros, arquivo, progresso=None):
+        # O próprio banco gera o CSV (COPY), que vai direto para o arquivo
+        query, params = self._consulta_exportacao(tipo, filtros)
+        return copiar_csv(query, params, arquivo, progresso)
+
+    def iterar_para_exportacao(self, tipo, filtros):
+        # Linhas já formatadas, lidas em lotes por cursor do servidor (para a planilha)
+        query, params = self._consulta_exportacao(tipo, filtros)
+        return ler_em_lotes(query, params)
 
     # BUSCA DE TODOS OS DETALHES E FUNÇÕES DE EXCLUSÃO
     def buscar_detalhes_os(self, id_banco):
@@ -233,6 +371,30 @@ class RelatorioRepository:
                     return cur.fetchone()
         except: return None
 
+    def listar_dados_caminho_os(self):
+        # DADOS DE TODAS AS OS PARA MONTAR OS CAMINHOS (COMPARAÇÃO COM OS ARQUIVOS DA REDE)
+        query = "SELECT numero, data_criacao, ponto_principal_id, pontos_adicionais, modelo_documento FROM sigp.ordens_servico"
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return cur.fetchall()
+        except Exception as e:
+            print(f"[LOG DB] Erro ao listar caminhos de OS: {e}")
+            return None
+
+    def listar_caminhos_pareceres(self):
+        # CAMINHOS DE TODOS OS PARECERES (COMPARAÇÃO COM OS ARQUIVOS DA REDE)
+        query = "SELECT caminho_arquivo_docx FROM sigp.pareceres WHERE caminho_arquivo_docx IS NOT NULL"
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return [linha[0] for linha in cur.fetchall()]
+        except Exception as e:
+            print(f"[LOG DB] Erro ao listar caminhos de Pareceres: {e}")
+            return None
+
     def obter_caminho_parecer(self, id_banco):
         # BUSCA DO CAMINHO DO ARQUIVO WORD DO PARECER PARA DOWNLOAD
         query = "SELECT caminho_arquivo_docx FROM sigp.pareceres WHERE id = %s"
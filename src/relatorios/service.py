@@ -5,19 +5,72 @@ import subprocess
 from datetime import datetime
 from src.relatorios.repository import RelatorioRepository
 from config.settings import RAIZ_REDE
+from src.shared.fila_envio import fila_envio
+from src.shared.indice_arquivos import indice_arquivos, EXISTE
 
 class RelatorioService:
+    # Situação extra (além de EXISTE/AUSENTE do índice): documento ainda na fila de envio para a rede
+    NA_FILA = "fila"
+
     def __init__(self):
         self.repo = RelatorioRepository()
+        self._orfaos = {}  # tipo -> (versão do índice, lista de arquivos sem registro)
 
-    def buscar_dados(self, tipo_relatorio, filtros):
+    def contar_resultados(self, tipo_relatorio, filtros):
+        """Total de linhas da busca (COUNT no banco), usado só para o contador e a paginação."""
         if tipo_relatorio == "OS":
-            dados_brutos = self.repo.buscar_ordens_servico(filtros)
-            return self._formatar_dados_os(dados_brutos)
+            return self.repo.contar_ordens_servico(filtros)
         elif tipo_relatorio == "PARECER":
-            dados_brutos = self.repo.buscar_pareceres(filtros)
-            return self._formatar_dados_parecer(dados_brutos)
-        return []
+            return self.repo.contar_pareceres(filtros)
+        return 0
+
+    def buscar_pagina(self, tipo_relatorio, filtros, limite, apos=None):
+        """
+        Busca e formata apenas uma página. Devolve (linhas_formatadas, chave_proxima_pagina),
+        onde a chave é (data_criacao, id) da última linha, para a paginação por chave no banco.
+        """
+        if tipo_relatorio == "OS":
+            dados_brutos = self.repo.buscar_ordens_servico(filtros, limite=limite, apos=apos)
+            chave = (dados_brutos[-1][2], dados_brutos[-1][0]) if dados_brutos else None
+            return self._formatar_dados_os(dados_brutos), chave
+        elif tipo_relatorio == "PARECER":
+            dados_brutos = self.repo.buscar_pareceres(filtros, limite=limite, apos=apos)
+            chave = (dados_brutos[-1][9], dados_brutos[-1][0]) if dados_brutos else None
+            return self._formatar_dados_parecer(dados_brutos), chave
+        return [], None
+
+    # =========================================================
+    # EXPORTAÇÃO DO RESULTADO DA BUSCA (CSV OU EXCEL)
+    # =========================================================
+    def exportar(self, tipo_relatorio, filtros, caminho, progresso=None):
+        """
+        Grava todas as linhas da busca em caminho (.csv ou .xlsx), sem passar pela formatação da tabela:
+        o banco devolve as colunas prontas e o arquivo é escrito aos poucos. progresso(linhas) é opcional.
+        """
+        try:
+            if caminho.lower().endswith(".csv"):
+                # utf-8-sig: o Excel reconhece os acentos ao abrir o CSV
+                with open(caminho, "w", encoding="utf-8-sig", newline="") as arquivo:
+                    total = self.repo.exportar_csv(tipo_relatorio, filtros, arquivo, progresso)
+            else:
+                from src.shared.exportacao import abrir_planilha, escrever_aba  # Import adiado (só na exportação)
+                nome_aba = "Ordens de Serviço" if tipo_relatorio == "OS" else "Pareceres"
+                workbook = abrir_planilha(caminho)
+                try:
+                    total = escrever_aba(workbook, nome_aba, self.repo.colunas_exportacao(tipo_relatorio),
+                                         self.repo.iterar_para_exportacao(tipo_relatorio, filtros), progresso=progresso)
+                finally:
+                    workbook.close()
+        except Exception as e:
+            # Não deixa um arquivo pela metade para trás
+            try: os.remove(caminho)
+            except OSError: pass
+            return False, f"Erro ao exportar: {e}"
+
+        if total == 0:
+            os.remove(caminho)
+            return False, "Não há dados para exportar com os filtros aplicados."
+        return True, f"Exportação concluída! ({total} registro(s))\n{caminho}"
 
     def _formatar_dados_os(self, dados_brutos):
         dados_formatados = []
@@ -45,7 +98,7 @@ class RelatorioService:
             else:
                 status_formatado = status
 
-            caminho_arquivo = self._reconstruir_caminho_os(pasta, numero, dt_criacao, todos_ids)
+            caminho_arquivo = self._localizar_caminho_os(pasta, numero, dt_criacao, todos_ids, ids_adicionais)
             
             origem_fmt = str(origem).upper() if origem else "SPU"
             acao_fmt = str(acao).upper() if acao else "-"
@@ -76,6 +129,21 @@ class RelatorioService:
             ])
         return dados_formatados
 
+    def _caminhos_possiveis_os(self, pasta, numero, dt_criacao, todos_ids, ids_gravados):
+        # A pasta da OS é criada com os IDs na ordem em que foram gravados (pontos_adicionais);
+        # a montagem antiga põe o ID principal primeiro. As duas grafias são procuradas no índice.
+        caminhos = [self._reconstruir_caminho_os(pasta, numero, dt_criacao, todos_ids)]
+        if ids_gravados and ids_gravados != 'None':
+            caminhos.append(self._reconstruir_caminho_os(pasta, numero, dt_criacao, [i.strip() for i in ids_gravados.split('-') if i.strip()]))
+        return [c for c in caminhos if c]
+
+    def _localizar_caminho_os(self, pasta, numero, dt_criacao, todos_ids, ids_gravados):
+        caminhos = self._caminhos_possiveis_os(pasta, numero, dt_criacao, todos_ids, ids_gravados)
+        for caminho in caminhos:
+            if indice_arquivos.situacao(caminho) == EXISTE:
+                return caminho
+        return caminhos[0] if caminhos else None
+
     def _reconstruir_caminho_os(self, pasta, numero, dt_criacao, ids_list):
         if not pasta or pasta == "-": return None
         if not dt_criacao: return None
@@ -87,7 +155,54 @@ class RelatorioService:
         str_ids = "-".join(ids_list) if ids_list else "EMERGENCIA"
         return os.path.join(base, f"{str(numero).zfill(3)}-{mes}-{ano}-ID{str_ids}", f"O.S {str(numero).zfill(3)}-{ano}-ID{str_ids}.docx")
 
+    # =========================================================
+    # SITUAÇÃO DOS DOCUMENTOS NA REDE (PELO ÍNDICE, SEM ACESSAR A REDE)
+    # =========================================================
+    def situacoes_arquivos(self, linhas):
+        """{caminho: EXISTE | AUSENTE | NA_FILA | None} para os caminhos (última coluna) das linhas da página."""
+        na_fila = {os.path.normcase(r["destino"]) for r in fila_envio.pendentes()}
+        situacoes = {}
+        for linha in linhas:
+            caminho = linha[-1]
+            if not caminho or caminho == "-": continue
+            situacao = indice_arquivos.situacao(caminho)
+            if situacao != EXISTE and os.path.normcase(caminho) in na_fila:
+                situacao = self.NA_FILA
+            situacoes[caminho] = situacao
+        return situacoes
+
+    def listar_orfaos(self, tipo_relatorio):
+        """Documentos que estão na rede sem nenhum registro no banco (refeito só quando o índice muda)."""
+        versao = indice_arquivos.versao
+        em_cache = self._orfaos.get(tipo_relatorio)
+        if em_cache and em_cache[0] == versao:
+            return em_cache[1]
+
+        if tipo_relatorio == "OS":
+            dados = self.repo.listar_dados_caminho_os()
+            if dados is None: return []
+            registrados = set()
+            for numero, dt_criacao, id_princ, ids_adicionais, pasta in dados:
+                todos_ids = [id_princ] if id_princ else []
+                if ids_adicionais and ids_adicionais != 'None':
+                    todos_ids.extend([i.strip() for i in ids_adicionais.split('-') if i.strip() != id_princ])
+                registrados.update(self._caminhos_possiveis_os(pasta, numero, dt_criacao, todos_ids, ids_adicionais))
+            na_rede = indice_arquivos.arquivos_em("ORDENS DE SERVICO")
+        else:
+            caminhos = self.repo.listar_caminhos_pareceres()
+            if caminhos is None: return []
+            registrados = set(caminhos)
+            na_rede = indice_arquivos.arquivos_em("PARECERES TECNICOS")
+
+        registrados = {os.path.normcase(os.path.normpath(c)) for c in registrados}
+        orfaos = sorted(c for c in na_rede if c not in registrados)
+        self._orfaos[tipo_relatorio] = (versao, orfaos)
+        return orfaos
+
     def abrir_arquivo(self, caminho):
+        # Documento que ainda está na fila de envio para a rede: abre a cópia local
+        if caminho and not os.path.exists(caminho):
+            caminho = fila_envio.localizar(caminho) or caminho
         if not caminho or not os.path.exists(caminho):
             return False, f"Arquivo não encontrado no caminho:\n{caminho}"
         try:
@@ -116,9 +231,12 @@ class RelatorioService:
                 todos_ids = [id_princ] if id_princ else []
                 if ids_adicionais and ids_adicionais != 'None':
                     todos_ids.extend([i.strip() for i in ids_adicionais.split('-') if i.strip() != id_princ])
-                caminho_arquivo = self._reconstruir_caminho_os(pasta, numero_real, dt_criacao, todos_ids)
+                caminho_arquivo = self._localizar_caminho_os(pasta, numero_real, dt_criacao, todos_ids, ids_adicionais)
                 if caminho_arquivo: pasta_para_deletar = os.path.dirname(caminho_arquivo)
             sucesso, msg = self.repo.excluir_e_logar_os(id_banco, dados_completos, caminho_arquivo, motivo, usuario_logado)
+            if sucesso and pasta_para_deletar:
+                fila_envio.cancelar(pasta_para_deletar)  # Não deixa a fila recriar a pasta na rede
+                indice_arquivos.remover(pasta_para_deletar)
             if sucesso and pasta_para_deletar and os.path.exists(pasta_para_deletar):
                 try: shutil.rmtree(pasta_para_deletar)
                 except: pass
@@ -127,6 +245,9 @@ class RelatorioService:
             dados_completos = self.repo.buscar_detalhes_parecer(id_banco)
             caminho_arquivo = self.repo.obter_caminho_parecer(id_banco)
             sucesso, msg = self.repo.excluir_e_logar_parecer(id_banco, dados_completos, caminho_arquivo, motivo, usuario_logado)
+            if sucesso and caminho_arquivo:
+                fila_envio.cancelar(caminho_arquivo)
+                indice_arquivos.remover(caminho_arquivo)
             if sucesso and caminho_arquivo and os.path.exists(caminho_arquivo):
                 try: os.remove(caminho_arquivo)
                 except: pass
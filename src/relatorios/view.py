@@ -1,9 +1,12 @@
 import math
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 from tkcalendar import DateEntry
 from src.relatorios.service import RelatorioService
+from src.shared.tarefas import obter_executor
+from src.shared.widgets import IndicadorCarregamento, TabelaVirtual
+from src.shared.indice_arquivos import AUSENTE
 
 class RelatorioView(ctk.CTkFrame):
     def __init__(self, master, usuario_logado, tipo_relatorio):
@@ -11,14 +14,22 @@ class RelatorioView(ctk.CTkFrame):
         self.pack(fill="both", expand=True)
 
         self.service = RelatorioService()
+        self.executor = obter_executor(self)
         self.usuario_logado = usuario_logado.get('nome') if isinstance(usuario_logado, dict) else usuario_logado
         self.is_admin = usuario_logado.get('is_admin', False) if isinstance(usuario_logado, dict) else False
         
         self.tipo_relatorio = tipo_relatorio 
         self.filtros_widgets = {} 
-        self.dados_completos = []
+        self.dados_pagina = []
+        self.situacoes_arquivos = {} # caminho -> situação no índice da rede (ver RelatorioService.situacoes_arquivos)
+        self.orfaos = []
+        self.total_itens = 0
+        self.filtros_atuais = {}
+        self.chaves_paginas = [None] # Chave (data, id) onde começa cada página já visitada
         self.pagina_atual = 1
-        self.itens_por_pagina = 25
+        self.pagina_exibida = 1 # Página cujos dados estão na tabela (volta para ela se a busca de outra falhar)
+        self.itens_por_pagina = 200 # A tabela é virtual: só as linhas visíveis viram widgets
+        self._chave_busca = f"relatorio-{tipo_relatorio}-busca"
 
         self._assuntos_padrao = ["Todos", "Solicitação de Implantação de Abrigo Metálico", "Solicitação de Implantação de Placa/Barrote", "Solicitação de Implantação de Placa/Poste", "Solicitação de Implantação de Parada Segura", "Solicitação de Implantação de Abrigo Concreto", "Solicitação de Transferência de Abrigo Metálico", "Solicitação de Transferência de Placa/Barrote", "Solicitação de Transferência de Placa/Poste", "Solicitação de Transferência de Parada Segura", "Solicitação de Transferência de Abrigo Concreto", "Solicitação de Remoção de Abrigo Metálico", "Solicitação de Remoção de Placa/Barrote", "Solicitação de Remoção de Placa/Poste", "Solicitação de Remoção de Parada Segura", "Solicitação de Remoção de Abrigo Concreto", "Solicitação de Substituição de Abrigo Metálico", "Solicitação de Substituição de Placa/Barrote", "Solicitação de Substituição de Placa/Poste", "Solicitação de Substituição de Parada Segura", "Solicitação de Substituição de Abrigo Concreto", "Solicitação de Manutenção de Abrigo Metálico", "Solicitação de Manutenção de Placa/Barrote", "Solicitação de Manutenção de Placa/Poste", "Solicitação de Manutenção de Parada Segura", "Solicitação de Manutenção de Abrigo Concreto", "Outros"]
         self._solicitantes_padrao = ["Todos", "AGEFIS - Agência de Fiscalização de Fortaleza", "ALECE - Assembléia Legislativa do Ceará", "AMC - Autarquia Municipal de Trânsito e Cidadania", "Assessoria Esportiva", "Ceará Sporting Club", "CGM - Controladoria e Ouvidoria Geral do Município", "Cidadão", "CITINOVA - fundação da Ciência, Tecnologia e Inovação de Fortaleza", "CMF - Câmara Municipal de Fortaleza", "Comunidade", "Construtoras", "Cootraps", "Empreendimento Comercial", "Empreendimento Residencial", "Empresas Operadoras", "Fortaleza Esporte Clube", "FUNCI - Fundação da Criança e da Família Cidadã", "GMF - Guarda Municipal de Fortaleza", "HABITAFOR - Secretaria Municipal de Desenvolvimento Habitacional de Fortaleza", "IMPARH - Instituto Municipal de Desenvolvimento de Recursos Humanos", "Imprensa", "Instituição de Ensino", "Instituição Religiosa", "Instituições Particulares", "IPEM - Instituro de Pesos e Medidas", "IPLANFOR - Instituto de Planejamento de Fortaleza", "IPM - Instituto de Previdência do Município", "Ministério Público", "Ouvidoria Etufor", "Ouvidoria Geral do Município de Fortaleza", "PGM - Procuradoria Geral do Município", "Polícia Militar do Ceará", "PROCON - Departamento Municipal de Proteção e Defesa dos Direitos do Consumidor", "SCDH - Secretaria Municipal de Cidadania e Direitos Humanos", "SCSP - Secretaria Municipal de Conservação e Serviços Públicos", "SDE - Secretaria Municipal de Desenvolvimento Econômico", "SECEL - Secretaria Municipal de Esporte e Lazer", "SECULTFOR - Secretaria Municipal de Cultura de Fortaleza", "SEFIN - Secretaria de Finanças", "SEGER - Secretaria Municipal de Gestão Regional", "SEINF - Secretaria Municipal de Infraestrutura", "SEJUV - Secretaria Municipal da Juventude", "SEPOG - Secretaria de Planejamento, Orçamento e Gestão", "SEPOG - Secretaria Municipal de Governo", "SER 1 - Secretaria Regional 1", "SER 2 - Secretaria Regional 2", "SER 3 - Secretaria Regional 3", "SER 4 - Secretaria Regional 4", "SER 5 - Secretaria Regional 5", "SER 6 - Secretaria Regional 6", "SER 7 - Secretaria Regional 7", "SER 8 - Secretaria Regional 8", "SER 9 - Secretaria Regional 9", "SER 10 - Secretaria Regional 10", "SER 11 - Secretaria Regional 11", "SER 12 - Secretaria Regional 12", "SERCE - Secretaria Regional Centro", "SESEC - Secretaria Municipal de Segurança Cidadã", "SETFOR - Secretaria Municipal de Turismo de Fortaleza", "SETRA - Secretaria Municipal de Trabalho, Desenvolvimento Social e Combate a fome", "SEUMA - Secretaria Municipal de Urbanismo e Meio Ambiente", "Sindiônibus", "SME - Secretaria Municipal de Educação", "SMS - Secretaria Municipal de Saúde", "TRANSITAR", "TRE - Tribunal Regional Eleitoral", "TRE - Tribunal Regional Eleitoral do Ceará", "URBFOR - Autarquia de Urbanismo e Paisagismo de Fortaleza", "DIARH", "DIASIS", "DICUSTO", "DIFIS", "DIMON", "DIOPE", "DIPRE", "DITEC", "DITRAN", "Ouvidoria", "Protocolo", "Vice Presidência", "Outros"]
@@ -84,6 +95,11 @@ class RelatorioView(ctk.CTkFrame):
         info_frame.pack(fill="x", padx=20, pady=(15, 5))
         self.lbl_contador = ctk.CTkLabel(info_frame, text="0 resultados", font=("Arial Bold", 14), text_color="#333333")
         self.lbl_contador.pack(side="left")
+        self.indicador = IndicadorCarregamento(info_frame)
+        self.indicador.pack(side="left", padx=15)
+        # Documentos na rede sem registro no banco (aparece só quando houver)
+        self.btn_orfaos = ctk.CTkButton(info_frame, text="", fg_color="#E67E22", hover_color="#CA6F1E", font=("Arial Bold", 12),
+                                        height=28, command=self._mostrar_orfaos)
         
         #Paginação
         pag_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
@@ -95,13 +111,17 @@ class RelatorioView(ctk.CTkFrame):
         self.btn_prox = ctk.CTkButton(pag_frame, text=">", width=35, height=30, fg_color="#0F8C75", hover_color="#0B6B59", font=("Arial Black", 14), command=self._proxima_pagina)
         self.btn_prox.pack(side="left", padx=5)
 
+        # Exportação de todas as linhas da busca atual (não só da página)
+        self.btn_exportar = ctk.CTkButton(info_frame, text="📥 Exportar", fg_color="#27AE60", hover_color="#1E8449", font=("Arial Bold", 12),
+                                          width=100, height=30, command=self.acao_exportar)
+        self.btn_exportar.pack(side="right", padx=(0, 15))
+        self.lbl_exportacao = ctk.CTkLabel(info_frame, text="", font=("Arial", 12), text_color="#555")
+        self.lbl_exportacao.pack(side="right", padx=10)
+
         self.tabela_container = ctk.CTkFrame(self, fg_color="#FFFFFF", corner_radius=10)
         self.tabela_container.pack(fill="both", expand=True, padx=20, pady=(0, 15))
         self.header_frame = ctk.CTkFrame(self.tabela_container, fg_color="#0F8C75", corner_radius=6)
         self.header_frame.pack(fill="x", padx=5, pady=(5, 0))
-        self.scroll_tabela = ctk.CTkScrollableFrame(self.tabela_container, fg_color="transparent")
-        self.scroll_tabela.pack(fill="both", expand=True, padx=5, pady=5)
-
         if self.tipo_relatorio == "OS":
             self.headers = ["Nº", "Data", "ID(s)", "Origem", "Ação", "Item", "Endereço", "Status", "Pasta", "Criador", "Ações"]
             self.col_widths = [40, 75, 80, 60, 100, 110, 160, 120, 110, 90, 190] 
@@ -114,6 +134,35 @@ class RelatorioView(ctk.CTkFrame):
             lbl = ctk.CTkLabel(self.header_frame, text=h, width=self.col_widths[j], font=("Arial Bold", 12), text_color="white", anchor=ancora)
             lbl.pack(side="left", padx=5, pady=6)
 
+        # Linha = [id_banco, ...valores exibidos..., caminho_arquivo]
+        acoes = [
+            {"texto": "🔍", "cor": "#F24822", "cor_hover": "#FF522B", "largura": 45, "comando": lambda linha: self._acao_detalhes(linha[0])},
+            {"texto": "📄", "cor": "#0F8C75", "cor_hover": "#0B6B59", "largura": 75, "fonte": ("Arial Bold", 16),
+             "comando": lambda linha: self._abrir_word(linha[-1]), "disponivel": lambda linha: bool(linha[-1]) and linha[-1] != "-",
+             "estilo": lambda linha: self._estilo_arquivo(linha[-1])},
+        ]
+        if self.is_admin:
+            acoes.append({"texto": "🗑️", "cor": "#D32F2F", "cor_hover": "#B71C1C", "largura": 45, "comando": lambda linha: self._acao_excluir(linha[0])})
+
+        self.tabela = TabelaVirtual(self.tabela_container, self.col_widths[:-1], acoes=acoes, largura_acoes=self.col_widths[-1],
+                                    extrair_valores=lambda linha: linha[1:-1], cor_texto=self._cor_celula,
+                                    texto_vazio="Nenhum dado encontrado para os filtros aplicados.")
+        self.tabela.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def _estilo_arquivo(self, caminho):
+        # Botão do Word conforme o índice da rede: existe, ainda na fila de envio, ou faltando
+        situacao = self.situacoes_arquivos.get(caminho)
+        if situacao == AUSENTE: return ("⚠️", "#D32F2F")
+        if situacao == RelatorioService.NA_FILA: return ("⏳", "#F29C1F")
+        return ("📄", "#0F8C75")
+
+    def _cor_celula(self, coluna, texto):
+        if self.tipo_relatorio == "OS" and coluna == 7:
+            if "Aberta" in texto: return "#D32F2F"
+            elif "Não Aut" in texto: return "#E67E22"
+            elif "SIM" in texto: return "#0F8C75"
+        return None
+
     def _add_filtro_grid(self, parent, label, key, row, col, width=120, columnspan=1):
         frame = ctk.CTkFrame(parent, fg_color="transparent")
         frame.grid(row=row, column=col, columnspan=columnspan, padx=5, pady=2, sticky="w")
@@ -150,83 +199,148 @@ class RelatorioView(ctk.CTkFrame):
         if self.usar_data_var.get():
             filtros['data_inicio'], filtros['data_fim'] = self.data_inicio.get_date(), self.data_fim.get_date()
 
-        self.dados_completos = self.service.buscar_dados(self.tipo_relatorio, filtros)
-        self.lbl_contador.configure(text=f"{len(self.dados_completos)} resultado(s) encontrados")
+        self.filtros_atuais = filtros
         self.pagina_atual = 1
+        self.chaves_paginas = [None]
+        self._bloquear_paginacao()
+        # Contagem e primeira página rodam fora da thread do Tk; uma busca nova descarta a anterior
+        self.executor.executar(self._chave_busca, self._buscar_primeira_pagina, self.tipo_relatorio, filtros, self.itens_por_pagina,
+                               ao_concluir=self._ao_receber_busca, ao_falhar=self._ao_falhar_busca, indicador=self.indicador)
+
+    def _buscar_primeira_pagina(self, tipo, filtros, limite):
+        total = self.service.contar_resultados(tipo, filtros)
+        return total, self._buscar_pagina(tipo, filtros, limite)
+
+    def _buscar_pagina(self, tipo, filtros, limite, apos=None):
+        # Roda na thread de trabalho: a página e a situação dos arquivos dela no índice da rede
+        linhas, chave = self.service.buscar_pagina(tipo, filtros, limite, apos)
+        return linhas, chave, self.service.situacoes_arquivos(linhas)
+
+    def _ao_receber_busca(self, resultado):
+        self.total_itens, pagina = resultado
+        self.lbl_contador.configure(text=f"{self.total_itens} resultado(s) encontrados")
+        self._ao_receber_pagina(1, pagina)
+        self.executor.executar(f"relatorio-{self.tipo_relatorio}-orfaos", self.service.listar_orfaos, self.tipo_relatorio,
+                               ao_concluir=self._ao_receber_orfaos)
+
+    def _ao_receber_orfaos(self, orfaos):
+        self.orfaos = orfaos
+        if orfaos:
+            self.btn_orfaos.configure(text=f"⚠️ {len(orfaos)} arquivo(s) na rede sem registro")
+            self.btn_orfaos.pack(side="left", padx=10)
+        else:
+            self.btn_orfaos.pack_forget()
+
+    def _mostrar_orfaos(self):
+        popup = ctk.CTkToplevel(self)
+        popup.title("Arquivos na rede sem registro no banco")
+        popup.geometry("800x550")
+        popup.grab_set()
+
+        ctk.CTkLabel(popup, text="Arquivos sem registro", font=("Arial Black", 20), text_color="#0F8C75").pack(pady=15)
+        caixa = ctk.CTkTextbox(popup, font=("Consolas", 12), fg_color="#F9F9F9")
+        caixa.pack(fill="both", expand=True, padx=20, pady=10)
+        caixa.insert("end", "\n".join(self.orfaos))
+        caixa.configure(state="disabled")
+        ctk.CTkButton(popup, text="Fechar", fg_color="gray", font=("Arial Bold", 15), height=45, command=popup.destroy).pack(fill="x", padx=40, pady=20)
+
+    def _carregar_pagina(self):
+        # Busca no banco só as linhas da página atual (a partir da chave onde ela começa)
+        pagina = self.pagina_atual
+        apos = self.chaves_paginas[pagina - 1]
+        self._bloquear_paginacao()
+        self.executor.executar(self._chave_busca, self._buscar_pagina, self.tipo_relatorio, self.filtros_atuais, self.itens_por_pagina, apos,
+                               ao_concluir=lambda resultado: self._ao_receber_pagina(pagina, resultado),
+                               ao_falhar=self._ao_falhar_pagina, indicador=self.indicador)
+
+    def _ao_receber_pagina(self, pagina, resultado):
+        self.dados_pagina, chave_proxima, self.situacoes_arquivos = resultado
+        if len(self.chaves_paginas) == pagina:
+            self.chaves_paginas.append(chave_proxima)
+        self.pagina_exibida = pagina
         self._renderizar_pagina()
 
+    def _ao_falhar_busca(self, erro):
+        # Busca nova falhou: a tabela antiga não corresponde mais aos filtros (nem às chaves de página)
+        self.total_itens = 0
+        self.dados_pagina = []
+        self.pagina_atual = self.pagina_exibida = 1
+        self.lbl_contador.configure(text="0 resultados")
+        self._renderizar_pagina()
+        messagebox.showerror("Erro", f"Falha ao buscar os dados:\n{erro}")
+
+    def _ao_falhar_pagina(self, erro):
+        # Troca de página falhou: continua na página que está na tela (nenhuma chave nova foi guardada)
+        self.pagina_atual = self.pagina_exibida
+        self._renderizar_pagina()
+        messagebox.showerror("Erro", f"Falha ao buscar os dados:\n{erro}")
+
+    def _bloquear_paginacao(self):
+        # Evita trocar de página enquanto a chave da próxima ainda não chegou
+        self.btn_ant.configure(state="disabled")
+        self.btn_prox.configure(state="disabled")
+
     def _renderizar_pagina(self):
-        for w in self.scroll_tabela.winfo_children(): w.destroy()
-        total_itens = len(self.dados_completos)
+        total_itens = self.total_itens
         total_paginas = math.ceil(total_itens / self.itens_por_pagina) if total_itens > 0 else 1
         self.lbl_paginacao.configure(text=f"{self.pagina_atual} / {total_paginas}")
         self.btn_ant.configure(state="normal" if self.pagina_atual > 1 else "disabled")
         self.btn_prox.configure(state="normal" if self.pagina_atual < total_paginas else "disabled")
 
-        if total_itens == 0: 
-            ctk.CTkLabel(self.scroll_tabela, text="Nenhum dado encontrado para os filtros aplicados.", text_color="gray", font=("Arial", 14)).pack(pady=20)
-            return
+        # Só reaproveita as linhas já montadas com os dados da página nova
+        self.tabela.definir_dados(self.dados_pagina if total_itens else [])
 
-        inicio = (self.pagina_atual - 1) * self.itens_por_pagina
-        fim = inicio + self.itens_por_pagina
-        dados_da_pagina = self.dados_completos[inicio:fim]
-
-        for i, linha in enumerate(dados_da_pagina):
-            bg_color = "#F9F9F9" if i % 2 == 0 else "#FFFFFF"
-            linha_frame = ctk.CTkFrame(self.scroll_tabela, fg_color=bg_color, corner_radius=6)
-            linha_frame.pack(fill="x", pady=2, padx=2)
-
-            id_banco_invisivel = linha[0] 
-            caminho_arquivo = linha[-1] 
-            valores_exibicao = linha[1:-1]
-
-            for j, val in enumerate(valores_exibicao):
-                texto = str(val) if val is not None else "-"
-                cor_txt = "#333333"
-                
-                if self.tipo_relatorio == "OS" and j == 7: 
-                    if "Aberta" in texto: cor_txt = "#D32F2F"
-                    elif "Não Aut" in texto: cor_txt = "#E67E22"
-                    elif "SIM" in texto: cor_txt = "#0F8C75"
-
-                limite = int(self.col_widths[j] / 8)
-                texto_curto = texto[:limite] + ".." if len(texto) > limite else texto
-
-                lbl = ctk.CTkLabel(linha_frame, text=texto_curto, width=self.col_widths[j], text_color=cor_txt, font=("Arial", 12), anchor="w")
-                lbl.pack(side="left", padx=5, pady=6)
-
-            frame_coluna_acoes = ctk.CTkFrame(linha_frame, width=self.col_widths[-1], height=40, fg_color="transparent")
-            frame_coluna_acoes.pack_propagate(False) 
-            frame_coluna_acoes.pack(side="left", padx=5, pady=2)
-
-            frame_botoes = ctk.CTkFrame(frame_coluna_acoes, fg_color="transparent")
-            frame_botoes.place(relx=0.5, rely=0.5, anchor="center")
-
-            ctk.CTkButton(frame_botoes, text="🔍", font=("Arial", 16), fg_color="#F24822", hover_color="#FF522B", width=45, height=32, command=lambda id_reg=id_banco_invisivel: self._acao_detalhes(id_reg)).pack(side="left", padx=3)
-
-            if caminho_arquivo and caminho_arquivo != "-":
-                ctk.CTkButton(frame_botoes, text="📄", font=("Arial Bold", 16), fg_color="#0F8C75", hover_color="#0B6B59", width=75, height=32, command=lambda p=caminho_arquivo: self._abrir_word(p)).pack(side="left", padx=3)
-            else:
-                ctk.CTkLabel(frame_botoes, text="-", width=75, anchor="center").pack(side="left", padx=3)
-
-            if self.is_admin:
-                ctk.CTkButton(frame_botoes, text="🗑️", anchor="center", font=("Arial", 16),fg_color="#D32F2F", hover_color="#B71C1C", width=45, height=32, command=lambda id_reg=id_banco_invisivel: self._acao_excluir(id_reg)).pack(side="left", padx=3)
-                
     def _proxima_pagina(self):
         self.pagina_atual += 1
-        self._renderizar_pagina()
+        self._carregar_pagina()
 
     def _pagina_anterior(self):
         self.pagina_atual -= 1
-        self._renderizar_pagina()
+        self._carregar_pagina()
+
+    # EXPORTAÇÃO (CSV / EXCEL)
+    def acao_exportar(self):
+        nome = "relatorio_os" if self.tipo_relatorio == "OS" else "relatorio_pareceres"
+        caminho = filedialog.asksaveasfilename(defaultextension=".xlsx", initialfile=nome, title="Exportar Resultados",
+                                               filetypes=[("Planilha Excel", "*.xlsx"), ("CSV (separado por ;)", "*.csv")])
+        if not caminho: return
+
+        # Exporta os filtros da última busca (o que está na tabela), lendo e gravando numa thread de trabalho
+        total = self.total_itens
+        progresso = lambda linhas: self.executor.notificar(self._ao_progresso_exportacao, linhas, total)
+        self.btn_exportar.configure(state="disabled")
+        self.lbl_exportacao.configure(text="Exportando...")
+        self.executor.executar(f"relatorio-{self.tipo_relatorio}-exportar", self.service.exportar, self.tipo_relatorio, dict(self.filtros_atuais),
+                               caminho, progresso=progresso, ao_concluir=self._ao_concluir_exportacao,
+                               ao_falhar=lambda e: self._ao_concluir_exportacao((False, f"Erro ao exportar: {e}")))
+
+    def _ao_progresso_exportacao(self, linhas, total):
+        if self.btn_exportar.cget("state") == "disabled":
+            self.lbl_exportacao.configure(text=f"Exportando: {linhas}/{total}" if total else f"Exportando: {linhas}")
+
+    def _ao_concluir_exportacao(self, resultado):
+        self.btn_exportar.configure(state="normal")
+        self.lbl_exportacao.configure(text="")
+        sucesso, msg = resultado
+        if sucesso:
+            messagebox.showinfo("Sucesso", msg)
+        else:
+            messagebox.showwarning("Atenção", msg)
 
     def _abrir_word(self, caminho):
-        sucesso, msg = self.service.abrir_arquivo(caminho)
-        if not sucesso: messagebox.showerror("Erro de Leitura", msg)
+        # A verificação do arquivo na rede pode demorar: roda fora da thread do Tk
+        self.executor.executar("relatorio-abrir-word", self.service.abrir_arquivo, caminho,
+                               ao_concluir=lambda r: r[0] or messagebox.showerror("Erro de Leitura", r[1]),
+                               indicador=self.indicador)
 
     # POPUP DE DETALHES (E EDIÇÃO PARA ADMIN)
     def _acao_detalhes(self, id_registro):
-        dados = self.service.buscar_detalhes_para_edicao(self.tipo_relatorio, id_registro)
+        self.executor.executar(f"relatorio-{self.tipo_relatorio}-detalhes", self.service.buscar_detalhes_para_edicao, self.tipo_relatorio, id_registro,
+                               ao_concluir=lambda dados: self._abrir_popup_detalhes(id_registro, dados),
+                               ao_falhar=lambda e: messagebox.showerror("Erro", "Falha ao carregar detalhes do banco."),
+                               indicador=self.indicador)
+
+    def _abrir_popup_detalhes(self, id_registro, dados):
         if not dados:
             messagebox.showerror("Erro", "Falha ao carregar detalhes do banco.")
             return
@@ -298,16 +412,24 @@ class RelatorioView(ctk.CTkFrame):
                 elif hasattr(v, 'get'): dados_novos[k] = v.get().strip()
                 else: dados_novos[k] = v
 
-            sucesso, msg = self.service.salvar_edicao(self.tipo_relatorio, id_registro, dados_novos)
-            if sucesso:
-                messagebox.showinfo("Sucesso", msg)
-                popup.destroy()
-                self.acao_buscar() 
-            else:
-                messagebox.showerror("Erro", msg)
+            btn_salvar.configure(state="disabled")
+
+            def ao_salvar(resultado):
+                sucesso, msg = resultado
+                if sucesso:
+                    messagebox.showinfo("Sucesso", msg)
+                    popup.destroy()
+                    self.acao_buscar()
+                else:
+                    btn_salvar.configure(state="normal")
+                    messagebox.showerror("Erro", msg)
+
+            self.executor.executar(f"relatorio-{self.tipo_relatorio}-salvar", self.service.salvar_edicao, self.tipo_relatorio, id_registro, dados_novos,
+                                   ao_concluir=ao_salvar, ao_falhar=lambda e: ao_salvar((False, f"Erro ao salvar: {e}")), indicador=self.indicador)
 
         if self.is_admin:
-            ctk.CTkButton(popup, text="💾 Salvar Alterações", fg_color="#0F8C75", font=("Arial Bold", 15), height=45, command=salvar).pack(fill="x", padx=40, pady=20)
+            btn_salvar = ctk.CTkButton(popup, text="💾 Salvar Alterações", fg_color="#0F8C75", font=("Arial Bold", 15), height=45, command=salvar)
+            btn_salvar.pack(fill="x", padx=40, pady=20)
         else:
             ctk.CTkButton(popup, text="Fechar", fg_color="gray", font=("Arial Bold", 15), height=45, command=popup.destroy).pack(fill="x", padx=40, pady=20)
 
@@ -330,15 +452,23 @@ class RelatorioView(ctk.CTkFrame):
                 messagebox.showwarning("Aviso", "Por favor, digite uma justificativa válida.")
                 return
             
-            sucesso, msg = self.service.excluir_registro(self.tipo_relatorio, id_registro, motivo, self.usuario_logado)
-            if sucesso:
-                messagebox.showinfo("Excluído", msg)
-                popup.destroy()
-                self.acao_buscar()
-            else:
-                messagebox.showerror("Erro", msg)
-
-        ctk.CTkButton(popup, text="Confirmar Exclusão e Gravar Log", fg_color="#D32F2F", hover_color="#B71C1C", font=("Arial Bold", 14), height=45, command=confirmar).pack(fill="x", padx=30, pady=20)
+            btn_confirmar.configure(state="disabled")
+
+            def ao_excluir(resultado):
+                sucesso, msg = resultado
+                if sucesso:
+                    messagebox.showinfo("Excluído", msg)
+                    popup.destroy()
+                    self.acao_buscar()
+                else:
+                    btn_confirmar.configure(state="normal")
+                    messagebox.showerror("Erro", msg)
+
+            self.executor.executar(f"relatorio-{self.tipo_relatorio}-excluir", self.service.excluir_registro, self.tipo_relatorio, id_registro, motivo, self.usuario_logado,
+                                   ao_concluir=ao_excluir, ao_falhar=lambda e: ao_excluir((False, f"Erro ao excluir: {e}")), indicador=self.indicador)
+
+        btn_confirmar = ctk.CTkButton(popup, text="Confirmar Exclusão e Gravar Log", fg_color="#D32F2F", hover_color="#B71C1C", font=("Arial Bold", 14), height=45, command=confirmar)
+        btn_confirmar.pack(fill="x", padx=30, pady=20)
 
 def renderizar(frame_destino, usuario_logado, tipo):
     return RelatorioView(master=frame_destino, usuario_logado=usuario_logado, tipo_relatorio=tipo)
\ No newline at end of file
@@ -0,0 +1,71 @@
+# shared/cache_enderecos.py
+import time
+import threading
+from collections import OrderedDict
+from config.settings import CACHE_ENDERECOS_TTL_MIN, CACHE_ENDERECOS_MAX_ITENS
+
+AUSENTE = object()  # Retorno de obter() quando o ID não está no cache (None = "ID sem cadastro")
+
+class CacheEnderecos:
+    """
+    Cache em memória dos endereços por id_ponto, com validade (TTL) e descarte do menos usado (LRU).
+    Também guarda "não cadastrado" (None), para um ID novo não ir ao banco a cada saída do campo.
+
+    Toda gravação chama invalidar(), que também troca a versão do cache: consultas que começaram
+    antes da gravação não podem mais guardar o resultado antigo (ver guardar(..., versao)).
+    """
+    def __init__(self, ttl_seg, max_itens):
+        self.ttl_seg = ttl_seg
+        self.max_itens = max_itens
+        self._itens = OrderedDict()  # id -> (expira_em, dados)
+        self._versao = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(id_ponto):
+        return str(id_ponto).strip().upper()
+
+    def versao(self):
+        return self._versao
+
+    def obter(self, id_ponto):
+        chave = self._chave(id_ponto)
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return AUSENTE
+            expira_em, dados = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return AUSENTE
+            self._itens.move_to_end(chave)
+            return dict(dados) if dados is not None else None
+
+    def guardar(self, id_ponto, dados, versao):
+        self.guardar_varios({id_ponto: dados}, versao)
+
+    def guardar_varios(self, enderecos, versao):
+        """enderecos: {id_ponto: dados ou None}. Ignorado se houve gravação depois de 'versao'."""
+        expira_em = time.monotonic() + self.ttl_seg
+        with self._lock:
+            if versao != self._versao:
+                return
+            for id_ponto, dados in enderecos.items():
+                chave = self._chave(id_ponto)
+                self._itens[chave] = (expira_em, dict(dados) if dados is not None else None)
+                self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, *ids_ponto):
+        """Remove os IDs informados (ou tudo, se nenhum for informado)."""
+        with self._lock:
+            self._versao += 1
+            if not ids_ponto:
+                self._itens.clear()
+            for id_ponto in ids_ponto:
+                self._itens.pop(self._chave(id_ponto), None)
+
+
+# Cache único do processo (compartilhado pelas telas de OS e de Endereços)
+cache_enderecos = CacheEnderecos(CACHE_ENDERECOS_TTL_MIN * 60, CACHE_ENDERECOS_MAX_ITENS)
@@ -0,0 +1,109 @@
+# shared/exportacao.py
+import io
+import uuid
+import psycopg2
+from config.database import get_db_connection
+from config.settings import EXPORTACAO_LOTE_LINHAS
+
+# Última linha que o Excel aceita numa planilha (a linha 0 é o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_575
+
+
+def ler_em_lotes(query, params=None, lote=EXPORTACAO_LOTE_LINHAS):
+    """
+    Gera as linhas da consulta aos poucos, por um cursor nomeado (do lado do servidor):
+    só um lote de cada vez fica na memória, qualquer que seja o tamanho do resultado.
+    A conexão fica presa ao gerador até ele terminar (usar numa thread de trabalho).
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(name=f"sigp_exportacao_{uuid.uuid4().hex}") as cursor:
+                cursor.execute(query, params)
+                while True:
+                    linhas = cursor.fetchmany(lote)
+                    if not linhas:
+                        break
+                    yield from linhas
+    except psycopg2.Error as e:
+        print(f"[LOG DB] Erro ao ler dados para exportação: {e}")
+        raise Exception("Falha ao ler os dados do banco para a exportação.")
+
+
+def copiar_csv(query, params, arquivo, progresso=None):
+    """
+    Grava o resultado da consulta em CSV direto pelo COPY do PostgreSQL (o banco monta o arquivo;
+    o Python só repassa os bytes). Separador ';' e cabeçalho, como o Excel em português espera.
+    arquivo: aberto em modo texto. Devolve quantas linhas de dados foram gravadas.
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                # O COPY não aceita parâmetros: os valores entram já escapados pelo mogrify
+                consulta = cursor.mogrify(query, params).decode(psycopg2.extensions.encodings[conn.encoding])
+                destino = _ContadorLinhas(arquivo, progresso)
+                cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv, HEADER, DELIMITER ';')", destino)
+                destino.avisar()
+                return max(destino.linhas - 1, 0)
+    except psycopg2.Error as e:
+        print(f"[LOG DB] Erro ao exportar CSV: {e}")
+        raise Exception("Falha ao ler os dados do banco para a exportação.")
+
+
+class _ContadorLinhas(io.TextIOBase):
+    # O psycopg2 entrega o COPY uma linha por write() (já como texto, por ser TextIOBase): conta as linhas para o progresso
+    def __init__(self, arquivo, progresso):
+        super().__init__()
+        self.arquivo = arquivo
+        self.progresso = progresso
+        self.linhas = 0
+
+    def write(self, dados):
+        self.arquivo.write(dados)
+        self.linhas += 1
+        if (self.linhas - 1) % EXPORTACAO_LOTE_LINHAS == 0:  # A primeira linha é o cabeçalho
+            self.avisar()
+        return len(dados)
+
+    def avisar(self):
+        if self.progresso and self.linhas > 1:
+            self.progresso(self.linhas - 1)
+
+
+def abrir_planilha(caminho):
+    """Workbook do xlsxwriter em modo constant_memory: cada linha vai para o disco assim que a próxima começa."""
+    import xlsxwriter  # Import adiado (só na exportação)
+    return xlsxwriter.Workbook(caminho, {"constant_memory": True})
+
+
+def escrever_aba(workbook, nome, colunas, linhas, criar_vazia=True, progresso=None):
+    """
+    Escreve uma aba com cabeçalho e as linhas na ordem em que chegam (exigência do constant_memory).
+    colunas: [(titulo, largura ou None)]. linhas: qualquer iterável de tuplas (ex.: ler_em_lotes).
+    Com criar_vazia=False a aba só é criada se vier ao menos uma linha. Devolve quantas linhas escreveu.
+    """
+    aba = None
+    total = 0
+    for total, linha in enumerate(linhas, start=1):
+        if aba is None:
+            aba = _criar_aba(workbook, nome, colunas)
+        if total > LIMITE_LINHAS_EXCEL:
+            raise Exception(f"A aba '{nome}' passou do limite de linhas do Excel. Refine os filtros ou exporte em CSV.")
+        aba.write_row(total, 0, linha)
+        if progresso and total % EXPORTACAO_LOTE_LINHAS == 0:
+            progresso(total)
+    if aba is None and criar_vazia:
+        _criar_aba(workbook, nome, colunas)
+    if progresso and total:
+        progresso(total)
+    return total
+
+
+def _criar_aba(workbook, nome, colunas):
+    aba = workbook.add_worksheet(nome)
+    cabecalho = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    # Larguras antes das linhas: no constant_memory a formatação da coluna não pode vir depois
+    for indice, (_, largura) in enumerate(colunas):
+        if largura:
+            aba.set_column(indice, indice, largura)
+    aba.write_row(0, 0, [titulo for titulo, _ in colunas], cabecalho)
+    return aba
@@ -0,0 +1,192 @@
+# shared/fila_envio.py
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from config.settings import PASTA_FILA_ENVIO, FILA_ENVIO_INTERVALO_SEG, FILA_ENVIO_ESPERA_MAX_SEG
+from src.shared.indice_arquivos import indice_arquivos
+
+class FilaEnvioRede:
+    """
+    Documentos gerados são gravados primeiro numa pasta local e copiados para a rede por uma
+    thread em segundo plano. A tela não espera a rede (nem trava se ela estiver lenta ou fora do ar).
+
+    Cada envio pendente tem um registro .json em <pasta>/fila (o "diário"): se o programa fechar
+    antes de copiar, o envio continua na próxima abertura. Se a cópia falhar, tenta de novo com
+    espera crescente (até FILA_ENVIO_ESPERA_MAX_SEG). O registro só some depois que o arquivo chegou na rede.
+    """
+    IDADE_MINIMA_SOBRA_SEG = 3600
+
+    def __init__(self, pasta, intervalo_seg, espera_max_seg):
+        self.pasta_arquivos = os.path.join(pasta, "arquivos")
+        self.pasta_fila = os.path.join(pasta, "fila")
+        self.intervalo_seg = intervalo_seg
+        self.espera_max_seg = espera_max_seg
+        self._acordar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # =========================================================
+    # USO PELOS SERVIÇOS
+    # =========================================================
+    def caminho_local(self, destino):
+        """Caminho na pasta local onde o documento deve ser gravado antes de ir para 'destino'."""
+        os.makedirs(self.pasta_arquivos, exist_ok=True)
+        return os.path.join(self.pasta_arquivos, f"{uuid.uuid4().hex}_{os.path.basename(destino)}")
+
+    def enfileirar(self, caminho_local, destino):
+        """Registra no diário que caminho_local deve ser copiado para destino e acorda o envio."""
+        registro = {
+            "id": uuid.uuid4().hex,
+            "local": caminho_local,
+            "destino": destino,
+            "criado_em": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            "tentativas": 0,
+            "ultimo_erro": "",
+            "proxima_tentativa": 0,
+        }
+        self._gravar_registro(registro)
+        self.iniciar()
+        self._acordar.set()
+
+    def pendentes(self):
+        """Envios que ainda não chegaram na rede (mais antigos primeiro)."""
+        if not os.path.isdir(self.pasta_fila):
+            return []
+        registros = []
+        for nome in os.listdir(self.pasta_fila):
+            if not nome.endswith(".json"): continue
+            try:
+                with open(os.path.join(self.pasta_fila, nome), "r", encoding="utf-8") as f:
+                    registros.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Registro sendo regravado neste instante: aparece na próxima leitura
+        return sorted(registros, key=lambda r: datetime.strptime(r["criado_em"], "%d/%m/%Y %H:%M:%S"))
+
+    def localizar(self, destino):
+        """Se o arquivo de 'destino' ainda está na fila, devolve a cópia local (para abrir antes do envio)."""
+        for registro in self.pendentes():
+            if registro["destino"] == destino and os.path.exists(registro["local"]):
+                return registro["local"]
+        return None
+
+    def cancelar(self, destino_ou_pasta):
+        """Tira da fila o arquivo (ou tudo dentro da pasta) que não deve mais ir para a rede, ex.: documento excluído."""
+        prefixo = destino_ou_pasta.rstrip("\\/") + os.sep
+        with self._lock:
+            for registro in self.pendentes():
+                if registro["destino"] == destino_ou_pasta or registro["destino"].startswith(prefixo):
+                    self._apagar(registro)
+
+    def tentar_agora(self):
+        """Zera a espera dos envios que falharam e tenta de novo imediatamente."""
+        with self._lock:
+            for registro in self.pendentes():
+                registro["proxima_tentativa"] = 0
+                self._gravar_registro(registro)
+        self.iniciar()
+        self._acordar.set()
+
+    # =========================================================
+    # ENVIO EM SEGUNDO PLANO
+    # =========================================================
+    def iniciar(self):
+        """Sobe a thread de envio (uma só por processo). Chamado na abertura para continuar a fila antiga."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._laco, name="sigp-fila-envio", daemon=True)
+                self._thread.start()
+
+    def _laco(self):
+        while True:
+            self._acordar.clear()
+            proxima = None
+            for registro in self.pendentes():
+                agora = time.time()
+                if registro["proxima_tentativa"] > agora:
+                    proxima = min(proxima or registro["proxima_tentativa"], registro["proxima_tentativa"])
+                    continue
+                try:
+                    self._enviar(registro)
+                except Exception as e:
+                    # Um registro com problema não pode parar o envio dos demais
+                    print(f"[LOG REDE] Erro inesperado ao enviar {registro.get('destino')}: {e}")
+            try:
+                self._limpar_sobras()
+            except OSError as e:
+                print(f"[LOG FILE] Falha ao limpar a pasta local da fila: {e}")
+            espera = self.intervalo_seg if proxima is None else max(0.5, proxima - time.time())
+            self._acordar.wait(min(espera, self.espera_max_seg))
+
+    def _enviar(self, registro):
+        destino = registro["destino"]
+        temporario = destino + ".enviando"
+        try:
+            if not os.path.exists(registro["local"]):
+                raise FileNotFoundError(f"Cópia local sumiu: {registro['local']}")
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            # Copia com outro nome e renomeia: na rede nunca fica um .docx pela metade
+            shutil.copyfile(registro["local"], temporario)
+            os.replace(temporario, destino)
+        except Exception as e:
+            with self._lock:
+                if not os.path.exists(self._caminho_registro(registro)):
+                    return  # Cancelado enquanto copiava
+                registro["tentativas"] += 1
+                registro["ultimo_erro"] = str(e)
+                espera = min(self.intervalo_seg * 2 ** (registro["tentativas"] - 1), self.espera_max_seg)
+                registro["proxima_tentativa"] = time.time() + espera
+                self._gravar_registro(registro)
+            print(f"[LOG REDE] Falha ao enviar {destino} (tentativa {registro['tentativas']}): {e}")
+            return
+        with self._lock:
+            if not os.path.exists(self._caminho_registro(registro)):
+                # Documento excluído enquanto copiava: não deixa o arquivo órfão na rede
+                try: os.remove(destino)
+                except OSError: pass
+            else:
+                indice_arquivos.registrar(destino)
+            self._apagar(registro)
+
+    # =========================================================
+    # DIÁRIO EM DISCO
+    # =========================================================
+    def _caminho_registro(self, registro):
+        return os.path.join(self.pasta_fila, f"{registro['id']}.json")
+
+    def _gravar_registro(self, registro):
+        # Grava num .tmp e troca de nome: um registro nunca fica cortado se o programa fechar no meio
+        os.makedirs(self.pasta_fila, exist_ok=True)
+        caminho = self._caminho_registro(registro)
+        with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False)
+        os.replace(caminho + ".tmp", caminho)
+
+    def _apagar(self, registro):
+        for caminho in (self._caminho_registro(registro), registro["local"]):
+            try: os.remove(caminho)
+            except FileNotFoundError: pass
+            except OSError as e:
+                # Ex.: cópia local aberta no Word (Windows trava o arquivo); fica para _limpar_sobras()
+                print(f"[LOG FILE] Não foi possível apagar {caminho}: {e}")
+
+    def _limpar_sobras(self):
+        # Cópias locais que já saíram da fila mas não puderam ser apagadas na hora (ver _apagar).
+        # Só as antigas: um documento recém-gerado ainda pode estar esperando o enfileirar().
+        if not os.path.isdir(self.pasta_arquivos):
+            return
+        em_uso = {os.path.normcase(r["local"]) for r in self.pendentes()}
+        limite = time.time() - self.IDADE_MINIMA_SOBRA_SEG
+        for item in os.scandir(self.pasta_arquivos):
+            try:
+                if os.path.normcase(item.path) not in em_uso and item.stat().st_mtime < limite:
+                    os.remove(item.path)
+            except OSError:
+                pass  # Ainda aberto: tenta na próxima volta
+
+
+# Fila única do programa
+fila_envio = FilaEnvioRede(PASTA_FILA_ENVIO, FILA_ENVIO_INTERVALO_SEG, FILA_ENVIO_ESPERA_MAX_SEG)
@@ -0,0 +1,35 @@
+# shared/filtros_sql.py
+from datetime import timedelta
+from config.schema import migracao_aplicada, MIGRACAO_BUSCA_TRIGRAM
+
+def condicao_contem(coluna):
+    """
+    Trecho SQL de "coluna contém o termo" para os filtros de texto (o parâmetro continua sendo f"%{termo}%").
+    Com os índices trigram instalados a comparação ignora acentos e usa o índice GIN
+    (a expressão tem que ser igual à do índice). Sem eles, cai no ILIKE simples de sempre.
+    """
+    if migracao_aplicada(MIGRACAO_BUSCA_TRIGRAM):
+        return f"sigp.f_unaccent({coluna}) ILIKE sigp.f_unaccent(%s)"
+    return f"{coluna} ILIKE %s"
+
+
+def clausula_apos(coluna_data, coluna_id, apos):
+    """
+    Paginação por chave (keyset): trecho SQL que continua a listagem logo depois da última linha
+    da página anterior, para listagens em ORDER BY coluna_data DESC NULLS LAST, coluna_id DESC.
+    apos = (data, id) da última linha, ou None na primeira página. Devolve (trecho, params).
+    """
+    if not apos:
+        return "", []
+    data_ref, id_ref = apos
+    if data_ref is None:
+        return f" AND {coluna_data} IS NULL AND {coluna_id} < %s", [id_ref]
+    return f" AND (({coluna_data}, {coluna_id}) < (%s, %s) OR {coluna_data} IS NULL)", [data_ref, id_ref]
+
+
+def clausula_periodo(coluna, data_inicio, data_fim):
+    """
+    Filtro "coluna (timestamp) entre os dias data_inicio e data_fim, inclusive" como intervalo
+    [início, dia seguinte ao fim): ao contrário de DATE(coluna) BETWEEN, pode usar o índice da coluna.
+    """
+    return f" AND {coluna} >= %s AND {coluna} < %s", [data_inicio, data_fim + timedelta(days=1)]
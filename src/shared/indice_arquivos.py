@@ -0,0 +1,169 @@
+# shared/indice_arquivos.py
+import json
+import os
+import threading
+from config.settings import RAIZ_REDE, INDICE_ARQUIVOS_INTERVALO_MIN, ARQUIVO_INDICE_REDE
+
+# Situação de um documento no índice
+EXISTE = "existe"
+AUSENTE = "ausente"
+
+
+def _chave(caminho):
+    # Mesma grafia para o caminho montado pelo sistema e o lido da rede (no Windows ignora maiúsculas e barras)
+    return os.path.normcase(os.path.normpath(caminho))
+
+
+class IndiceArquivosRede:
+    """
+    Lista em memória dos .docx que existem em RAIZ_REDE\\SIGP, mantida por uma thread em segundo plano.
+    Os Relatórios consultam o índice (sem acessar a rede na thread da tela) para marcar documentos que
+    faltam na rede e arquivos que estão lá sem registro no banco.
+
+    A varredura é incremental: toda pasta tem a data de modificação anotada e só é listada de novo
+    quando ela muda (criar/apagar/renomear um arquivo muda a data da pasta onde ele está).
+    O índice é salvo num arquivo local, então já vale logo na abertura, antes da primeira varredura.
+    """
+    def __init__(self, raiz, intervalo_seg, arquivo_local):
+        self.raiz = os.path.join(raiz, "SIGP")
+        self.intervalo_seg = intervalo_seg
+        self.arquivo_local = arquivo_local
+        self._pastas = {}       # pasta -> {"mtime", "arquivos": [nomes .docx], "subpastas": [nomes]}
+        self._arquivos = set()  # _chave() de cada .docx
+        self._pronto = False    # True depois de carregar do disco ou terminar uma varredura
+        self._versao = 0        # Muda sempre que a lista de arquivos muda
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    # =========================================================
+    # CONSULTA (THREAD DA TELA OU DE TRABALHO, SÓ MEMÓRIA)
+    # =========================================================
+    @property
+    def versao(self):
+        return self._versao
+
+    def situacao(self, caminho):
+        """EXISTE, AUSENTE ou None (índice ainda não carregado, ou caminho fora da pasta do SIGP)."""
+        if not caminho or not self._pronto:
+            return None
+        chave = _chave(caminho)
+        if not chave.startswith(_chave(self.raiz) + os.sep):
+            return None
+        return EXISTE if chave in self._arquivos else AUSENTE
+
+    def arquivos_em(self, *partes):
+        """Todos os .docx indexados dentro de RAIZ_REDE\\SIGP\\<ano>\\<partes...> (qualquer ano)."""
+        trecho = os.sep + _chave(os.path.join(*partes)) + os.sep
+        with self._lock:
+            return [caminho for caminho in self._arquivos if trecho in caminho]
+
+    # =========================================================
+    # AVISOS DE QUEM GRAVA/APAGA (EVITA ESPERAR A PRÓXIMA VARREDURA)
+    # =========================================================
+    def registrar(self, caminho):
+        with self._lock:
+            if _chave(caminho) not in self._arquivos:
+                self._arquivos.add(_chave(caminho))
+                self._versao += 1
+
+    def remover(self, caminho_ou_pasta):
+        chave = _chave(caminho_ou_pasta)
+        with self._lock:
+            restantes = {c for c in self._arquivos if c != chave and not c.startswith(chave + os.sep)}
+            if len(restantes) != len(self._arquivos):
+                self._arquivos = restantes
+                self._versao += 1
+
+    # =========================================================
+    # VARREDURA EM SEGUNDO PLANO
+    # =========================================================
+    def iniciar(self):
+        """Carrega o índice salvo e sobe a thread de varredura (uma só por processo)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._laco, name="sigp-indice-arquivos", daemon=True)
+        self._carregar_local()
+        self._thread.start()
+
+    def atualizar_agora(self):
+        self._acordar.set()
+
+    def _laco(self):
+        while True:
+            self._acordar.clear()
+            try:
+                self._varrer()
+            except Exception as e:
+                print(f"[LOG REDE] Falha ao indexar os documentos da rede: {e}")
+            self._acordar.wait(self.intervalo_seg)
+
+    def _varrer(self):
+        try:
+            os.stat(self.raiz)
+        except OSError as e:
+            print(f"[LOG REDE] Pasta do SIGP inacessível, mantendo o índice anterior: {e}")
+            return
+
+        pastas = {}
+        pilha = [self.raiz]
+        while pilha:
+            pasta = pilha.pop()
+            anterior = self._pastas.get(pasta)
+            try:
+                mtime = os.stat(pasta).st_mtime
+                if anterior and anterior["mtime"] == mtime:
+                    entrada = anterior
+                else:
+                    entrada = {"mtime": mtime, "arquivos": [], "subpastas": []}
+                    with os.scandir(pasta) as itens:
+                        for item in itens:
+                            if item.is_dir():
+                                entrada["subpastas"].append(item.name)
+                            elif item.name.lower().endswith(".docx") and not item.name.startswith("~$"):
+                                entrada["arquivos"].append(item.name)
+            except FileNotFoundError:
+                continue  # Pasta apagada: sai do índice
+            except OSError:
+                if not anterior: continue
+                entrada = anterior  # Falha passageira da rede: mantém o que já se sabia dessa pasta
+            pastas[pasta] = entrada
+            pilha.extend(os.path.join(pasta, nome) for nome in entrada["subpastas"])
+
+        self._aplicar(pastas)
+        self._salvar_local()
+
+    def _aplicar(self, pastas):
+        arquivos = {_chave(os.path.join(pasta, nome)) for pasta, entrada in pastas.items() for nome in entrada["arquivos"]}
+        with self._lock:
+            self._pastas = pastas
+            if arquivos != self._arquivos:
+                self._arquivos = arquivos
+                self._versao += 1
+            self._pronto = True
+
+    # =========================================================
+    # CÓPIA LOCAL DO ÍNDICE
+    # =========================================================
+    def _carregar_local(self):
+        try:
+            with open(self.arquivo_local, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("raiz") == self.raiz:
+                self._aplicar(dados.get("pastas", {}))
+        except (OSError, ValueError):
+            pass  # Primeira abertura (ou arquivo corrompido): espera a primeira varredura
+
+    def _salvar_local(self):
+        try:
+            os.makedirs(os.path.dirname(self.arquivo_local), exist_ok=True)
+            with open(self.arquivo_local + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"raiz": self.raiz, "pastas": self._pastas}, f, ensure_ascii=False)
+            os.replace(self.arquivo_local + ".tmp", self.arquivo_local)
+        except OSError as e:
+            print(f"[LOG FILE] Não foi possível salvar o índice de arquivos: {e}")
+
+
+# Índice único do programa
+indice_arquivos = IndiceArquivosRede(RAIZ_REDE, INDICE_ARQUIVOS_INTERVALO_MIN * 60, ARQUIVO_INDICE_REDE)
@@ -0,0 +1,128 @@
+# shared/modelos_docx.py
+import io
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+# Tags do modelo: {{NUMERO_OS}}, {{DATA}}... As do tipo {{LINHA.X}} ficam numa linha de tabela que se repete.
+_PADRAO_TAG = re.compile(r"\{\{[A-Z0-9_.]+\}\}")
+_PREFIXO_LINHA = "{{LINHA."
+_NOME_MARCA = "SIGP_LINHAS"
+_MARCA_LINHAS = f"<!--{_NOME_MARCA}-->"
+_PARTE_DOCUMENTO = "word/document.xml"
+
+
+class ModeloDocx:
+    """
+    Modelo do Word "pré-compilado": o .docx é aberto com o python-docx uma vez só, os runs de cada
+    parágrafo com tag são juntados (como a substituição antiga já fazia) e o document.xml é guardado
+    já cortado nas posições das tags. Gerar um documento vira uma única passada juntando os pedaços
+    com os valores, e as demais partes do .docx são copiadas como estão.
+    """
+    def __init__(self, caminho, preparar=None):
+        from docx import Document  # Import adiado: python-docx só é carregado quando o primeiro modelo é compilado
+        from lxml import etree
+
+        doc = Document(caminho)
+        for paragrafo in self._paragrafos(doc):
+            self._juntar_runs(paragrafo)
+        if preparar:
+            preparar(doc)
+        for t in doc.element.body.iter("{*}t"):
+            if t.text and _PADRAO_TAG.search(t.text):
+                t.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")  # Valor com espaço no início/fim não é cortado
+
+        # A linha de tabela com tags {{LINHA.X}} sai do documento e fica guardada à parte (é repetida na geração)
+        self._pedacos_linha = []
+        for tr in list(doc.element.body.iter("{*}tr")):
+            if _PREFIXO_LINHA in "".join(t.text or "" for t in tr.iter("{*}t")):
+                self._pedacos_linha = self._cortar(etree.tostring(tr, encoding="unicode"))
+                tr.addprevious(etree.Comment(_NOME_MARCA))
+                tr.getparent().remove(tr)
+                break
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        # As demais partes (estilos, cabeçalho, imagens) já ficam compactadas num .zip base;
+        # cada documento gerado só acrescenta o document.xml no fim dele
+        base = io.BytesIO()
+        with zipfile.ZipFile(buffer) as origem, zipfile.ZipFile(base, "w", zipfile.ZIP_DEFLATED) as pacote:
+            for info in origem.infolist():
+                if info.filename == _PARTE_DOCUMENTO:
+                    xml = origem.read(info.filename).decode("utf-8")
+                else:
+                    pacote.writestr(info, origem.read(info.filename))
+        self._base = base.getvalue()
+        self._pedacos = self._cortar(xml)
+
+    @staticmethod
+    def _paragrafos(doc):
+        # Mesmo alcance da substituição antiga: parágrafos do corpo e das células das tabelas
+        yield from doc.paragraphs
+        for tabela in doc.tables:
+            for linha in tabela.rows:
+                for celula in linha.cells:
+                    yield from celula.paragraphs
+
+    @staticmethod
+    def _juntar_runs(paragrafo):
+        # O Word costuma quebrar "{{DATA}}" em vários runs; o texto todo vai para o primeiro run
+        texto = "".join(run.text for run in paragrafo.runs)
+        if not _PADRAO_TAG.search(texto) or len(paragrafo.runs) == 1:
+            return
+        for run in paragrafo.runs: run.text = ""
+        paragrafo.runs[0].text = texto
+
+    @staticmethod
+    def _cortar(xml):
+        # Alterna texto fixo e nome da tag: [fixo, tag, fixo, tag, ..., fixo]
+        return re.split(f"({_PADRAO_TAG.pattern}|{re.escape(_MARCA_LINHAS)})", xml)
+
+    @staticmethod
+    def _texto_xml(valor):
+        # Mesmas conversões do run.text do python-docx: quebra de linha vira <w:br/>, tabulação vira <w:tab/>
+        texto = escape(str(valor)).replace("\r\n", "\n").replace("\r", "\n")
+        texto = texto.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+        return texto.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+
+    def _montar(self, pedacos, valores, linhas):
+        saida = []
+        for i, pedaco in enumerate(pedacos):
+            if i % 2 == 0:
+                saida.append(pedaco)
+            elif pedaco == _MARCA_LINHAS:
+                saida.extend(self._montar(self._pedacos_linha, linha, ()) for linha in linhas)
+            elif pedaco in valores:
+                saida.append(self._texto_xml(valores[pedaco]))
+            else:
+                saida.append(pedaco)  # Tag sem valor fica no documento, como antes
+        return "".join(saida)
+
+    def gerar(self, destino, valores, linhas=()):
+        """Grava em destino o documento com as tags trocadas (valores: {"{{TAG}}": texto}; linhas: um dict por linha repetida)."""
+        documento = self._montar(self._pedacos, valores, linhas)
+        buffer = io.BytesIO(self._base)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as pacote:
+            pacote.writestr(_PARTE_DOCUMENTO, documento)
+        with open(destino, "wb") as arquivo:
+            arquivo.write(buffer.getvalue())
+
+
+_modelos = {}  # (caminho, preparar) -> (mtime, ModeloDocx)
+_lock = threading.Lock()
+
+
+def obter_modelo(caminho, preparar=None):
+    """Modelo compilado do cache; é recompilado se o arquivo do modelo mudou (data de modificação)."""
+    chave = (os.path.abspath(caminho), preparar)
+    mtime = os.path.getmtime(caminho)
+    with _lock:
+        em_cache = _modelos.get(chave)
+        if em_cache and em_cache[0] == mtime:
+            return em_cache[1]
+    modelo = ModeloDocx(caminho, preparar)
+    with _lock:
+        _modelos[chave] = (mtime, modelo)
+    return modelo
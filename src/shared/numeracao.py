@@ -0,0 +1,51 @@
+# shared/numeracao.py
+
+# Primeira chave do pg_advisory_xact_lock da numeração (a segunda é o hash de sistema/modelo/ano)
+_CHAVE_LOCK_NUMERACAO = 74_510_002
+
+
+def reservar_numeros(cursor, sistema, modelo, ano, consulta_semente, params_semente, quantidade=1):
+    """
+    Reserva 'quantidade' números seguidos para (sistema, modelo, ano) e devolve o primeiro.
+
+    Roda no cursor (na transação) de quem vai gravar o documento: o lock de (sistema, modelo, ano)
+    e o UPDATE do contador só são soltos no commit, então dois usuários nunca recebem o mesmo
+    número, e se a gravação falhar o rollback devolve os números (sem buracos na sequência).
+
+    Na primeira vez de cada (sistema, modelo, ano) o contador nasce do maior número já gravado,
+    calculado por consulta_semente (deve retornar uma linha com o MAX ou NULL). Enquanto a tabela
+    do contador não existe no banco (migração ainda não aplicada), o número sai direto desse MAX.
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (_CHAVE_LOCK_NUMERACAO, f"{sistema}|{modelo}|{ano}"))
+    # Consulta o banco (e não as versões lidas no login): a migração pode ter sido aplicada por outro computador
+    cursor.execute("SELECT to_regclass('common.numeracao_documentos') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return _maior_gravado(cursor, consulta_semente, params_semente) + 1
+
+    atualizar = """
+        UPDATE common.numeracao_documentos
+        SET ultimo_numero = ultimo_numero + %s
+        WHERE sistema = %s AND modelo = %s AND ano = %s
+        RETURNING ultimo_numero
+    """
+    cursor.execute(atualizar, (quantidade, sistema, modelo, ano))
+    resultado = cursor.fetchone()
+
+    if resultado is None:
+        ultimo = _maior_gravado(cursor, consulta_semente, params_semente)
+        cursor.execute("""
+            INSERT INTO common.numeracao_documentos (sistema, modelo, ano, ultimo_numero)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (sistema, modelo, ano) DO NOTHING
+        """, (sistema, modelo, ano, ultimo))
+        # Se outro usuário criou o contador ao mesmo tempo, o INSERT não fez nada e o UPDATE usa o dele
+        cursor.execute(atualizar, (quantidade, sistema, modelo, ano))
+        resultado = cursor.fetchone()
+
+    return resultado[0] - quantidade + 1
+
+
+def _maior_gravado(cursor, consulta_semente, params_semente):
+    cursor.execute(consulta_semente, params_semente)
+    semente = cursor.fetchone()
+    return semente[0] if semente and semente[0] is not None else 0
@@ -0,0 +1,19 @@
+# shared/pontos_documentos.py
+from config.schema import migracao_aplicada, MIGRACAO_PONTOS_DOCUMENTOS
+
+# Módulos gravados na tabela de vínculos (sigp.pontos_documentos.modulo)
+# Os vínculos são mantidos pelos triggers de sigp.ordens_servico e sigp.pareceres (ver config/schema.py):
+# quem grava o documento só grava o texto dos IDs.
+MODULO_OS = "OS"
+MODULO_PARECER = "PARECER"
+
+
+def condicao_ponto(modulo, coluna_id):
+    """
+    Trecho SQL de "o documento tem este ponto" (o parâmetro é o ID exato, sem %).
+    Devolve None enquanto os vínculos não estão completos no banco: aí quem chama usa a busca por trecho no texto.
+    """
+    if not migracao_aplicada(MIGRACAO_PONTOS_DOCUMENTOS):
+        return None
+    return (f"{coluna_id} IN (SELECT documento_id FROM sigp.pontos_documentos "
+            f"WHERE id_ponto = %s AND modulo = '{modulo}')")
@@ -0,0 +1,111 @@
+# shared/tarefas.py
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+class ExecutorTarefas:
+    """
+    Executa as chamadas ao banco/rede fora da thread do Tk e entrega o resultado de volta
+    na thread da interface (a fila é lida com after(), o Tk não pode ser tocado por outra thread).
+
+    Cada tarefa tem uma chave. Uma nova tarefa com a mesma chave torna a anterior obsoleta:
+    se ela ainda não começou é cancelada, se já começou o resultado dela é descartado.
+    """
+    INTERVALO_MS = 40
+
+    def __init__(self, raiz, max_workers=4):
+        self.raiz = raiz
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sigp-tarefa")
+        self._fila = queue.Queue()
+        self._geracoes = {}   # chave -> número da tarefa mais recente
+        self._futuros = {}    # chave -> futuro da tarefa mais recente
+        self._lock = threading.Lock()
+        self._agendar_leitura()
+
+    def executar(self, chave, funcao, *args, ao_concluir=None, ao_falhar=None, indicador=None, **kwargs):
+        """Agenda funcao(*args, **kwargs) no pool. Os callbacks rodam na thread do Tk."""
+        with self._lock:
+            geracao = self._geracoes.get(chave, 0) + 1
+            self._geracoes[chave] = geracao
+            anterior = self._futuros.get(chave)
+            if anterior is not None:
+                anterior.cancel()
+
+        if indicador is not None:
+            indicador.iniciar()
+
+        futuro = self._pool.submit(funcao, *args, **kwargs)
+        with self._lock:
+            self._futuros[chave] = futuro
+        futuro.add_done_callback(
+            lambda f: self._fila.put(lambda: self._entregar(chave, geracao, f, ao_concluir, ao_falhar, indicador))
+        )
+        return futuro
+
+    def cancelar(self, chave):
+        """Descarta o resultado da tarefa pendente dessa chave (se houver)."""
+        with self._lock:
+            self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+            futuro = self._futuros.pop(chave, None)
+        if futuro is not None:
+            futuro.cancel()
+
+    def notificar(self, callback, *args):
+        """Pode ser chamado de qualquer thread: roda callback(*args) na thread do Tk (ex.: progresso)."""
+        self._fila.put(lambda: callback(*args))
+
+    def _entregar(self, chave, geracao, futuro, ao_concluir, ao_falhar, indicador):
+        if indicador is not None:
+            indicador.parar()
+
+        with self._lock:
+            obsoleta = self._geracoes.get(chave) != geracao
+            if not obsoleta:
+                self._futuros.pop(chave, None)
+        if obsoleta or futuro.cancelled():
+            return
+
+        erro = futuro.exception()
+        if erro is not None:
+            if ao_falhar:
+                ao_falhar(erro)
+            else:
+                print(f"[LOG APP] Erro na tarefa '{chave}': {erro}")
+                traceback.print_exception(type(erro), erro, erro.__traceback__)
+            return
+
+        if ao_concluir:
+            ao_concluir(futuro.result())
+
+    def _agendar_leitura(self):
+        try:
+            self.raiz.after(self.INTERVALO_MS, self._ler_fila)
+        except Exception:
+            pass  # Janela já foi destruída
+
+    def _ler_fila(self):
+        while True:
+            try:
+                callback = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as e:
+                print(f"[LOG APP] Erro ao atualizar a tela com o resultado da tarefa: {e}")
+                traceback.print_exc()
+        self._agendar_leitura()
+
+    def encerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor = None
+
+def obter_executor(widget):
+    """Executor único do programa, ligado à janela principal do widget informado."""
+    global _executor
+    if _executor is None:
+        _executor = ExecutorTarefas(widget.winfo_toplevel())
+    return _executor
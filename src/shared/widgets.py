@@ -0,0 +1,269 @@
+# shared/widgets.py
+import customtkinter as ctk
+
+class IndicadorCarregamento(ctk.CTkLabel):
+    """
+    Rótulo que aparece enquanto houver tarefa em andamento (usado pelo ExecutorTarefas).
+    Conta as tarefas ativas: só some quando a última terminar.
+    """
+    def __init__(self, master, texto="⏳ Carregando...", **kwargs):
+        kwargs.setdefault("font", ("Arial Bold", 12))
+        kwargs.setdefault("text_color", "#F29C1F")
+        super().__init__(master, text="", **kwargs)
+        self._texto = texto
+        self._ativas = 0
+
+    def iniciar(self):
+        self._ativas += 1
+        self._mostrar(self._texto)
+
+    def parar(self):
+        self._ativas = max(0, self._ativas - 1)
+        if self._ativas == 0:
+            self._mostrar("")
+
+    def _mostrar(self, texto):
+        try:
+            self.configure(text=texto)
+        except Exception:
+            pass  # Tela já foi fechada
+
+
+class TabelaVirtual(ctk.CTkFrame):
+    """
+    Tabela com um número fixo de linhas de widgets: só as que cabem na área visível.
+    Ao rolar ou trocar de página nada é recriado, cada linha só recebe os dados do
+    registro que passou a mostrar. Por isso o tamanho da página não pesa na tela.
+
+    larguras: largura (px) de cada coluna de texto.
+    acoes: lista de dicts com os botões do fim da linha:
+        {"texto", "cor", "cor_hover", "largura", "comando": f(registro),
+         "disponivel": f(registro) -> bool (opcional, senão mostra "-"),
+         "estilo": f(registro) -> (texto, cor) (opcional, troca texto/cor do botão por linha)}
+    extrair_valores: f(registro) -> lista de valores exibidos (padrão: o próprio registro).
+    cor_texto: f(indice_coluna, texto) -> cor ou None (padrão #333333).
+    """
+    ALTURA_LINHA = 44
+    ESPACO_LINHA = 4
+    CORES_LINHA = ("#F9F9F9", "#FFFFFF")
+    COR_TEXTO = "#333333"
+    EVENTOS_RODA = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+    def __init__(self, master, larguras, acoes=(), largura_acoes=0, extrair_valores=None, cor_texto=None,
+                 texto_vazio="Nenhum dado encontrado.", **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.larguras = list(larguras)
+        self.acoes = list(acoes)
+        self.largura_acoes = largura_acoes
+        self.extrair_valores = extrair_valores or (lambda registro: registro)
+        self.cor_texto = cor_texto or (lambda j, texto: None)
+
+        self._dados = []
+        self._inicio = 0
+        self._visiveis = 1
+        self._linhas = []  # Pool de linhas já montadas (reaproveitadas)
+
+        self._corpo = ctk.CTkFrame(self, fg_color="transparent")
+        self._corpo.pack(side="left", fill="both", expand=True)
+        self._corpo.grid_columnconfigure(0, weight=1)
+        self._barra = ctk.CTkScrollbar(self, command=self._ao_rolar)
+        self._barra.pack(side="right", fill="y")
+
+        self._lbl_vazio = ctk.CTkLabel(self._corpo, text=texto_vazio, text_color="gray", font=("Arial", 14))
+
+        self._corpo.bind("<Configure>", self._ao_redimensionar)
+        # Roda do mouse: uma tag de eventos só desta tabela, posta nos widgets dela (e nas linhas criadas depois).
+        # Nada de bind_all: não acumula entre telas e não reage a widgets de fora
+        self._tag_roda = f"TabelaVirtualRoda{id(self)}"
+        for sequencia in self.EVENTOS_RODA:
+            self.bind_class(self._tag_roda, sequencia, self._ao_girar_roda)
+        self._ligar_roda(self)
+
+    # --- API ---
+    def definir_dados(self, registros, texto_vazio=None):
+        self._dados = list(registros)
+        self._inicio = 0
+        if texto_vazio is not None:
+            self._lbl_vazio.configure(text=texto_vazio)
+        if self._dados:
+            self._lbl_vazio.grid_forget()
+        else:
+            self._lbl_vazio.grid(row=0, column=0, pady=20)
+        self._atualizar()
+
+    def destroy(self):
+        for sequencia in self.EVENTOS_RODA:
+            self.unbind_class(self._tag_roda, sequencia)
+        super().destroy()
+
+    # --- Pool de linhas ---
+    def _criar_linha(self):
+        frame = ctk.CTkFrame(self._corpo, corner_radius=6, height=self.ALTURA_LINHA)
+        frame.pack_propagate(False)
+
+        labels = []
+        for largura in self.larguras:
+            lbl = ctk.CTkLabel(frame, text="", width=largura, text_color=self.COR_TEXTO, font=("Arial", 12), anchor="w")
+            lbl.pack(side="left", padx=5, pady=6)
+            labels.append(lbl)
+
+        botoes = []
+        if self.acoes:
+            coluna_acoes = ctk.CTkFrame(frame, width=self.largura_acoes, height=40, fg_color="transparent")
+            coluna_acoes.pack_propagate(False)
+            coluna_acoes.pack(side="left", padx=5, pady=2)
+            caixa = ctk.CTkFrame(coluna_acoes, fg_color="transparent")
+            caixa.place(relx=0.5, rely=0.5, anchor="center")
+            for acao in self.acoes:
+                btn = ctk.CTkButton(caixa, text=acao["texto"], font=acao.get("fonte", ("Arial", 16)), fg_color=acao["cor"],
+                                    hover_color=acao["cor_hover"], width=acao["largura"], height=32)
+                btn.pack(side="left", padx=3)
+                botoes.append(btn)
+
+        self._ligar_roda(frame)
+        # Último estado aplicado em cada widget: só chama configure() quando algo muda
+        return {"frame": frame, "labels": labels, "botoes": botoes, "textos": [None] * len(labels),
+                "cores": [None] * len(labels), "fundo": None, "disponivel": [None] * len(botoes)}
+
+    def _vincular(self, linha, indice):
+        registro = self._dados[indice]
+
+        fundo = self.CORES_LINHA[indice % 2]
+        if linha["fundo"] != fundo:
+            linha["frame"].configure(fg_color=fundo)
+            linha["fundo"] = fundo
+
+        for j, val in enumerate(self.extrair_valores(registro)[:len(self.larguras)]):
+            texto = str(val) if val is not None else "-"
+            limite = int(self.larguras[j] / 8)
+            texto_curto = texto[:limite] + ".." if len(texto) > limite else texto
+            cor = self.cor_texto(j, texto) or self.COR_TEXTO
+            if linha["textos"][j] != texto_curto or linha["cores"][j] != cor:
+                linha["labels"][j].configure(text=texto_curto, text_color=cor)
+                linha["textos"][j], linha["cores"][j] = texto_curto, cor
+
+        for k, (acao, btn) in enumerate(zip(self.acoes, linha["botoes"])):
+            disponivel = acao.get("disponivel", lambda r: True)(registro)
+            # None = indisponível; senão (texto, cor) do botão nesta linha
+            estilo = (acao["estilo"](registro) if "estilo" in acao else (acao["texto"], acao["cor"])) if disponivel else None
+            if linha["disponivel"][k] != estilo:
+                if estilo:
+                    btn.configure(text=estilo[0], fg_color=estilo[1], state="normal")
+                else:
+                    btn.configure(text="-", fg_color="transparent", text_color_disabled=self.COR_TEXTO, state="disabled")
+                linha["disponivel"][k] = estilo
+            btn.configure(command=lambda r=registro, f=acao["comando"]: f(r))
+
+    def _atualizar(self):
+        total = len(self._dados)
+        self._inicio = max(0, min(self._inicio, total - self._visiveis))
+
+        for k, linha in enumerate(self._linhas):
+            indice = self._inicio + k
+            if k < self._visiveis and indice < total:
+                self._vincular(linha, indice)
+                linha["frame"].grid(row=k, column=0, sticky="ew", padx=2, pady=self.ESPACO_LINHA // 2)
+            else:
+                linha["frame"].grid_remove()
+
+        if total > self._visiveis:
+            self._barra.set(self._inicio / total, (self._inicio + self._visiveis) / total)
+        else:
+            self._barra.set(0, 1)
+
+    # --- Eventos ---
+    def _ao_redimensionar(self, event):
+        visiveis = max(1, event.height // (self.ALTURA_LINHA + self.ESPACO_LINHA))
+        if visiveis == self._visiveis and len(self._linhas) >= visiveis:
+            return
+        self._visiveis = visiveis
+        while len(self._linhas) < visiveis:
+            self._linhas.append(self._criar_linha())
+        self._atualizar()
+
+    def _ao_rolar(self, *args):
+        total = len(self._dados)
+        if args[0] == "moveto":
+            self._inicio = int(round(float(args[1]) * total))
+        elif args[0] == "scroll":
+            passo = self._visiveis if args[2] == "pages" else 1
+            self._inicio += int(args[1]) * passo
+        self._atualizar()
+
+    def _ligar_roda(self, widget):
+        # O evento da roda vai para o widget mais interno sob o ponteiro (canvas/label dos CTk): marca todos
+        if self._tag_roda not in widget.bindtags():
+            widget.bindtags((self._tag_roda,) + widget.bindtags())
+        for filho in widget.winfo_children():
+            self._ligar_roda(filho)
+
+    def _ao_girar_roda(self, event):
+        # Só chega aqui vindo de widgets desta tabela (ver _ligar_roda)
+        if event.num == 4 or event.delta > 0:
+            self._ao_rolar("scroll", -3, "units")
+        elif event.num == 5 or event.delta < 0:
+            self._ao_rolar("scroll", 3, "units")
+
+
+class AvisoFilaEnvio(ctk.CTkFrame):
+    """
+    Aviso do topo da janela: quantos documentos ainda não foram copiados para a rede.
+    Some quando a fila está vazia; ao clicar lista os pendentes (com o último erro) e permite tentar de novo.
+    """
+    INTERVALO_MS = 3000
+
+    def __init__(self, master, fila, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.fila = fila
+        self._botao = ctk.CTkButton(self, text="", fg_color="#F29C1F", hover_color="#D9820B", font=("Arial Bold", 12),
+                                    height=30, corner_radius=15, command=self._mostrar_pendentes)
+        self._visivel = False
+        self._atualizar()
+
+    def _atualizar(self):
+        try:
+            pendentes = self.fila.pendentes()
+            if pendentes:
+                falhando = sum(1 for r in pendentes if r.get("tentativas"))
+                texto = f"📤 {len(pendentes)} documento(s) aguardando envio à rede"
+                self._botao.configure(text=texto + (f" ({falhando} com falha)" if falhando else ""),
+                                      fg_color="#C21010" if falhando else "#F29C1F")
+                if not self._visivel:
+                    self._botao.pack(padx=5)
+                    self._visivel = True
+            elif self._visivel:
+                self._botao.pack_forget()
+                self._visivel = False
+            self.after(self.INTERVALO_MS, self._atualizar)
+        except Exception:
+            pass  # Janela já foi fechada
+
+    def _mostrar_pendentes(self):
+        popup = ctk.CTkToplevel(self)
+        popup.title("Documentos aguardando envio à rede")
+        popup.geometry("800x550")
+        popup.grab_set()
+
+        ctk.CTkLabel(popup, text="Fila de envio para a rede", font=("Arial Black", 20), text_color="#0F8C75").pack(pady=15)
+        ctk.CTkLabel(popup, text="Os documentos já estão salvos neste computador e são copiados automaticamente assim que a rede responder.",
+                     font=("Arial", 12), text_color="gray", wraplength=740).pack(padx=20)
+
+        caixa = ctk.CTkTextbox(popup, font=("Consolas", 12), fg_color="#F9F9F9")
+        caixa.pack(fill="both", expand=True, padx=20, pady=10)
+        pendentes = self.fila.pendentes()
+        if not pendentes:
+            caixa.insert("end", "Nenhum documento pendente.")
+        for registro in pendentes:
+            caixa.insert("end", f"• {registro['destino']}\n   Gerado em {registro['criado_em']} | Tentativas: {registro['tentativas']}\n")
+            if registro.get("ultimo_erro"):
+                caixa.insert("end", f"   Último erro: {registro['ultimo_erro']}\n")
+        caixa.configure(state="disabled")
+
+        botoes = ctk.CTkFrame(popup, fg_color="transparent")
+        botoes.pack(fill="x", padx=40, pady=20)
+        ctk.CTkButton(botoes, text="🔄 Tentar enviar agora", fg_color="#0F8C75", font=("Arial Bold", 15), height=45,
+                      command=lambda: (self.fila.tentar_agora(), popup.destroy())).pack(side="left", expand=True, fill="x", padx=5)
+        ctk.CTkButton(botoes, text="Fechar", fg_color="gray", font=("Arial Bold", 15), height=45,
+                      command=popup.destroy).pack(side="left", expand=True, fill="x", padx=5)